@@ -0,0 +1,89 @@
+"""
+Порівняння однопрохідного HtmlTextExtractor з попереднім _strip_html на трьох
+регулярках (script/style → теги → unescape → пробіли).
+
+Запуск (з кореня репозиторію):
+    python -m benchmarks.bench_strip_html
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import time
+from html import unescape
+from typing import Callable
+
+from src.wordcount_mapreduce.extract import HtmlTextExtractor, strip_html
+
+_TAG_RE = re.compile(r"(?s)<[^>]+>")
+_SCRIPT_STYLE_RE = re.compile(r"(?is)<(script|style)\b.*?>.*?</\1>")
+_WS_RE = re.compile(r"\s+")
+
+
+def legacy_strip_html(html: str) -> str:
+    """Попередня реалізація: кожен крок — окремий повний прохід і нова копія."""
+    no_scripts = _SCRIPT_STYLE_RE.sub(" ", html)
+    no_tags = _TAG_RE.sub(" ", no_scripts)
+    text = unescape(no_tags)
+    return _WS_RE.sub(" ", text).strip()
+
+
+def make_page(blocks: int, seed: int = 42) -> str:
+    """Синтетична сторінка: абзаци з сутностями, inline-скрипти та стилі."""
+    rnd = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "кіт", "пес", "їжак", "&amp;", "&lt;", "dog"]
+    parts: list[str] = []
+    for i in range(blocks):
+        body = " ".join(rnd.choice(words) for _ in range(12))
+        parts.append(f"<div class='c{i}'><p>{body}</p></div>\n")
+        if i % 50 == 0:
+            parts.append("<script>var x = '<b>' + 1; for (i=0;i<9;i++) {}</script>")
+        if i % 200 == 0:
+            parts.append("<style>p { color: red }</style>")
+    return "".join(parts)
+
+
+def make_unclosed_scripts(blocks: int) -> str:
+    """Скрипти, закриті як '</script >' — не збігаються з `</\\1>` у старій регулярці."""
+    return "<p>text here</p><script>var a = 1;</script >" * blocks
+
+
+def _timeit(fn: Callable[[str], str], html: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _chunked(html: str, chunk_size: int = 64 * 1024) -> str:
+    extractor = HtmlTextExtractor()
+    parts = [
+        extractor.feed(html[i : i + chunk_size])
+        for i in range(0, len(html), chunk_size)
+    ]
+    parts.append(extractor.close())
+    return "".join(parts).strip()
+
+
+def main() -> None:
+    cases = [
+        ("typical page, 2 MB", make_page(20_000)),
+        ("typical page, 20 MB", make_page(200_000)),
+        ("unclosed scripts, 6 KB", make_unclosed_scripts(150)),
+    ]
+    print(f"{'case':28s} {'legacy, s':>10s} {'single, s':>10s} {'chunked, s':>10s}")
+    for name, html in cases:
+        t_legacy = _timeit(legacy_strip_html, html, repeat=1)
+        t_single = _timeit(strip_html, html)
+        t_chunked = _timeit(_chunked, html)
+        print(
+            f"{name:28s} {t_legacy:10.3f} {t_single:10.3f} {t_chunked:10.3f}"
+            f"   x{t_legacy / t_single:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Детерміновані синтетичні дані для бенчмарків: той самий seed і розмір дають
+байт-у-байт однакові файли на будь-якій машині (random.Random з рядковим
+seed не залежить від PYTHONHASHSEED), тож результати різних запусків і
+базова лінія порівнювані.
+
+- Zipf-текст латиницею й кирилицею (частота слова рангу r ∝ 1 / r**s);
+- HTML-сторінки, де значну частину займають <script>/<style> і сутності;
+- дерева файлів: багато дрібних або кілька величезних.
+
+Файли кешуються в data_dir за назвою з параметрами й повторно не пишуться.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import random
+from pathlib import Path
+from typing import Iterator
+
+LATIN = "abcdefghijklmnopqrstuvwxyz"
+CYRILLIC = "абвгґдеєжзиіїйклмнопрстуфхцчшщьюя"
+_BLOCK_WORDS = 64 * 1024  # слів у блоці генерації (≈ 0.5 MB тексту)
+_EXTENSIONS = ("txt", "jpg", "png", "pdf", "csv", "md", "json", "")
+
+
+def vocabulary(size: int, seed: int = 0, cyrillic: float = 0.5) -> list[str]:
+    """size різних слів; частка cyrillic — кирилицею, решта — латиницею."""
+    rnd = random.Random(f"vocab:{seed}")
+    seen: set[str] = set()
+    words: list[str] = []
+    while len(words) < size:
+        alphabet = CYRILLIC if rnd.random() < cyrillic else LATIN
+        length = min(2 + int(rnd.expovariate(0.3)), 16)
+        word = "".join(rnd.choices(alphabet, k=length))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def zipf_cum_weights(size: int, s: float = 1.07) -> list[float]:
+    return list(itertools.accumulate(1 / rank**s for rank in range(1, size + 1)))
+
+
+def iter_zipf_text(
+    size_bytes: int,
+    seed: int = 0,
+    vocab_size: int = 50_000,
+    s: float = 1.07,
+    cyrillic: float = 0.5,
+) -> Iterator[str]:
+    """
+    Віддає текст блоками, доки сумарно не набереться size_bytes байтів UTF-8
+    (останній блок може трохи перевищити). Слова — за законом Ципфа, з
+    рядками по ~12 слів, розділовими знаками й великими літерами на початку.
+    """
+    words = vocabulary(vocab_size, seed, cyrillic)
+    cum = zipf_cum_weights(vocab_size, s)
+    written = 0
+    for block in itertools.count():
+        rnd = random.Random(f"text:{seed}:{block}")
+        picked = rnd.choices(words, cum_weights=cum, k=_BLOCK_WORDS)
+        for i in range(0, len(picked), 12):
+            picked[i] = picked[i].capitalize()
+        for i in range(11, len(picked), 12):
+            picked[i] += ".\n"
+        text = " ".join(picked)
+        yield text
+        written += len(text.encode("utf-8"))
+        if written >= size_bytes:
+            return
+
+
+def zipf_text(size_bytes: int, seed: int = 0) -> str:
+    return "".join(iter_zipf_text(size_bytes, seed))
+
+
+def html_page(size_bytes: int, seed: int = 0, script_share: float = 0.4) -> str:
+    """
+    Сторінка з абзаців Zipf-тексту з сутностями, що приблизно на script_share
+    складається з inline-скриптів (зі '<' і тегами в рядках) і стилів.
+    """
+    rnd = random.Random(f"html:{seed}")
+    parts = ["<!DOCTYPE html><html><head><title>bench</title></head><body>\n"]
+    script = (
+        "<script>var s = '<b>' + i; for (var i = 0; i < 9; i++) "
+        "{ document.write('<p>' + s + '</p>'); }</script>\n"
+    )
+    style = "<style>p.c { color: red } div > p { margin: 0 }</style>\n"
+    text_bytes = script_bytes = 0
+    lines = (
+        line for block in iter_zipf_text(size_bytes, seed) for line in block.split("\n")
+    )
+    for line in lines:
+        para = line + (" &amp; &lt;b&gt; &#1111;" if rnd.random() < 0.3 else "")
+        parts.append(f"<div class='c{rnd.randrange(100)}'><p>{para}</p></div>\n")
+        text_bytes += len(para.encode("utf-8")) + 30
+        while script_bytes < text_bytes * script_share / (1 - script_share):
+            chunk = script if rnd.random() < 0.8 else style
+            parts.append(chunk)
+            script_bytes += len(chunk)
+        if text_bytes + script_bytes >= size_bytes:
+            break
+    parts.append("</body></html>\n")
+    return "".join(parts)
+
+
+def text_file(data_dir: Path, size_bytes: int, seed: int = 0) -> Path:
+    """Zipf-текст розміром ≈ size_bytes у data_dir (кешується)."""
+    path = Path(data_dir) / f"zipf-{size_bytes}-{seed}.txt"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".part")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for block in iter_zipf_text(size_bytes, seed):
+                f.write(block)
+                f.write("\n")
+        os.replace(tmp, path)
+    return path
+
+
+def html_dir(data_dir: Path, pages: int, page_bytes: int, seed: int = 0) -> Path:
+    """pages HTML-сторінок по ≈ page_bytes (кешується); назви — 0000.html, ..."""
+    root = Path(data_dir) / f"html-{pages}x{page_bytes}-{seed}"
+    if not root.exists():
+        tmp = root.with_name(root.name + ".part")
+        tmp.mkdir(parents=True, exist_ok=True)
+        for i in range(pages):
+            page = html_page(page_bytes, seed * 100_003 + i)
+            (tmp / f"{i:04d}.html").write_text(page, encoding="utf-8")
+        os.replace(tmp, root)
+    return root
+
+
+def file_tree(
+    data_dir: Path,
+    files: int,
+    file_bytes: int,
+    seed: int = 0,
+    fanout: int = 32,
+) -> Path:
+    """
+    Дерево з files файлів (кешується). file_bytes ≤ 64 KiB — «багато дрібних»:
+    розміри від 1/8 до 2 × file_bytes, вкладені каталоги по fanout файлів,
+    різні розширення й повтори назв. Більші — «кілька величезних»: рівно
+    file_bytes кожен, записаний блоками по 1 MiB.
+    """
+    root = Path(data_dir) / f"tree-{files}x{file_bytes}-{seed}"
+    if root.exists():
+        return root
+    rnd = random.Random(f"tree:{seed}")
+    tmp = root.with_name(root.name + ".part")
+    block = rnd.randbytes(1 << 20)
+    for i in range(files):
+        level1, level2 = divmod(i // fanout, fanout)
+        ext = _EXTENSIONS[rnd.randrange(len(_EXTENSIONS))]
+        # Унікальні в каталозі, але часто однакові між каталогами (колізії в цілі)
+        name = f"f{i % fanout}-{rnd.randrange(8)}" + (f".{ext}" if ext else "")
+        path = tmp / f"d{level1}" / f"s{level2}" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if file_bytes <= 64 * 1024:
+            size = rnd.randint(max(1, file_bytes // 8), file_bytes * 2)
+            path.write_bytes(block[:size])
+            continue
+        with open(path, "wb") as f:
+            left = file_bytes
+            while left > 0:
+                left -= f.write(block[: min(left, len(block))])
+    os.replace(tmp, root)
+    return root
@@ -0,0 +1,110 @@
+"""
+Вимірювання одного випадку бенчмарку та порівняння з базовою лінією.
+
+Кожен повтор запускається в окремому (spawn) процесі: пік RSS (ru_maxrss)
+тоді належить саме цьому випадку, а не попереднім, і кеші інтерпретатора
+не переходять між випадками. setup(*args) виконується в дочірньому процесі
+й повертає функцію без аргументів — вимірюється лише вона (підготовка
+даних, читання файлу в пам'ять тощо в час не входять).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+try:
+    import resource
+except ImportError:  # Windows: без ru_maxrss/ru_utime — лише wall і process_time
+    resource = None  # type: ignore[assignment]
+
+_RSS_UNIT = 1 if sys.platform == "darwin" else 1024  # ru_maxrss: байти / KiB
+
+
+def _own_peak_rss(maxrss: int) -> int:
+    # Linux зберігає ru_maxrss через execve, тож spawn-процес успадкував би пік
+    # батька на момент fork; VmHWM належить новому адресному простору.
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return maxrss * _RSS_UNIT
+
+
+def _usage() -> tuple[float, int]:
+    """(CPU-секунди процесу й завершених дочірніх, пік RSS у байтах)."""
+    if resource is None:
+        return time.process_time(), 0
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + kids.ru_utime + kids.ru_stime
+    return cpu, max(_own_peak_rss(own.ru_maxrss), kids.ru_maxrss * _RSS_UNIT)
+
+
+def _run_case(setup: Callable[..., Callable[[], object]], args: tuple) -> dict:
+    fn = setup(*args)
+    cpu0, _ = _usage()
+    t0 = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - t0
+    cpu1, peak = _usage()
+    return {"wall_seconds": wall, "cpu_seconds": cpu1 - cpu0, "peak_rss_bytes": peak}
+
+
+def measure(
+    setup: Callable[..., Callable[[], object]], *args: object, repeat: int = 1
+) -> dict[str, float]:
+    """
+    Найкращий (мінімальний) wall-час із repeat запусків у свіжих процесах;
+    cpu_seconds — того ж запуску, peak_rss_bytes — максимум серед усіх.
+    setup і args мають бути picklable (функції рівня модуля).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    best: dict[str, float] | None = None
+    peak = 0
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            run = pool.submit(_run_case, setup, args).result()
+        peak = max(peak, run["peak_rss_bytes"])
+        if best is None or run["wall_seconds"] < best["wall_seconds"]:
+            best = run
+    assert best is not None
+    return {**best, "peak_rss_bytes": peak}
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    threshold: float = 0.15,
+) -> list[dict[str, object]]:
+    """
+    Порівнює випадки, що є в обох наборах: регресія — wall-час або пік RSS
+    більші за базові понад threshold (частка). Повертає рядки для звіту
+    (усі спільні випадки) з позначкою regression.
+    """
+    rows: list[dict[str, object]] = []
+    for name, run in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        wall = run["wall_seconds"] / max(base["wall_seconds"], 1e-9)
+        rss = (
+            run["peak_rss_bytes"] / base["peak_rss_bytes"]
+            if run.get("peak_rss_bytes") and base.get("peak_rss_bytes")
+            else 1.0
+        )
+        rows.append(
+            {
+                "case": name,
+                "wall_ratio": wall,
+                "rss_ratio": rss,
+                "regression": wall > 1 + threshold or rss > 1 + threshold,
+            }
+        )
+    return rows
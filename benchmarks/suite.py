@@ -0,0 +1,297 @@
+"""
+Відтворюваний набір бенчмарків обох конвеєрів: MapReduce-підрахунок
+(mapreduce_count у пам'яті й mapreduce_count_files), очищення HTML
+(_strip_html), сортер (sort_folder) і завантаження (iter_texts/iter_text з
+локального HTTP-сервера — мережа не потрібна). Дані синтетичні й
+детерміновані (benchmarks/datagen.py), threads/workers перебираються.
+
+Для кожного випадку в JSON пишуться wall-час, CPU-час і пік RSS; з
+--baseline результати порівнюються з попереднім JSON цього ж скрипта (його
+записують локально на еталонному коміті — у репозиторії базової лінії
+немає), і регресія понад --threshold дає код виходу 1.
+
+Запуск (з кореня репозиторію):
+    python -m benchmarks.suite --out data/output/bench.json
+    python -m benchmarks.suite --only mapreduce strip --out bench-base.json
+    python -m benchmarks.suite --only mapreduce strip --baseline bench-base.json
+    python -m benchmarks.suite --suite full --data-dir /mnt/scratch/bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterator
+
+from src.sorter_async.sort_async import SortParams, logger as sorter_logger, sort_folder
+from src.wordcount_mapreduce.fetch import _strip_html, iter_text, iter_texts
+from src.wordcount_mapreduce.mapreduce import mapreduce_count, mapreduce_count_files
+
+from . import datagen
+from .harness import compare, measure
+
+GROUPS = ("mapreduce", "strip", "sort", "fetch")
+# Розміри даних для кожного набору: quick — хвилини, full — до 1 GiB
+SUITES: dict[str, dict[str, object]] = {
+    "quick": {
+        "text": [1 << 20, 8 << 20],
+        "html": [1 << 20, 8 << 20],
+        "trees": [(2_000, 4 << 10), (2, 64 << 20)],
+        "pages": (16, 256 << 10),
+        "stream": 8 << 20,
+    },
+    "full": {
+        "text": [1 << 20, 64 << 20, 1 << 30],
+        "html": [1 << 20, 64 << 20],
+        "trees": [(100_000, 4 << 10), (4, 1 << 30)],
+        "pages": (128, 512 << 10),
+        "stream": 128 << 20,
+    },
+}
+_IN_MEMORY_MAX = 64 << 20  # mapreduce_count тримає всі токени в пам'яті
+
+
+def _size(n: int) -> str:
+    for unit, shift in (("GiB", 30), ("MiB", 20), ("KiB", 10)):
+        if n >= 1 << shift:
+            return f"{n / (1 << shift):g}{unit}"
+    return f"{n}B"
+
+
+def _ints(value: str) -> list[int]:
+    return [int(x) for x in value.split(",") if x]
+
+
+# --- setup-функції: виконуються в дочірньому процесі (див. harness.measure) ---
+
+
+def _setup_count(path: Path, threads: int, executor: str) -> Callable[[], object]:
+    text = path.read_text(encoding="utf-8")
+    return partial(mapreduce_count, text, threads, executor=executor)
+
+
+def _setup_count_files(path: Path, threads: int, executor: str) -> Callable[[], object]:
+    return partial(mapreduce_count_files, [path], threads, executor=executor)
+
+
+def _setup_strip(path: Path) -> Callable[[], object]:
+    html = path.read_text(encoding="utf-8")
+    return partial(_strip_html, html)
+
+
+def _setup_sort(src: Path, dst: Path, workers: int) -> Callable[[], object]:
+    sorter_logger.setLevel(logging.WARNING)
+    params = SortParams(src, dst, workers=workers)
+    return lambda: asyncio.run(sort_folder(params))
+
+
+def _drain(results: Iterator[object]) -> None:
+    for res in results:
+        if getattr(res, "error", None) is not None:
+            raise RuntimeError(f"fetch failed: {res.error}")
+
+
+def _setup_fetch(urls: list[str], workers: int) -> Callable[[], object]:
+    return lambda: _drain(iter_texts(urls, workers=workers, per_host=workers))
+
+
+def _setup_stream(url: str) -> Callable[[], object]:
+    return lambda: _drain(iter_text(url))
+
+
+# --- набір випадків ---
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@contextmanager
+def serve(root: Path) -> Iterator[str]:
+    """Локальний HTTP-сервер над root; повертає базовий URL."""
+    handler = partial(_QuietHandler, directory=str(root))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run_suite(
+    suite: str,
+    groups: tuple[str, ...],
+    data_dir: Path,
+    threads: list[int],
+    workers: list[int],
+    repeat: int = 1,
+) -> dict[str, dict]:
+    """
+    Виконує випадки вибраних груп і повертає {назва: вимір}; назва
+    стабільна між запусками (група/функція/розмір/параметри), по ній
+    і йде порівняння з базовою лінією.
+    """
+    sizes = SUITES[suite]
+    results: dict[str, dict] = {}
+
+    def run(name: str, nbytes: int, setup: Callable, *args: object) -> None:
+        m = measure(setup, *args, repeat=repeat)
+        m["bytes"] = nbytes
+        m["mb_per_second"] = nbytes / (1 << 20) / max(m["wall_seconds"], 1e-9)
+        results[name] = m
+        print(
+            f"{name:52s} {m['wall_seconds']:8.3f} s  cpu {m['cpu_seconds']:8.3f} s"
+            f"  rss {m['peak_rss_bytes'] / (1 << 20):7.1f} MiB"
+            f"  {m['mb_per_second']:8.1f} MB/s",
+            flush=True,
+        )
+
+    if "mapreduce" in groups:
+        for size in sizes["text"]:
+            path = datagen.text_file(data_dir, size)
+            for executor in ("thread", "process"):
+                for n in threads:
+                    tag = f"{_size(size)}/{executor}/threads={n}"
+                    args = (path, n, executor)
+                    if size <= _IN_MEMORY_MAX:
+                        run(f"mapreduce/count/{tag}", size, _setup_count, *args)
+                    run(f"mapreduce/files/{tag}", size, _setup_count_files, *args)
+
+    if "strip" in groups:
+        for size in sizes["html"]:
+            page = datagen.html_dir(data_dir, 1, size) / "0000.html"
+            run(f"strip/{_size(size)}", size, _setup_strip, page)
+
+    if "sort" in groups:
+        for files, file_bytes in sizes["trees"]:
+            src = datagen.file_tree(data_dir, files, file_bytes)
+            total = sum(p.stat().st_size for p in src.rglob("*") if p.is_file())
+            for n in workers:
+                dst = Path(tempfile.mkdtemp(prefix="sort-", dir=data_dir))
+                try:
+                    run(
+                        f"sort/{files}x{_size(file_bytes)}/workers={n}",
+                        total,
+                        _setup_sort,
+                        src,
+                        dst,
+                        n,
+                    )
+                finally:
+                    shutil.rmtree(dst, ignore_errors=True)
+
+    if "fetch" in groups:
+        pages, page_bytes = sizes["pages"]
+        site = datagen.html_dir(data_dir, pages, page_bytes)
+        big = datagen.html_dir(data_dir, 1, sizes["stream"], seed=1)
+        with serve(data_dir) as base:
+            urls = [f"{base}/{site.name}/{p.name}" for p in sorted(site.iterdir())]
+            for n in workers:
+                run(
+                    f"fetch/{pages}x{_size(page_bytes)}/workers={n}",
+                    pages * page_bytes,
+                    _setup_fetch,
+                    urls,
+                    n,
+                )
+            run(
+                f"fetch/stream/{_size(sizes['stream'])}",
+                sizes["stream"],
+                _setup_stream,
+                f"{base}/{big.name}/0000.html",
+            )
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks.suite",
+        description="Бенчмарки MapReduce, очищення HTML, сортера й завантаження.",
+    )
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument(
+        "--only", nargs="+", choices=GROUPS, default=list(GROUPS), metavar="GROUP"
+    )
+    parser.add_argument("--threads", type=_ints, default=[1, 2, 4, 8])
+    parser.add_argument("--workers", type=_ints, default=[4, 16, 64])
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Повтори, береться найкращий."
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "goit-cs-hw-05-bench",
+        help="Кеш згенерованих даних (повторно не генеруються).",
+    )
+    parser.add_argument("--out", type=Path, help="Куди записати результати (JSON).")
+    parser.add_argument(
+        "--baseline", type=Path, help="JSON попереднього запуску для порівняння."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.15,
+        help="Допустиме погіршення wall-часу/пам'яті (частка, за замовчуванням 0.15).",
+    )
+    args = parser.parse_args(argv)
+    if args.repeat <= 0:
+        parser.error("--repeat має бути додатнім.")
+    if args.baseline is not None and not args.baseline.exists():
+        parser.error(f"Файл базової лінії не знайдено: {args.baseline}")
+
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+    results = run_suite(
+        args.suite,
+        tuple(args.only),
+        args.data_dir,
+        args.threads,
+        args.workers,
+        args.repeat,
+    )
+    report = {
+        "suite": args.suite,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "cases": results,
+    }
+    if args.out is not None:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"\nResults: {args.out}")
+
+    if args.baseline is None:
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["cases"]
+    rows = compare(results, baseline, args.threshold)
+    print(f"\n{'case':52s} {'wall':>7s} {'rss':>7s}")
+    for row in rows:
+        mark = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['case']:52s} x{row['wall_ratio']:6.2f} x{row['rss_ratio']:6.2f}"
+            f"{mark}"
+        )
+    regressions = sum(bool(row["regression"]) for row in rows)
+    print(f"Compared: {len(rows)}, regressions: {regressions}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
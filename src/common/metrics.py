@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import cProfile
+import json
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+class LiveLine:
+    """
+    Рядок прогресу в stderr, що оновлюється на місці (\\r) раз на interval
+    секунд з окремого потоку; render() читає лічильники без локів.
+    """
+
+    def __init__(self, render: Callable[[], str], interval: float = 0.5) -> None:
+        self.render = render
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            sys.stderr.write(f"\r\x1b[K{self.render()}")
+            sys.stderr.flush()
+
+    def __enter__(self) -> LiveLine:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        sys.stderr.write(f"\r\x1b[K{self.render()}\n")
+        sys.stderr.flush()
+
+
+@contextmanager
+def profiled(
+    profile_path: Path | None = None, tracemalloc_top: int = 0
+) -> Iterator[dict[str, object]]:
+    """
+    Хуки профілювання навколо запуску: cProfile (лише головний потік — event loop сортера чи
+    токенізація/Reduce wordcount-mr, не воркери пулів; результат — у
+    profile_path для pstats/snakeviz) і tracemalloc (пік пам'яті головного
+    процесу й tracemalloc_top найбільших місць алокацій). Підсумок
+    з'являється в словнику, що повертається, після виходу з блоку.
+    """
+    report: dict[str, object] = {}
+    profiler = cProfile.Profile() if profile_path is not None else None
+    if tracemalloc_top:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield report
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+            report["profile"] = str(profile_path)
+        if tracemalloc_top:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report["tracemalloc"] = {
+                "peak_bytes": peak,
+                "top": [
+                    {"where": str(stat.traceback), "bytes": stat.size}
+                    for stat in snapshot.statistics("lineno")[:tracemalloc_top]
+                ],
+            }
+
+
+def write_metrics(path: Path, report: dict[str, object]) -> None:
+    """Записує звіт --metrics-json (UTF-8, з відступами)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+        f.write("\n")
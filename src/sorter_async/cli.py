@@ -1,10 +1,17 @@
 import argparse
 import sys
+from contextlib import nullcontext
+from dataclasses import asdict
 from pathlib import Path
-import asyncio
 import logging
 
-from .sort_async import SortParams, sort_folder
+from ..common.metrics import LiveLine, profiled, write_metrics
+from .copy_engine import CHUNKED_MIN_BYTES, MODES
+from .dedupe import DEDUPE_MODES
+from .logger import flush_logs
+from .metrics import SortMetrics
+from .sharded import sort_sharded
+from .sort_async import SortParams, logger
 
 
 def _apply_log_level(level_name: str) -> None:
@@ -25,6 +32,19 @@ def _apply_log_level(level_name: str) -> None:
             h.setLevel(level)
 
 
+def _workers_arg(value: str) -> int | str:
+    """--workers: додатнє ціле або 'auto'."""
+    if value.lower() == "auto":
+        return "auto"
+    try:
+        workers = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("очікується додатнє ціле або auto") from None
+    if workers <= 0:
+        raise argparse.ArgumentTypeError("очікується додатнє ціле або auto")
+    return workers
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="async-sorter",
@@ -44,9 +64,140 @@ def build_parser() -> argparse.ArgumentParser:
     )
     parser.add_argument(
         "--workers",
-        type=int,
+        type=_workers_arg,
         default=100,
-        help="Максимальна кількість одночасних копій/операцій (за замовчуванням 100).",
+        help="Максимальна кількість одночасних копій/операцій (за замовчуванням 100) "
+        "або auto — адаптивно за пропускною здатністю й затримкою, окремо для "
+        "дрібних і великих файлів.",
+    )
+    parser.add_argument(
+        "--procs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Кількість процесів (за замовчуванням 1). Дерево ділиться на N "
+        "шардів за хешем шляху в цілі; кожен процес має власний асинхронний "
+        "конвеєр з --workers, статистика підсумовується.",
+    )
+    parser.add_argument(
+        "--mode",
+        choices=MODES,
+        default="copy",
+        help="Спосіб розкладання: copy (reflink → copy_file_range → sendfile → "
+        "shutil), move (на тому ж томі — лише перейменування) або link "
+        "(жорсткі посилання; між томами — копія). За замовчуванням copy.",
+    )
+    parser.add_argument(
+        "--chunk-mb",
+        type=int,
+        default=CHUNKED_MIN_BYTES >> 20,
+        metavar="N",
+        help="Файли від N МБ копіюються діапазонами паралельно вільними воркерами "
+        "(copy_file_range/pread+pwrite у заздалегідь виділену ціль). "
+        f"За замовчуванням {CHUNKED_MIN_BYTES >> 20}; 0 — вимкнено.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Інкрементальне сортування: маніфест у --dst (SQLite) запам'ятовує "
+        "розмір, mtime та inode кожного джерела; незмінені файли пропускаються.",
+    )
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Разом із --incremental: видаляти з --dst копії файлів, яких більше "
+        "немає в --src.",
+    )
+    parser.add_argument(
+        "--dedupe",
+        choices=DEDUPE_MODES,
+        help="Дедуплікація за вмістом (розмір → частковий → повний хеш): "
+        "link — дублікати стають жорсткими посиланнями, skip — не записуються. "
+        "Однакові назви з різним вмістом отримують суфікс ~<хеш>.",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Однакові назви з різних каталогів --src перезаписують одна одну в "
+        "--dst (а з --incremental — і файли, що вже лежать у цілі). За "
+        "замовчуванням друга й наступні отримують суфікс name~2.ext, name~3.ext, "
+        "для чого запуск тримає в пам'яті назву кожного розкладеного файлу, а з "
+        "--incremental ще й читає наявні підпапки цілі та її маніфест.",
+    )
+    parser.add_argument(
+        "--journal",
+        action="store_true",
+        help="Вести журнал --dst/.sorter-journal (рядок на кожен розкладений "
+        "файл, fsync щонайменше раз на секунду), щоб перерваний запуск можна "
+        "було продовжити з --resume. Після успішного запуску журнал видаляється; "
+        "після збою лишається в --dst. За замовчуванням вимкнено.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Продовжити запуск, перерваний з --journal: файли, відмічені в "
+        "журналі --dst/.sorter-journal, пропускаються, а журнал ведеться далі "
+        "(--resume вмикає --journal).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Після початкового сортування стежити за --src (inotify; де його "
+        "немає — опитування) і одразу розкладати нові файли тим самим "
+        "конвеєром, без повторного обходу. Зупинка — Ctrl+C.",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=1.0,
+        metavar="SECONDS",
+        help="З --watch: файл, для якого не було close() після запису, "
+        "розкладається, коли його розмір і mtime не змінювалися SECONDS "
+        "(за замовчуванням 1.0). Закриті файли — одразу.",
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=0.0,
+        metavar="SECONDS",
+        help="З --watch: опитувати дерево раз на SECONDS замість inotify "
+        "(мережеві ФС). За замовчуванням 0 — inotify, якщо доступний.",
+    )
+    parser.add_argument(
+        "--progress",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Замість рядка логу на кожен файл (DEBUG) — підсумок кожні N файлів "
+        "(кількість, файлів/с, помилки). За замовчуванням 0 — вимкнено.",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        metavar="PATH",
+        help="Записати звіт запуску в JSON: файли/с, байти/с, час етапів "
+        "(обхід, планування, копіювання), p50/p95/p99 затримки копії, глибина "
+        "черги. Пишеться й після запуску з помилками.",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Рядок прогресу в stderr, що оновлюється на місці (з --procs 1).",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="PATH",
+        help="Профілювати запуск cProfile (event loop) і зберегти статистику "
+        "в PATH (для pstats/snakeviz).",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Відстежувати пам'ять tracemalloc: пік і N найбільших місць "
+        "алокацій — у звіт --metrics-json (за замовчуванням 0 — вимкнено).",
     )
     parser.add_argument(
         "--dry-run",
@@ -79,14 +230,47 @@ def main(argv: list[str] | None = None) -> int:
 
     src: Path = args.src
     dst: Path = args.dst
-    workers: int = args.workers
+    workers: int | str = args.workers
+    procs: int = args.procs
     dry_run: bool = args.dry_run
+    mode: str = args.mode
+    incremental: bool = args.incremental
+    prune: bool = args.prune
+    dedupe: str | None = args.dedupe
+    overwrite: bool = args.overwrite
+    progress: int = args.progress
+    resume: bool = args.resume
+    journal: bool = args.journal or resume
     log_level: str = args.log_level
+    metrics_json: Path | None = args.metrics_json
 
     # Валідації
     if not src.exists() or not src.is_dir():
         parser.error(f"Директорія --src не існує або це не папка: {src}")
 
+    if prune and not incremental:
+        parser.error("--prune потребує --incremental.")
+    if prune and mode == "move":
+        parser.error("--prune несумісний із --mode move (джерела переносяться).")
+    if procs < 1:
+        parser.error("--procs має бути >= 1.")
+    if overwrite and dedupe:
+        parser.error("--overwrite несумісний із --dedupe (назви роздає дедуплікація).")
+    if procs > 1 and dedupe:
+        parser.error("--dedupe не підтримується разом із --procs > 1.")
+    if progress < 0:
+        parser.error("--progress має бути >= 0.")
+    if args.watch and procs > 1:
+        parser.error("--watch доступний лише з --procs 1.")
+    if args.settle < 0 or args.poll < 0:
+        parser.error("--settle та --poll мають бути >= 0.")
+    if args.chunk_mb < 0:
+        parser.error("--chunk-mb має бути >= 0.")
+    if args.live and procs > 1:
+        parser.error("--live доступний лише з --procs 1.")
+    if args.tracemalloc < 0:
+        parser.error("--tracemalloc має бути >= 0.")
+
     # Створимо цільову папку, якщо її ще немає
     try:
         dst.mkdir(parents=True, exist_ok=True)
@@ -97,20 +281,71 @@ def main(argv: list[str] | None = None) -> int:
     _apply_log_level(log_level)
 
     # Запускаємо асинхронне сортування
-    params = SortParams(src=src, dst=dst, workers=workers, dry_run=dry_run)
-    stats = asyncio.run(sort_folder(params))
+    params = SortParams(
+        src=src,
+        dst=dst,
+        workers=workers,
+        dry_run=dry_run,
+        mode=mode,
+        incremental=incremental,
+        prune=prune,
+        dedupe=dedupe,
+        overwrite=overwrite,
+        progress=progress,
+        journal=journal,
+        resume=resume,
+        chunk_min_bytes=args.chunk_mb << 20,
+        watch=args.watch,
+        settle=args.settle,
+        poll=args.poll,
+    )
+    metrics = SortMetrics()
+    report: dict[str, object] = {}
+    status = "error"
+    try:
+        live = LiveLine(metrics.progress_line) if args.live else nullcontext()
+        with profiled(args.profile, args.tracemalloc) as report, live:
+            stats = sort_sharded(params, procs, metrics)
+        status = "ok"
+    finally:
+        flush_logs(logger)  # лог пишеться у фоні — дочекаємося його перед підсумком
+        if metrics_json is not None:
+            run_params = {
+                k: str(v) if isinstance(v, Path) else v
+                for k, v in asdict(params).items()
+                if k not in ("shard", "run_id")
+            }
+            write_metrics(
+                metrics_json,
+                {
+                    "tool": "async-sorter",
+                    "status": status,
+                    "params": {**run_params, "procs": procs},
+                    **metrics.to_dict(),
+                    **report,
+                },
+            )
 
     # Виводимо підсумок
     print("✅ Готово.")
     print(f"   SRC:     {src.resolve()}")
     print(f"   DST:     {dst.resolve()}")
     print(f"   WORKERS: {workers}")
+    print(f"   PROCS:   {procs}")
+    print(f"   MODE:    {mode}")
+    print(f"   INCREM.: {incremental}{' (prune)' if prune else ''}")
+    print(f"   DEDUPE:  {dedupe or '-'}")
+    print(f"   NAMES:   {'overwrite' if overwrite else 'rename ~N'}")
+    print(f"   JOURNAL: {journal}{' (resume)' if resume else ''}")
     print(f"   DRY RUN: {dry_run}")
     print(f"   LOG LVL: {log_level.upper()}")
     if stats:
         print("\n📊 Статистика (папка → кількість файлів):")
         for folder, count in sorted(stats.items()):
             print(f"   {folder:12s} {count}")
+    print(f"\n⏱  {metrics.progress_line()}, {metrics.wall_seconds:.2f} с")
+    if metrics_json is not None:
+        print(f"   METRICS: {metrics_json}")
 
     return 0
 
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import statistics
+import time
+from typing import Callable
+
+LARGE_FILE_BYTES = 64 * 1024 * 1024  # файли від цього розміру — окрема смуга
+_PER_FILE_BYTES = 4096  # «вага» метаданих одного файлу у пропускній здатності
+
+
+class AimdLimiter:
+    """
+    Адаптивний ліміт одночасних операцій (AIMD).
+
+    Після кожного вікна завершених операцій (≥ limit штук або window секунд)
+    порівнює пропускну здатність (байти + _PER_FILE_BYTES на файл за секунду)
+    і медіанну затримку на одиницю роботи з попереднім вікном:
+      - затримка > latency_factor × базова або пропускна здатність впала на
+        > tolerance — множимо ліміт на decrease (черга на диску/NFS росте без
+        користі);
+      - пропускна здатність зросла на > tolerance — додаємо increase;
+      - інакше — плато, ліміт тримаємо.
+    Затримка ділиться на «вагу» операції, тож файли різного розміру
+    порівнянні; базова — найменша медіана серед вікон.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 256,
+        window: float = 1.0,
+        increase: int = 1,
+        decrease: float = 0.7,
+        tolerance: float = 0.05,
+        latency_factor: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = max(minimum, min(maximum, initial))
+        self.window = window
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.latency_factor = latency_factor
+        self._clock = clock
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+        self._window_start = clock()
+        self._latencies: list[float] = []
+        self._work = 0
+        self._prev_throughput: float | None = None
+        self._base_latency: float | None = None
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency: float, nbytes: int) -> None:
+        self.observe(latency, nbytes)
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def observe(self, latency: float, nbytes: int) -> None:
+        """Додає замір однієї операції; наприкінці вікна коригує limit."""
+        weight = nbytes + _PER_FILE_BYTES
+        self._latencies.append(latency / weight)
+        self._work += weight
+        now = self._clock()
+        elapsed = now - self._window_start
+        if len(self._latencies) < self.limit and elapsed < self.window:
+            return
+        if elapsed <= 0:
+            return
+        throughput = self._work / elapsed
+        latency_p50 = statistics.median(self._latencies)
+        self._latencies.clear()
+        self._work = 0
+        self._window_start = now
+
+        if self._base_latency is None or latency_p50 < self._base_latency:
+            self._base_latency = latency_p50
+        prev = self._prev_throughput
+        self._prev_throughput = throughput
+        congested = latency_p50 > self.latency_factor * self._base_latency
+        if congested or (prev is not None and throughput < prev * (1 - self.tolerance)):
+            self.limit = max(self.minimum, int(self.limit * self.decrease))
+            self._prev_throughput = None  # після зменшення — нова точка відліку
+        elif prev is None or throughput > prev * (1 + self.tolerance):
+            self.limit = min(self.maximum, self.limit + self.increase)
+
+
+class Lanes:
+    """
+    Дві незалежні смуги для --workers auto: дрібні файли не стоять у черзі
+    за багатогігабайтними копіями. Кожна смуга має власний AimdLimiter,
+    а в sort_folder — власну чергу й власних споживачів (див. _lanes).
+    """
+
+    def __init__(
+        self,
+        small: AimdLimiter | None = None,
+        large: AimdLimiter | None = None,
+        threshold: int = LARGE_FILE_BYTES,
+    ) -> None:
+        self.small = small or AimdLimiter(initial=8, maximum=256)
+        self.large = large or AimdLimiter(initial=2, maximum=16)
+        self.threshold = threshold
+
+    @property
+    def capacity(self) -> int:
+        """Максимум одночасних операцій обох смуг (розмір пулу потоків)."""
+        return self.small.maximum + self.large.maximum
+
+    def for_size(self, size: int) -> AimdLimiter:
+        return self.large if size >= self.threshold else self.small
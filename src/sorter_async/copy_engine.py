@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable
+
+MODES = ("copy", "move", "link")
+
+# ioctl FICLONE (linux/fs.h): dst_fd отримує спільні з src_fd екстенти (Btrfs, XFS)
+_FICLONE = 0x40049409
+# Помилки «цей спосіб не підтримується для пари ФС» — переходимо до наступного
+_UNSUPPORTED = frozenset(
+    {
+        errno.EXDEV,
+        errno.EINVAL,
+        errno.ENOSYS,
+        errno.ENOTTY,
+        errno.EOPNOTSUPP,
+        errno.EPERM,
+        errno.EBADF,
+    }
+)
+_CHUNK = 1 << 30  # максимум байтів за один виклик copy_file_range/sendfile
+TEMP_SUFFIX = ".sorter-part"  # недописані копії: '.<name>.<потік>.sorter-part
+CHUNKED_MIN_BYTES = 256 << 20  # файли від цього розміру копіюються діапазонами
+_RANGE_BYTES = 64 << 20  # найбільший діапазон (одна задача пулу)
+_MIN_RANGE_BYTES = 1 << 20
+_IO_BYTES = 1 << 20  # буфер pread/pwrite
+
+if sys.platform.startswith("linux"):
+    import fcntl
+else:  # pragma: no cover
+    fcntl = None
+
+
+def temp_path(dst: Path) -> Path:
+    """
+    Тимчасова назва в тому ж каталозі, що й ціль (os.replace — в межах ФС).
+    З ідентифікатором потоку: з --overwrite дві копії в одну ціль можуть іти
+    одночасно й не повинні писати в один тимчасовий файл.
+    """
+    return dst.with_name(f".{dst.name}.{threading.get_ident():x}{TEMP_SUFFIX}")
+
+
+def _discard(path: Path) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class _Unsupported(Exception):
+    """Стратегія не працює для цієї пари пристроїв — кешуємо й пробуємо наступну."""
+
+
+def _reflink(src_fd: int, dst_fd: int, size: int) -> None:
+    if fcntl is None:
+        raise _Unsupported
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError as e:
+        if e.errno in _UNSUPPORTED:
+            raise _Unsupported from e
+        raise
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> None:
+    if not hasattr(os, "copy_file_range"):
+        raise _Unsupported
+    _copy_loop(os.copy_file_range, src_fd, dst_fd, size)
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> None:
+    if not hasattr(os, "sendfile"):
+        raise _Unsupported
+    _copy_loop(lambda s, d, n: os.sendfile(d, s, None, n), src_fd, dst_fd, size)
+
+
+def _copy_loop(
+    call: Callable[[int, int, int], int], src_fd: int, dst_fd: int, size: int
+) -> None:
+    copied = 0
+    while copied < size:
+        try:
+            n = call(src_fd, dst_fd, min(_CHUNK, size - copied))
+        except OSError as e:
+            # На першому виклику «не підтримується» — безпечно пробувати далі
+            if copied == 0 and e.errno in _UNSUPPORTED:
+                raise _Unsupported from e
+            raise
+        if n == 0:
+            break  # файл укоротився під час копіювання
+        copied += n
+
+
+def _userland(src_fd: int, dst_fd: int, size: int) -> None:
+    with (
+        os.fdopen(src_fd, "rb", closefd=False) as fsrc,
+        os.fdopen(dst_fd, "wb", closefd=False) as fdst,
+    ):
+        shutil.copyfileobj(fsrc, fdst)
+
+
+def _preallocate(fd: int, size: int) -> None:
+    """Резервує місце під ціль одразу (менше фрагментації, ENOSPC — до копії)."""
+    if size and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+    os.ftruncate(fd, size)  # ФС без fallocate: розріджений файл потрібного розміру
+
+
+class _ChunkedCopy:
+    """
+    Копія одного великого файлу незалежними діапазонами: copy_file_range зі
+    зміщеннями (спільна позиція файлу не використовується), а де він не
+    підтримується — pread/pwrite. Діапазони розбирають потік-власник і
+    помічники з пулу (run); помічник, що стартував, коли діапазонів уже
+    немає, одразу виходить, тож власник чекає лише на тих, що працюють, і
+    не блокується, якщо вільних потоків у пулі немає.
+    """
+
+    def __init__(self, src_fd: int, dst_fd: int, size: int, range_bytes: int) -> None:
+        self.src_fd = src_fd
+        self.dst_fd = dst_fd
+        self.ranges = [
+            (offset, min(range_bytes, size - offset))
+            for offset in range(0, size, range_bytes)
+        ]
+        self.short = False  # джерело вкоротилося під час копіювання
+        self.error: BaseException | None = None
+        self._next = 0
+        self._active = 0
+        self._cfr = hasattr(os, "copy_file_range")
+        self._cond = threading.Condition()
+
+    def run(self, submit: Callable[[Callable[[], None]], object], helpers: int) -> None:
+        for _ in range(min(helpers, len(self.ranges) - 1)):
+            submit(self._work)
+        self._work()
+        with self._cond:
+            while self._active:
+                self._cond.wait()
+            self._next = len(self.ranges)  # пізні помічники вже нічого не візьмуть
+        if self.error is not None:
+            raise self.error
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                if self.error is not None or self._next >= len(self.ranges):
+                    return
+                offset, length = self.ranges[self._next]
+                self._next += 1
+                self._active += 1
+            try:
+                self._copy_range(offset, length)
+            except BaseException as e:
+                with self._cond:
+                    self.error = self.error or e
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _copy_range(self, offset: int, length: int) -> None:
+        end = offset + length
+        while offset < end:
+            n = self._copy_at(offset, end - offset)
+            if n == 0:
+                self.short = True
+                return
+            offset += n
+
+    def _copy_at(self, offset: int, length: int) -> int:
+        if self._cfr:
+            try:
+                n = min(length, _CHUNK)
+                return os.copy_file_range(self.src_fd, self.dst_fd, n, offset, offset)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                self._cfr = False  # інша ФС чи старе ядро — pread/pwrite
+        data = memoryview(os.pread(self.src_fd, min(length, _IO_BYTES), offset))
+        written = 0
+        while written < len(data):
+            written += os.pwrite(self.dst_fd, data[written:], offset + written)
+        return len(data)
+
+
+# Порядок спроб для --mode copy: від «лише метадані» до звичайного буфера
+_COPY_STRATEGIES: tuple[tuple[str, Callable[[int, int, int], None]], ...] = (
+    ("reflink", _reflink),
+    ("copy_file_range", _copy_file_range),
+    ("sendfile", _sendfile),
+    ("shutil", _userland),
+)
+
+
+class CopyEngine:
+    """
+    Переносить файл у ціль обраним способом (mode):
+      move — os.replace (на тому самому томі лише метадані), між томами — копія + видалення;
+      link — жорстке посилання, між томами — копія;
+      copy — reflink (FICLONE) → copy_file_range → sendfile → shutil;
+      з use_pool великі файли — діапазонами в кількох потоках (chunked).
+    Перша стратегія, що спрацювала для пари (st_dev джерела, st_dev цілі),
+    кешується: наступні файли тієї пари не повторюють невдалі спроби.
+    Метадані (час, права) зберігаються як у shutil.copy2. Потокобезпечний.
+    Ціль з'являється атомарно: копія (чи посилання на місце наявного файлу)
+    пишеться під тимчасовою назвою (temp_path) і лише потім os.replace — збій
+    посеред копіювання не лишає обрізаних файлів під справжньою назвою.
+    """
+
+    def __init__(self, mode: str = "copy") -> None:
+        if mode not in MODES:
+            raise ValueError(f"Невідомий mode: {mode!r} (очікується {MODES})")
+        self.mode = mode
+        self.methods: Counter[str] = Counter()  # скільки файлів яким способом
+        self.bytes = 0  # скільки байтів розкладено (для метрик)
+        self._start: dict[tuple[int, int], int] = {}  # пара → індекс стратегії
+        self._dir_dev: dict[Path, int] = {}
+        self._submit: Callable[[Callable[[], None]], object] | None = None
+        self._helpers = 0
+        self._chunked_min = 0
+        self._lock = threading.Lock()
+
+    def transfer(self, src: Path, dst: Path, st: os.stat_result | None = None) -> str:
+        """
+        Переносить src → dst; повертає назву використаного способу.
+        st — вже знятий stat джерела (щоб не робити ще один).
+        """
+        if st is None:
+            st = os.stat(src)
+        method = ""
+        if self.mode != "copy" and st.st_dev == self._dst_dev(dst.parent):
+            try:
+                if self.mode == "move":
+                    os.replace(src, dst)
+                    method = "rename"
+                else:
+                    self._link(src, dst)
+                    method = "link"
+            except OSError as e:
+                if e.errno != errno.EXDEV:  # bind-mount: той самий st_dev, різні точки
+                    raise
+        if not method:
+            method = self._copy(src, dst, st)
+            if self.mode == "move":
+                os.unlink(src)
+        with self._lock:
+            self.methods[method] += 1
+            self.bytes += st.st_size
+        return method
+
+    def use_pool(
+        self,
+        submit: Callable[[Callable[[], None]], object],
+        helpers: int,
+        min_bytes: int = CHUNKED_MIN_BYTES,
+    ) -> None:
+        """
+        Вмикає діапазонну копію файлів від min_bytes: до helpers задач-помічників
+        у пулі (submit) копіюють діапазони того ж файлу паралельно з потоком,
+        що його копіює, тож один величезний файл наприкінці запуску займає
+        всі вільні потоки, а не один. min_bytes=0 — вимкнено.
+        """
+        self._submit = submit if min_bytes else None
+        self._helpers = helpers
+        self._chunked_min = min_bytes
+
+    def _dst_dev(self, directory: Path) -> int:
+        dev = self._dir_dev.get(directory)
+        if dev is None:
+            dev = self._dir_dev[directory] = os.stat(directory).st_dev
+        return dev
+
+    @staticmethod
+    def _link(src: Path, dst: Path) -> None:
+        try:
+            os.link(src, dst)
+        except FileExistsError:
+            # Як copy2: наявна ціль перезаписується (атомарно)
+            tmp = temp_path(dst)
+            _discard(tmp)
+            os.link(src, tmp)
+            os.replace(tmp, dst)
+
+    def _copy(self, src: Path, dst: Path, st: os.stat_result) -> str:
+        tmp = temp_path(dst)
+        try:
+            name = self._copy_to(src, tmp, st)
+            shutil.copystat(src, tmp)
+            os.replace(tmp, dst)
+        except BaseException:
+            _discard(tmp)
+            raise
+        return name
+
+    def _copy_to(self, src: Path, dst: Path, st: os.stat_result) -> str:
+        pair = (st.st_dev, self._dst_dev(dst.parent))
+        index = self._start.get(pair, 0)
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            if self._submit is not None and st.st_size >= self._chunked_min:
+                return self._copy_chunked(fsrc.fileno(), fdst.fileno(), st, pair)
+            while True:
+                name, strategy = _COPY_STRATEGIES[index]
+                try:
+                    strategy(fsrc.fileno(), fdst.fileno(), st.st_size)
+                    break
+                except _Unsupported:
+                    index += 1
+                    with self._lock:
+                        self._start[pair] = max(self._start.get(pair, 0), index)
+                    os.lseek(fsrc.fileno(), 0, os.SEEK_SET)
+                    os.lseek(fdst.fileno(), 0, os.SEEK_SET)
+                    fdst.truncate(0)
+        return name
+
+    def _copy_chunked(
+        self, src_fd: int, dst_fd: int, st: os.stat_result, pair: tuple[int, int]
+    ) -> str:
+        assert self._submit is not None
+        if self._start.get(pair, 0) == 0:
+            try:
+                _reflink(src_fd, dst_fd, st.st_size)
+                return "reflink"  # лише метадані — ділити нічого
+            except _Unsupported:
+                with self._lock:
+                    self._start[pair] = max(self._start.get(pair, 0), 1)
+        _preallocate(dst_fd, st.st_size)
+        per_thread = -(-st.st_size // (self._helpers + 1))
+        job = _ChunkedCopy(
+            src_fd,
+            dst_fd,
+            st.st_size,
+            min(_RANGE_BYTES, max(_MIN_RANGE_BYTES, per_thread)),
+        )
+        job.run(self._submit, self._helpers)
+        if job.short:
+            os.ftruncate(dst_fd, os.fstat(src_fd).st_size)
+        return "chunked"
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import errno
+import hashlib
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .copy_engine import CopyEngine
+
+DEDUPE_MODES = ("link", "skip")
+
+_PARTIAL_BYTES = 64 * 1024  # частковий хеш — лише початок файлу
+_READ_BYTES = 1 << 20  # великі читання для повного хешу
+
+
+def _hash(path: Path, limit: int | None = None) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    remaining = limit
+    with open(path, "rb", buffering=0) as f:
+        while remaining is None or remaining > 0:
+            n = _READ_BYTES if remaining is None else min(_READ_BYTES, remaining)
+            chunk = f.read(n)
+            if not chunk:
+                break
+            h.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return h.digest()
+
+
+@dataclass
+class _Content:
+    """Файл, вміст якого порівнюємо: хеші рахуються ліниво й кешуються."""
+
+    paths: tuple[Path, ...]  # звідки читати (джерело, а якщо його вже перенесли — ціль)
+    size: int
+    partial: bytes | None = None
+    full: bytes | None = None
+
+    def _read(self, limit: int | None) -> bytes:
+        for i, path in enumerate(self.paths):
+            try:
+                return _hash(path, limit)
+            except FileNotFoundError:
+                if i == len(self.paths) - 1:
+                    raise
+        raise FileNotFoundError(self.paths)
+
+    def partial_hash(self) -> bytes:
+        if self.partial is None:
+            self.partial = self._read(_PARTIAL_BYTES)
+            if self.size <= _PARTIAL_BYTES:
+                self.full = self.partial
+        return self.partial
+
+    def full_hash(self) -> bytes:
+        if self.full is None:
+            self.full = self._read(None)
+        return self.full
+
+    def same_as(self, other: _Content) -> bool:
+        return (
+            self.size == other.size
+            and self.partial_hash() == other.partial_hash()
+            and self.full_hash() == other.full_hash()
+        )
+
+
+_Key = tuple[int, bytes]  # (розмір, хеш)
+
+
+@dataclass
+class _Placed:
+    """Файл, уже розкладений (або що розкладається) в цьому запуску."""
+
+    content: _Content
+    dst: Path
+    ready: threading.Event = field(default_factory=threading.Event)
+    ok: bool = False
+
+
+class Deduper:
+    """
+    Розкладання з дедуплікацією за вмістом (для --dedupe).
+
+    Розкладені файли проіндексовано трьома словниками: розмір → єдиний файл
+    цього розміру (ще без хешів), (розмір, частковий хеш перших 64 KiB) →
+    єдиний файл з таким початком, (розмір, повний BLAKE2b) → оригінал. Файл
+    переходить на наступний рівень лише тоді, коли з'являється другий файл з
+    тим самим ключем, тож хеші рахуються ліниво й лише коли є кандидат, а
+    пошук дубліката — кілька звернень до словника, а не перебір усіх файлів
+    того ж розміру. Дублікат стає жорстким посиланням на першу копію
+    (mode="link") або не записується зовсім (mode="skip").
+    Однакова назва з іншим вмістом отримує суфікс із хешу вмісту
+    'name~<hash>.ext'; назви роздаються в порядку обробки: хто перший, той
+    зберігає назву без суфікса. Наявний у цілі файл з тим самим вмістом
+    вважається вже розкладеним.
+    Потокобезпечний: індекс одного розміру змінюється під окремим локом,
+    а хеші (читання файлів) рахуються поза ним.
+    """
+
+    def __init__(self, engine: CopyEngine, mode: str = "link") -> None:
+        if mode not in DEDUPE_MODES:
+            raise ValueError(f"Невідомий dedupe: {mode!r} (очікується {DEDUPE_MODES})")
+        self.engine = engine
+        self.mode = mode
+        self.counts: Counter[str] = Counter()  # duplicates / renamed / in_place
+        self.saved_bytes = 0
+        # None — ключ уже має кілька файлів, шукати рівнем нижче
+        self._by_size: dict[int, _Placed | None] = {}
+        self._by_partial: dict[_Key, _Placed | None] = {}
+        self._by_full: dict[_Key, _Placed] = {}
+        self._size_locks: dict[int, threading.Lock] = {}
+        self._reserved: set[Path] = set()
+        self._lock = threading.Lock()
+
+    def _size_lock(self, size: int) -> threading.Lock:
+        with self._lock:
+            lock = self._size_locks.get(size)
+            if lock is None:
+                lock = self._size_locks[size] = threading.Lock()
+            return lock
+
+    def place(
+        self, src: Path, target: Path, st: os.stat_result | None = None
+    ) -> tuple[Path, str]:
+        """
+        Розкладає src у target (або в target із суфіксом при колізії назв).
+        Повертає (фактичний шлях у цілі, спосіб). st — вже знятий stat src.
+        """
+        if st is None:
+            st = os.stat(src)
+        size = st.st_size
+        probe = _Content((src,), size)
+        lock = self._size_lock(size)
+        while True:
+            with lock:
+                found = self._find(probe)
+                if not callable(found):
+                    break
+            found()  # хеш, потрібний для пошуку, — поза локом
+        with lock:
+            original, slot = found
+            if original is not None and (self.mode == "skip" or original.dst == target):
+                target, in_place = original.dst, True
+            else:
+                target, in_place = self._claim_name(probe, target)
+            placed = None
+            if original is None:
+                content = _Content((src, target), size, probe.partial, probe.full)
+                placed = _Placed(content, target, ok=in_place)
+                table, key = slot
+                table[key] = placed
+                if in_place:
+                    placed.ready.set()
+
+        if placed is not None and not in_place:
+            try:
+                method = self.engine.transfer(src, target, st)
+                placed.ok = True
+            finally:
+                placed.ready.set()
+            return target, method
+
+        with self._lock:
+            self.counts["duplicates" if original is not None else "in_place"] += 1
+            self.saved_bytes += size
+        if in_place:
+            method = "dedupe-skip"
+        else:
+            original.ready.wait()
+            if not original.ok:
+                raise RuntimeError(f"Оригінал дубліката не розкладено: {original.dst}")
+            self._link(original.dst, src, target)
+            method = "dedupe-link"
+        if self.engine.mode == "move":
+            os.unlink(src)  # вміст уже є в цілі
+        return target, method
+
+    def _find(self, probe: _Content):
+        """
+        Пошук оригіналу для probe під локом його розміру. Повертає або
+        функцію-хеш, яку треба виконати поза локом і повторити пошук, або
+        (оригінал, None), або (None, (словник, ключ)) — куди записати probe
+        як новий оригінал.
+        """
+        size = probe.size
+        if size not in self._by_size:
+            return None, (self._by_size, size)
+        lone = self._by_size[size]
+        if lone is not None:  # другий файл цього розміру — індексуємо перший
+            if lone.content.partial is None:
+                return lone.content.partial_hash
+            self._by_partial[size, lone.content.partial] = lone
+            self._by_size[size] = None
+        if probe.partial is None:
+            return probe.partial_hash
+        key = (size, probe.partial)
+        if key not in self._by_partial:
+            return None, (self._by_partial, key)
+        lone = self._by_partial[key]
+        if lone is not None:  # той самий початок — потрібен повний хеш
+            if lone.content.full is None:
+                return lone.content.full_hash
+            self._by_full[size, lone.content.full] = lone
+            self._by_partial[key] = None
+        if probe.full is None:
+            return probe.full_hash
+        key = (size, probe.full)
+        original = self._by_full.get(key)
+        if original is None:
+            return None, (self._by_full, key)
+        return original, None
+
+    def _claim_name(self, probe: _Content, target: Path) -> tuple[Path, bool]:
+        """
+        Резервує вільну назву в цілі: (шлях, True) — якщо там уже лежить файл
+        з тим самим вмістом (з попереднього запуску), інакше (шлях, False).
+        Хеші рахуються поза спільним локом.
+        """
+        candidate = target
+        for attempt in range(3):
+            with self._lock:
+                taken = candidate in self._reserved
+            if not taken:
+                try:
+                    st = os.stat(candidate)
+                except FileNotFoundError:
+                    with self._lock:
+                        if candidate not in self._reserved:
+                            self._reserved.add(candidate)
+                            return candidate, False
+                else:
+                    if probe.same_as(_Content((candidate,), st.st_size)):
+                        with self._lock:
+                            self._reserved.add(candidate)
+                        return candidate, True
+            # Колізія назв з іншим вмістом — суфікс із хешу (детермінований)
+            if attempt == 0:
+                with self._lock:
+                    self.counts["renamed"] += 1
+            digest = probe.full_hash().hex()[: 12 * (attempt + 1)]
+            candidate = target.with_name(f"{target.stem}~{digest}{target.suffix}")
+        raise FileExistsError(errno.EEXIST, "Не вдалося підібрати назву", str(target))
+
+    def _link(self, original: Path, src: Path, target: Path) -> None:
+        try:
+            os.link(original, target)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EMLINK, errno.EPERM):
+                raise
+            self.engine.transfer(src, target)  # інша ФС або ліміт посилань
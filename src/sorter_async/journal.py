@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+
+JOURNAL_NAME = ".sorter-journal"
+_VERSION = "sorter-journal v1"
+_SYNC_SECONDS = 1.0  # як часто (не рідше) журнал скидається на диск з fsync
+_SYNC_ENTRIES = 4096  # ... або після стількох нових записів
+
+
+class Journal:
+    """
+    Журнал контрольних точок запуску (dst/.sorter-journal) для --resume.
+
+    Текстовий файл, лише дописування: заголовок із коренем --src і режимом,
+    далі рядок 'src<TAB>dst' на кожен файл, що вже лежить у цілі (запис
+    робиться після os.replace). Записи буферизуються й скидаються з fsync
+    щонайменше раз на _SYNC_SECONDS / _SYNC_ENTRIES, тож аварійне завершення
+    коштує повтору лише останніх секунд роботи. Обрізаний останній рядок
+    ігнорується. Після успішного запуску журнал видаляється. Кожен шард
+    --procs веде власний журнал ('.sorter-journal.<номер>-<кількість>').
+    Потокобезпечний: record викликається з воркер-потоків.
+    """
+
+    def __init__(
+        self,
+        dst_root: Path,
+        src_root: Path,
+        mode: str,
+        resume: bool = False,
+        shard: tuple[int, int] = (0, 1),
+    ) -> None:
+        name = (
+            JOURNAL_NAME if shard[1] == 1 else f"{JOURNAL_NAME}.{shard[0]}-{shard[1]}"
+        )
+        self.path = Path(dst_root) / name
+        self.header = f"# {_VERSION} mode={mode} src={src_root}"
+        self.done: dict[str, str] = {}  # src → dst з попереднього запуску
+        if resume:
+            self.done = self._load()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: list[str] = []
+        self._last_sync = time.monotonic()
+        self._file = open(
+            self.path,
+            "a" if self.done else "w",
+            encoding="utf-8",
+            errors="surrogateescape",
+        )
+        if not self.done:
+            self._file.write(self.header + "\n")
+            self._sync()
+
+    def _load(self) -> dict[str, str]:
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return {}
+        complete = data.rfind(b"\n") + 1
+        lines = data[:complete].decode("utf-8", "surrogateescape").split("\n")
+        if lines[0] != self.header:
+            return {}  # журнал іншого джерела/режиму — починаємо спочатку
+        if complete < len(data):
+            os.truncate(self.path, complete)  # обрізаний рядок аварійного запису
+        done: dict[str, str] = {}
+        for line in lines[1:-1]:
+            src, sep, dst = line.partition("\t")
+            if sep:
+                done[src] = dst
+        return done
+
+    def record(self, src: Path, dst: Path) -> None:
+        """Позначає src як розкладений у dst (після того, як ціль на місці)."""
+        line = f"{src}\t{dst}\n"
+        if line.count("\t") != 1 or line.count("\n") != 1:
+            return  # назва з TAB/переводом рядка: при --resume просто повториться
+        with self._lock:
+            self._pending.append(line)
+            due = (
+                len(self._pending) >= _SYNC_ENTRIES
+                or time.monotonic() - self._last_sync >= _SYNC_SECONDS
+            )
+            if not due:
+                return
+            batch, self._pending = self._pending, []
+            self._last_sync = time.monotonic()
+        self._write(batch)
+
+    def _write(self, batch: list[str]) -> None:
+        # Окремий лок: інші воркери дописують у _pending, поки йде fsync
+        with self._write_lock:
+            self._file.writelines(batch)
+            self._sync()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self, remove: bool = False) -> None:
+        """Скидає залишок на диск; remove=True — запуск завершено, журнал не потрібен."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        self._write(batch)
+        self._file.close()
+        if remove:
+            os.unlink(self.path)
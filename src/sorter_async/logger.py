@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 _DEFAULT_FORMAT = "%(asctime)s | %(levelname)s | %(name)s: %(message)s"
 _DEFAULT_DATEFMT = "%Y-%m-%d %H:%M:%S"
+_FILE_BUFFER_BYTES = 256 * 1024  # записи у файл скидаються пачками
 
 
 def _ensure_parent_dir(path: Path) -> None:
@@ -17,6 +21,58 @@ def _ensure_parent_dir(path: Path) -> None:
         pass
 
 
+class _DeferredFlush:
+    """
+    Хендлер без flush після кожного запису: буфер скидає _BatchListener,
+    коли черга спорожніла (тобто раз на пачку записів, а не на рядок).
+    """
+
+    def flush(self) -> None:
+        pass
+
+    def flush_batch(self) -> None:
+        super().flush()  # type: ignore[misc]
+
+
+class _BatchedStreamHandler(_DeferredFlush, logging.StreamHandler):
+    pass
+
+
+class _BatchedFileHandler(_DeferredFlush, logging.FileHandler):
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=_FILE_BUFFER_BYTES,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
+
+
+class _BatchListener(QueueListener):
+    """QueueListener, що скидає буфери хендлерів наприкінці кожної пачки."""
+
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            self.flush()
+            return self.queue.get(block)
+
+    def flush(self) -> None:
+        for handler in self.handlers:
+            if isinstance(handler, _DeferredFlush):
+                try:
+                    handler.flush_batch()
+                except (OSError, ValueError):
+                    pass  # потік уже закрито (як у logging.shutdown)
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+            self.flush()
+
+
 def get_logger(
     name: str = "sorter_async",
     level: int = logging.INFO,
@@ -25,6 +81,12 @@ def get_logger(
     """
     Повертає налаштований логер з консольним і (необов'язково) файловим хендлерами.
     Повторні виклики для того ж name не дублюють хендлери.
+
+    Виклик logger.* лише кладе запис у чергу (QueueHandler); консоль і файл
+    пише фоновий потік QueueListener, скидаючи буфери пачками, тож гарячий
+    шлях (і event loop) не блокується на I/O навіть з DEBUG. Рівень
+    фільтрується на самому логері/QueueHandler (див. cli._apply_log_level);
+    черга дочитується при виході з процесу.
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
@@ -34,27 +96,49 @@ def get_logger(
         return logger
 
     formatter = logging.Formatter(_DEFAULT_FORMAT, datefmt=_DEFAULT_DATEFMT)
+    handlers: list[logging.Handler] = []
 
     # Console handler
-    ch = logging.StreamHandler(stream=sys.stdout)
-    ch.setLevel(level)
+    ch = _BatchedStreamHandler(stream=sys.stdout)
     ch.setFormatter(formatter)
-    logger.addHandler(ch)
+    handlers.append(ch)
 
     # File handler (якщо вказано шлях)
+    file_error = None
     if log_file is not None:
         _ensure_parent_dir(Path(log_file))
         try:
-            fh = logging.FileHandler(log_file, encoding="utf-8")
-            fh.setLevel(level)
+            fh = _BatchedFileHandler(log_file, encoding="utf-8")
             fh.setFormatter(formatter)
-            logger.addHandler(fh)
-        except Exception:
-            # Якщо файл недоступний — працюємо лише з консоллю
-            logger.warning(
-                "Не вдалося відкрити файл логу: %s. Продовжуємо без файлового логу.",
-                log_file,
-            )
+            handlers.append(fh)
+        except Exception as e:
+            file_error = e
+
+    qh = QueueHandler(queue.SimpleQueue())
+    qh.setLevel(level)
+    logger.addHandler(qh)
+    listener = _BatchListener(qh.queue, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    logger._listener = listener  # type: ignore[attr-defined]
+
+    if file_error is not None:
+        # Якщо файл недоступний — працюємо лише з консоллю
+        logger.warning(
+            "Не вдалося відкрити файл логу: %s. Продовжуємо без файлового логу.",
+            log_file,
+        )
 
     logger._initialized = True  # type: ignore[attr-defined]
     return logger
+
+
+def flush_logs(logger: logging.Logger) -> None:
+    """
+    Дочекатися, поки фоновий потік запише все, що вже в черзі (наприклад,
+    перед підсумком у консолі), і скинути буфери.
+    """
+    listener = getattr(logger, "_listener", None)
+    if listener is not None:
+        listener.stop()
+        listener.start()
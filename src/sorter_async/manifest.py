@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+MANIFEST_NAME = ".sorter-manifest.sqlite"
+_FLUSH_ROWS = 512  # скільки записів буферизувати перед executemany + commit
+_BUSY_SECONDS = 60.0  # скільки чекати, поки інший процес (шард) тримає запис
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    root     TEXT    NOT NULL,
+    dir      TEXT    NOT NULL,
+    name     TEXT    NOT NULL,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode    INTEGER NOT NULL,
+    dst      TEXT    NOT NULL,
+    seen     INTEGER NOT NULL,
+    PRIMARY KEY (root, dir, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_dst ON files (dst);
+"""
+
+
+class Manifest:
+    """
+    Індекс уже розкладених файлів у SQLite (dst/.sorter-manifest.sqlite).
+    Для кожного джерела зберігає (size, mtime_ns, inode) та фактичний шлях у
+    цілі (з --dedupe він може відрізнятися від типового); файл вважається
+    незмінним, якщо ці три значення збігаються.
+    Записи розділені за коренем --src, тож одна ціль може обслуговувати кілька
+    джерел. Кожен запуск позначає побачені файли міткою seen = run; решта —
+    джерела, що зникли з --src (для prune). Потокобезпечний; шарди --procs
+    пишуть в один файл із різних процесів (спільна мітка run, короткі
+    транзакції, очікування на блокування до _BUSY_SECONDS).
+    """
+
+    def __init__(
+        self,
+        dst_root: Path,
+        src_root: Path,
+        readonly: bool = False,
+        run: int | None = None,
+    ) -> None:
+        self.path = Path(dst_root) / MANIFEST_NAME
+        self.root = str(src_root)
+        self.readonly = readonly
+        self.run = time.time_ns() if run is None else run
+        self._lock = threading.Lock()
+        self._pending: list[tuple] = []
+        self._conn = sqlite3.connect(
+            self.path, timeout=_BUSY_SECONDS, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def changed(
+        self, directory: str, files: list[Path]
+    ) -> list[tuple[Path, os.stat_result]]:
+        """
+        Повертає файли каталогу directory, які треба (пере)розкласти, разом зі
+        stat джерела. Незмінні позначаються як побачені в цьому запуску.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, size, mtime_ns, inode FROM files "
+                "WHERE root = ? AND dir = ?",
+                (self.root, directory),
+            ).fetchall()
+        known = {name: (size, mtime, inode) for name, size, mtime, inode in rows}
+
+        todo: list[tuple[Path, os.stat_result]] = []
+        unchanged: list[tuple] = []
+        for f in files:
+            try:
+                st = f.stat()
+            except OSError:
+                continue  # файл зник між обходом і порівнянням
+            prev = known.get(f.name)
+            if prev == (st.st_size, st.st_mtime_ns, st.st_ino):
+                unchanged.append((self.run, self.root, directory, f.name))
+            else:
+                todo.append((f, st))
+        if unchanged and not self.readonly:
+            with self._lock:
+                self._conn.executemany(
+                    "UPDATE files SET seen = ? WHERE root = ? AND dir = ? AND name = ?",
+                    unchanged,
+                )
+                self._conn.commit()  # не тримати блокування запису між каталогами
+        return todo
+
+    def targets(self, directory: str) -> dict[str, str]:
+        """Назва джерела → шлях у цілі для вже розкладених файлів каталогу."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, dst FROM files WHERE root = ? AND dir = ?",
+                (self.root, directory),
+            ).fetchall()
+        return dict(rows)
+
+    def destinations(self) -> Iterator[str]:
+        """Усі зайняті шляхи в цілі (усіх коренів --src цього маніфесту)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT dst FROM files").fetchall()
+        for (dst,) in rows:
+            yield dst
+
+    def record(self, src: Path, st: os.stat_result, dst: Path) -> None:
+        """Запам'ятовує успішно розкладений файл (stat — знятий до копіювання)."""
+        if self.readonly:
+            return
+        row = (
+            self.root,
+            str(src.parent),
+            src.name,
+            st.st_size,
+            st.st_mtime_ns,
+            st.st_ino,
+            str(dst),
+            self.run,
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= _FLUSH_ROWS:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending,
+            )
+            self._pending.clear()
+        self._conn.commit()
+
+    def stale(self) -> Iterator[tuple[Path, Path, bool]]:
+        """
+        Джерела цього кореня, не побачені в поточному запуску:
+        (src, dst, dst_shared) — dst_shared, якщо в ту саму ціль зараз
+        розкладено інший наявний файл (тоді ціль видаляти не можна).
+        """
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT f.dir, f.name, f.dst, EXISTS ("
+                "  SELECT 1 FROM files g WHERE g.dst = f.dst AND g.seen = ?"
+                ") FROM files f WHERE f.root = ? AND f.seen != ?",
+                (self.run, self.root, self.run),
+            ).fetchall()
+        for directory, name, dst, shared in rows:
+            yield Path(directory) / name, Path(dst), bool(shared)
+
+    def forget(self, src: Path) -> None:
+        if self.readonly:
+            return
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM files WHERE root = ? AND dir = ? AND name = ?",
+                (self.root, str(src.parent), src.name),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if not self.readonly:
+                self._flush()
+            self._conn.close()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass, field
+
+_PER_DECADE = 20  # кошиків гістограми на порядок (крок ≈ 12%)
+_MIN_SECONDS = 1e-6
+_DECADES = 9  # 1 мкс .. 1000 с
+# Поля SortMetrics, що підсумовуються між шардами
+_SUMMED = (
+    "files",
+    "bytes",
+    "errors",
+    "dirs",
+    "walk_seconds",
+    "plan_seconds",
+    "copy_seconds",
+    "queue_sum",
+    "queue_samples",
+)
+
+
+class LatencyHistogram:
+    """
+    Логарифмічна гістограма затримок зі сталою пам'яттю (мільйони файлів —
+    ті самі 180 лічильників). Перцентилі — верхня межа кошика (похибка ≤ 12%),
+    але не більше за фактичний максимум.
+    """
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (_PER_DECADE * _DECADES + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        if seconds <= _MIN_SECONDS:
+            i = 0
+        else:
+            i = int(math.log10(seconds / _MIN_SECONDS) * _PER_DECADE) + 1
+        self.buckets[min(i, len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: LatencyHistogram) -> None:
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                upper = _MIN_SECONDS * 10 ** (i / _PER_DECADE)
+                return min(upper, self.max)
+        return self.max
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "mean": self.total / self.count if self.count else 0.0,
+        }
+
+
+@dataclass
+class SortMetrics:
+    """
+    Лічильники й таймери одного запуску sort_folder (заповнюються на місці,
+    з event loop; див. sort_folder(..., metrics=)). Етапи: walk — обхід
+    каталогів, plan — фільтр маніфесту/журналу й розкладка, copy — сумарна
+    тривалість копій (паралельних, тож може перевищувати wall).
+    """
+
+    files: int = 0
+    bytes: int = 0
+    errors: int = 0
+    dirs: int = 0
+    wall_seconds: float = 0.0
+    walk_seconds: float = 0.0
+    plan_seconds: float = 0.0
+    copy_seconds: float = 0.0
+    queue_depth: int = 0  # останній замір (для рядка прогресу)
+    queue_max: int = 0
+    queue_sum: int = 0
+    queue_samples: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    started: float = field(default_factory=time.perf_counter)
+
+    def record_copy(self, seconds: float, ok: bool) -> None:
+        self.files += 1
+        self.errors += not ok
+        self.copy_seconds += seconds
+        self.latency.add(seconds)
+
+    def sample_queue(self, depth: int) -> None:
+        self.queue_depth = depth
+        self.queue_max = max(self.queue_max, depth)
+        self.queue_sum += depth
+        self.queue_samples += 1
+
+    def merge(self, other: SortMetrics) -> None:
+        """Додає метрики шарду (--procs); wall_seconds рахує батько."""
+        for name in _SUMMED:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.queue_max = max(self.queue_max, other.queue_max)
+        self.latency.merge(other.latency)
+
+    def elapsed(self) -> float:
+        return self.wall_seconds or time.perf_counter() - self.started
+
+    def progress_line(self) -> str:
+        elapsed = max(self.elapsed(), 1e-9)
+        return (
+            f"files={self.files} ({self.files / elapsed:.0f}/s), "
+            f"{self.bytes / elapsed / 2**20:.1f} MiB/s, "
+            f"queue={self.queue_depth}, errors={self.errors}"
+        )
+
+    def to_dict(self) -> dict[str, object]:
+        wall = self.elapsed()
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "errors": self.errors,
+            "dirs": self.dirs,
+            "wall_seconds": wall,
+            "files_per_second": self.files / wall if wall else 0.0,
+            "bytes_per_second": self.bytes / wall if wall else 0.0,
+            "stages": {
+                "walk_seconds": self.walk_seconds,
+                "plan_seconds": self.plan_seconds,
+                "copy_seconds": self.copy_seconds,
+            },
+            "copy_latency_seconds": self.latency.to_dict(),
+            "queue_depth": {
+                "max": self.queue_max,
+                "mean": (
+                    self.queue_sum / self.queue_samples if self.queue_samples else 0.0
+                ),
+            },
+        }
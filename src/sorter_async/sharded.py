@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import pickle
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+
+from .logger import flush_logs
+from .manifest import Manifest
+from .metrics import SortMetrics
+from .sort_async import (
+    SortParams,
+    _dir_id,
+    _prune,
+    _scan_dir,
+    _shard_of,
+    _sort_folder,
+    logger,
+    sort_folder,
+)
+
+
+def _init_shard(level: int) -> None:
+    logger.setLevel(level)
+    for handler in logger.handlers:
+        handler.setLevel(level)
+
+
+def _sort_shard(
+    params: SortParams,
+) -> tuple[dict[str, int], int, SortMetrics, str | None]:
+    """
+    Один шард у дочірньому процесі:
+    (статистика, кількість збоїв обходу, метрики, текст помилки або None).
+    """
+    metrics = SortMetrics()
+    try:
+        run = asyncio.run(_sort_folder(params, metrics))
+        return run.layout.stats, run.scan_errors, metrics, None
+    except RuntimeError as e:
+        return {}, 0, metrics, str(e)
+    except Exception as e:
+        return {}, 0, metrics, f"{type(e).__name__}: {e}"
+    finally:
+        flush_logs(logger)
+
+
+def _write_listings(
+    src: Path, dst: Path, directory: str, procs: int, metrics: SortMetrics
+) -> tuple[list[Path], int]:
+    """
+    Один обхід дерева src для всіх шардів: файли кожного каталогу діляться
+    за _shard_of і дописуються в список свого шарду (pickle-записи
+    (каталог, [назви]) у directory), тож у пам'яті — лише поточний каталог.
+    Повертає (шляхи списків, кількість збоїв обходу).
+    """
+    paths = [Path(directory, f"shard-{i}.lst") for i in range(procs)]
+    skip_id = _dir_id(dst)  # dst усередині src
+    scan_errors = 0
+    outs = [open(path, "wb") for path in paths]
+    try:
+        stack = [str(src)]
+        while stack:
+            current = stack.pop()
+            t0 = time.perf_counter()
+            files, subdirs, ok = _scan_dir(current, skip_id)
+            metrics.walk_seconds += time.perf_counter() - t0
+            metrics.dirs += 1
+            scan_errors += not ok
+            names: list[list[str]] = [[] for _ in range(procs)]
+            for f in files:
+                names[_shard_of(f, procs)].append(f.name)
+            for out, shard_names in zip(outs, names):
+                if shard_names:
+                    pickle.dump((current, shard_names), out)
+            stack.extend(reversed(subdirs))
+    finally:
+        for out in outs:
+            out.close()
+    return paths, scan_errors
+
+
+def sort_sharded(
+    params: SortParams, procs: int, metrics: SortMetrics | None = None
+) -> dict[str, int]:
+    """
+    Сортує params.src у procs процесах (--procs): кожен запускає власний
+    асинхронний конвеєр sort_folder над своїм шардом дерева, а батьківський
+    процес підсумовує статистику {<ext_folder>: <count>}.
+
+    Шард файлу — хеш його шляху в цілі (див. sort_async._shard_of): однакові
+    назви потрапляють в один процес, тож суфікси колізій ті самі, що й в
+    одному процесі. Дерево обходить один раз батько (_write_listings) і
+    передає кожному шарду його список файлів у тимчасовому файлі; шарди
+    стартують після обходу. Шард, що впав із будь-яким винятком (зокрема
+    у спавненому процесі чи при передачі результату), рахується як збій.
+    Маніфест спільний (одна мітка run), а prune робить батько, коли всі
+    шарди завершилися без помилок. --dedupe шукає дублікати в межах
+    процесу, тому з procs > 1 не підтримується. metrics шардів підсумовуються
+    (доступні після завершення, а не наживо).
+    """
+    if procs <= 1:
+        return asyncio.run(sort_folder(params, metrics))
+    if params.dedupe:
+        raise ValueError("--dedupe не підтримується разом із --procs > 1")
+    if not params.src.exists() or not params.src.is_dir():
+        raise ValueError(f"--src не існує або це не директорія: {params.src}")
+    params.dst.mkdir(parents=True, exist_ok=True)
+
+    run_id = time.time_ns()
+    metrics = metrics if metrics is not None else SortMetrics()
+    metrics.started = time.perf_counter()
+    stats: Counter[str] = Counter()
+    errors: list[str] = []
+    with tempfile.TemporaryDirectory(prefix="sorter-shards-") as listings_dir:
+        listings, scan_errors = _write_listings(
+            params.src.resolve(), params.dst, listings_dir, procs, metrics
+        )
+        shards = [
+            replace(
+                params,
+                shard=(i, procs),
+                listing=listing,
+                run_id=run_id,
+                prune=False,
+            )
+            for i, listing in enumerate(listings)
+        ]
+        # spawn, а не fork: дочірній процес налаштовує власний потік логування
+        # (fork не копіює потоки, тож QueueListener батька там не працював би)
+        with ProcessPoolExecutor(
+            max_workers=procs,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_shard,
+            initargs=(logger.getEffectiveLevel(),),
+        ) as pool:
+            futures = [pool.submit(_sort_shard, shard) for shard in shards]
+            for i, future in enumerate(futures):
+                try:
+                    shard_stats, shard_scan_errors, shard_metrics, error = (
+                        future.result()
+                    )
+                except Exception as e:  # збій процесу чи передачі результату
+                    errors.append(f"shard {i}: {type(e).__name__}: {e}")
+                    continue
+                stats.update(shard_stats)
+                scan_errors += shard_scan_errors
+                metrics.merge(shard_metrics)
+                if error is not None:
+                    errors.append(f"shard {i}: {error}")
+
+    if errors:
+        logger.warning("Shards failed: %d of %d", len(errors), procs)
+        raise RuntimeError("; ".join(errors))
+
+    pruned = 0
+    if params.incremental and params.prune and not params.dry_run:
+        if scan_errors:
+            # Неповний обхід виглядав би як зниклі джерела
+            logger.warning("Prune skipped: incomplete scan")
+        else:
+            manifest = Manifest(params.dst, params.src.resolve(), run=run_id)
+            try:
+                pruned = _prune(manifest)
+            finally:
+                manifest.close()
+    metrics.wall_seconds = time.perf_counter() - metrics.started
+    logger.info(
+        "Shards done: procs=%d, files=%d, pruned=%d in %.2fs. Buckets: %s",
+        procs,
+        sum(stats.values()),
+        pruned,
+        metrics.elapsed(),
+        ", ".join(f"{k}:{v}" for k, v in sorted(stats.items())),
+    )
+    return dict(stats)
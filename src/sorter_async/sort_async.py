@@ -1,22 +1,55 @@
 from __future__ import annotations
 
 import asyncio
-import shutil
-from dataclasses import dataclass
+import os
+import pickle
+import signal
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator, Mapping, TypeVar
 
+from .concurrency import AimdLimiter, Lanes
+from .copy_engine import CHUNKED_MIN_BYTES, CopyEngine
+from .dedupe import Deduper
+from .journal import Journal
 from .logger import get_logger
+from .manifest import Manifest
+from .metrics import SortMetrics
+from .watch import Watcher, open_watcher
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+_CHUNK_HELPERS = 15  # найбільше потоків-помічників на один великий файл
+
 
 @dataclass(frozen=True)
 class SortParams:
     src: Path
     dst: Path
-    workers: int = 100
+    workers: int | str = 100  # або "auto" — адаптивно (див. concurrency.Lanes)
     dry_run: bool = False
+    mode: str = "copy"  # copy | move | link (див. CopyEngine)
+    incremental: bool = False  # пропускати незмінені файли за маніфестом у dst
+    prune: bool = False  # з incremental: видаляти з dst файли, зниклі з src
+    dedupe: str | None = None  # link | skip — дублікати за вмістом (див. Deduper)
+    overwrite: bool = False  # однакові назви перезаписують одна одну (без ~N)
+    progress: int = 0  # >0: рядок-підсумок кожні N файлів замість рядка на файл
+    journal: bool = False  # вести журнал у dst (fsync), щоб можна було --resume
+    resume: bool = False  # продовжити перерваний запуск за журналом у dst (+journal)
+    shard: tuple[int, int] = (0, 1)  # (номер, кількість): частка дерева (--procs)
+    listing: Path | None = None  # --procs: файли шарду від батька (без обходу)
+    run_id: int | None = None  # спільна мітка запуску шардів у маніфесті
+    # Від цього розміру файл копіюється діапазонами паралельно (0 — вимкнено)
+    chunk_min_bytes: int = CHUNKED_MIN_BYTES
+    watch: bool = False  # після початкового сортування — стежити за новими файлами
+    settle: float = 1.0  # --watch: скільки файл без close() має не змінюватися
+    poll: float = 0.0  # --watch: >0 — опитування раз на poll с замість inotify
 
 
 def _ext_folder(path: Path) -> str:
@@ -29,76 +62,631 @@ def _ext_folder(path: Path) -> str:
     return path.suffix.lstrip(".").lower()
 
 
-def _iter_files(src: Path) -> Iterable[Path]:
-    """Рекурсивно повертає всі файли з дерева каталогу src."""
-    yield from (p for p in src.rglob("*") if p.is_file())
+def _shard_of(path: Path, count: int) -> int:
+    """
+    Шард файлу — за хешем його шляху в цілі (підпапка/назва), тож файли з
+    однаковою назвою (колізії) завжди потрапляють в один процес.
+    """
+    key = f"{_ext_folder(path)}/{path.name}".encode("utf-8", "surrogateescape")
+    return zlib.crc32(key) % count
 
 
-async def _copy_one(
-    src_file: Path, dst_root: Path, sem: asyncio.Semaphore, dry_run: bool
-):
+def _scan_dir(
+    directory: str, skip: tuple[int, int] | None
+) -> tuple[list[Path], list[str], bool]:
     """
-    Копіює один файл у відповідну підпапку dst_root за розширенням.
-    Повертає (src_file, dst_file) при успіху, або None при dry-run.
+    Один рівень обходу через os.scandir: повертає (файли, підкаталоги, ok).
+    Тип береться з кешу DirEntry (без окремого stat на більшості ФС);
+    символьні посилання на каталоги не розкриваються, як і в rglob.
+    Каталог з ідентифікатором skip (st_dev, st_ino) пропускається.
+    Вміст сортується за назвою — порядок обходу (а з ним і суфікси колізій
+    у _Layout) не залежить від порядку записів у ФС.
+    """
+    files: list[Path] = []
+    subdirs: list[str] = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if skip is None or _entry_id(entry) != skip:
+                            subdirs.append(entry.path)
+                    elif entry.is_file():
+                        files.append(Path(entry.path))
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.warning("scan failed %s: %s", directory, e)
+        return files, subdirs, False
+    files.sort()
+    subdirs.sort()
+    return files, subdirs, True
+
+
+def _read_listing(path: Path) -> Iterator[tuple[str, list[Path]]]:
+    """
+    Список файлів шарду, який записав батьківський процес (sharded.py):
+    послідовність pickle-записів (каталог, [назви файлів]).
+    """
+    with open(path, "rb") as f:
+        while True:
+            try:
+                directory, names = pickle.load(f)
+            except EOFError:
+                return
+            yield directory, [Path(directory, name) for name in names]
+
+
+def _entry_id(entry: os.DirEntry[str]) -> tuple[int, int]:
+    st = entry.stat(follow_symlinks=False)
+    return st.st_dev, st.st_ino
+
+
+def _dir_id(path: Path | None) -> tuple[int, int] | None:
+    if path is None:
+        return None
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_dev, st.st_ino
+
+
+_Item = tuple[Path, os.stat_result | None]  # файл і його stat (якщо знятий)
+_Task = tuple[Path, os.stat_result | None, Path]  # + готовий шлях у цілі
+
+
+@dataclass
+class _Lane:
+    """Черга завдань і її споживачі; з limiter — смуга --workers auto."""
+
+    queue: asyncio.Queue[_Task | None]
+    consumers: int
+    limiter: AimdLimiter | None = None
+
+
+def _lanes(run: _Run, consumers: int) -> list[_Lane]:
+    """
+    Без --workers auto — одна спільна черга. З auto — окрема черга й окремі
+    споживачі на кожну смугу: дрібні файли не чекають за великими ні в черзі,
+    ні на ліміті. Черга великих не обмежена, щоб producer не зупинявся на
+    ній і не переставав подавати дрібні; кожен її елемент — файл від
+    Lanes.threshold, тож їх небагато.
+    """
+    if run.lanes is None:
+        return [_Lane(asyncio.Queue(maxsize=2 * consumers), consumers)]
+    small, large = run.lanes.small, run.lanes.large
+    return [
+        _Lane(asyncio.Queue(maxsize=2 * small.maximum), small.maximum, small),
+        _Lane(asyncio.Queue(), large.maximum, large),
+    ]
+
+
+class _Layout:
+    """
+    Планувальник розкладки цілі: групує файли за підпапками-розширеннями,
+    створює кожну підпапку один раз (а не mkdir на кожен файл) і заздалегідь
+    обчислює шлях у цілі, тож споживачам лишається саме копіювання.
+    З unique=True однакові назви з різних каталогів src не перезаписують одна
+    одну: друга й наступні отримують суфікс 'name~2.ext', 'name~3.ext', ...
+    (порядок обходу детермінований). Пам'ять — по назві на розкладений файл.
+    З existing=True (--incremental) зайнятими вважаються й назви, що вже лежать
+    у підпапці цілі (os.listdir один раз на підпапку), — новий файл не
+    перезапише копію іншого джерела. З unique=False (--overwrite, --dedupe)
+    назви не запам'ятовуються й підпапки не читаються.
+    Викликається лише з producer-а (послідовно), тож без локів.
     """
-    folder = _ext_folder(src_file)
-    dst_dir = dst_root / folder
-    dst_dir.mkdir(parents=True, exist_ok=True)
-    dst_file = dst_dir / src_file.name
 
-    async with sem:
-        if dry_run:
+    def __init__(
+        self,
+        dst_root: Path,
+        unique: bool = True,
+        remember: bool = False,
+        existing: bool = False,
+    ) -> None:
+        self.root = dst_root
+        self.unique = unique
+        self.existing = existing
+        # remember (--watch): src → ціль, щоб повторна подія для вже розкладеного
+        # файлу оновлювала ту саму ціль, а не створювала 'name~2'
+        self.targets: dict[str, Path] | None = {} if remember else None
+        self.stats: dict[str, int] = {}  # підпапка → кількість файлів
+        self.renamed = 0
+        self._buckets: dict[str, Path] = {}
+        self._names: dict[str, set[str]] = {}  # підпапка → зайняті назви
+
+    def reserve(self, targets: Iterable[str]) -> None:
+        """
+        Займає назви, вже розкладені перерваним запуском (--resume) або
+        попередніми запусками (цілі з маніфесту --incremental).
+        """
+        if not self.unique:
+            return
+        for target in map(Path, targets):
+            folder = target.parent.name
+            if target.parent == self.root / folder:
+                self._names.setdefault(folder, set()).add(target.name)
+
+    def plan(
+        self, items: list[_Item], placed: Mapping[str, str] | None = None
+    ) -> list[_Task]:
+        """
+        Шляхи в цілі для items; placed — назва джерела → ціль, куди його
+        розклав попередній запуск (з маніфесту): змінений файл оновлює свою
+        колишню копію ('name~2.ext' лишається 'name~2.ext').
+        """
+        tasks: list[_Task] = []
+        for src_file, st in items:
+            if self.targets is not None:
+                known = self.targets.get(str(src_file))
+                if known is not None:
+                    tasks.append((src_file, st, known))
+                    continue
+            folder = _ext_folder(src_file)
+            bucket = self._buckets.get(folder)
+            if bucket is None:
+                bucket = self._buckets[folder] = self.root / folder
+                bucket.mkdir(parents=True, exist_ok=True)
+                names = self._names.setdefault(folder, set())
+                if self.existing and self.unique:
+                    names.update(os.listdir(bucket))
+            self.stats[folder] = self.stats.get(folder, 0) + 1
+            name = src_file.name
+            previous = Path(placed[name]) if placed and name in placed else None
+            if self.unique and previous is not None and previous.parent.name == folder:
+                name = previous.name  # уже зайнята (reserve/вміст підпапки)
+            elif self.unique:
+                name = self._claim(self._names[folder], src_file)
+            tasks.append((src_file, st, bucket / name))
+            if self.targets is not None:
+                self.targets[str(src_file)] = bucket / name
+        return tasks
+
+    def _claim(self, names: set[str], src_file: Path) -> str:
+        name = src_file.name
+        n = 1
+        while name in names:
+            n += 1
+            name = f"{src_file.stem}~{n}{src_file.suffix}"
+        if n > 1:
+            self.renamed += 1
+        names.add(name)
+        return name
+
+
+@dataclass
+class _Run:
+    """Стан одного запуску sort_folder, спільний для producer і consumer-ів."""
+
+    params: SortParams
+    src: Path
+    engine: CopyEngine
+    pool: ThreadPoolExecutor
+    layout: _Layout
+    deduper: Deduper | None = None
+    manifest: Manifest | None = None
+    lanes: Lanes | None = None
+    journal: Journal | None = None
+    errors: list[Exception] = field(default_factory=list)
+    unchanged: int = 0
+    resumed: int = 0
+    scan_errors: int = 0
+    metrics: SortMetrics = field(default_factory=SortMetrics)
+
+    async def blocking(self, fn: Callable[..., T], *args: object) -> T:
+        """Виконує блокуючий виклик у власному пулі потоків запуску."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, partial(fn, *args))
+
+    def tick(self, latency: float, ok: bool) -> None:
+        """Рахує оброблений файл; кожні params.progress файлів — підсумок."""
+        metrics = self.metrics
+        metrics.record_copy(latency, ok)
+        metrics.bytes = self.engine.bytes
+        every = self.params.progress
+        if every and metrics.files % every == 0:
+            logger.info("Progress: %s", metrics.progress_line())
+
+    def prepare(self, directory: str, files: list[Path]) -> list[_Task]:
+        """
+        Файли одного каталогу → завдання для споживачів (у потоці пулу):
+        з маніфестом — лише нові/змінені, далі — розкладка цілі.
+        """
+        items: list[_Item]
+        placed: dict[str, str] | None = None
+        if self.manifest is not None:
+            items = self.manifest.changed(directory, files)
+            self.unchanged += len(files) - len(items)
+            if items:
+                placed = self.manifest.targets(directory)
+        elif self.lanes is not None:
+            items = _stat_files(files)
+        else:
+            items = [(f, None) for f in files]
+        if self.journal is not None and self.journal.done:
+            done = self.journal.done
+            todo = [item for item in items if str(item[0]) not in done]
+            self.resumed += len(items) - len(todo)
+            items = todo
+        return self.layout.plan(items, placed)
+
+    def place(
+        self, src_file: Path, dst_file: Path, st: os.stat_result | None
+    ) -> tuple[Path, str]:
+        """
+        Розкладає один файл (у потоці пулу) і відмічає його в журналі.
+        Повертає (фактичний шлях у цілі, спосіб).
+        """
+        if self.deduper is not None:
+            # Хешування — у тому ж воркер-потоці, що й копіювання
+            dst_file, method = self.deduper.place(src_file, dst_file, st)
+        else:
+            method = self.engine.transfer(src_file, dst_file, st)
+        if self.journal is not None:
+            self.journal.record(src_file, dst_file)
+        return dst_file, method
+
+
+def _stat_files(files: list[Path]) -> list[_Item]:
+    items: list[_Item] = []
+    for f in files:
+        try:
+            items.append((f, f.stat()))
+        except OSError:
+            continue  # файл зник між обходом і stat
+    return items
+
+
+async def _produce_files(run: _Run, lanes: list[_Lane]) -> None:
+    """
+    Producer: обходить дерево src по каталогу за раз у потоці, щоб не
+    блокувати event loop, і кладе файли в обмежену чергу — поки споживачі
+    не встигають, обхід чекає на queue.put. Наприкінці — по None на споживача.
+    З маніфестом у чергу потрапляють лише нові/змінені файли (порівняння stat
+    іде в тому ж потоці, одним запитом до індексу на каталог); у режимі
+    --workers auto за розміром обирається черга смуги, тож stat теж тут.
+    Шлях у цілі й підпапка готуються тут же (див. _Layout).
+    З params.listing (шард --procs) дерево вже обійшов батьківський процес:
+    каталоги й файли читаються з його списку.
+    """
+    if run.params.listing is not None:
+        listing = _read_listing(run.params.listing)
+        while True:
+            record = await run.blocking(next, listing, None)
+            if record is None:
+                return
+            await _enqueue(run, lanes, *record)
+    skip_id = await run.blocking(_dir_id, run.params.dst)  # dst усередині src
+    stack = [str(run.src)]
+    while stack:
+        directory = stack.pop()
+        t0 = time.perf_counter()
+        files, subdirs, ok = await run.blocking(_scan_dir, directory, skip_id)
+        run.metrics.walk_seconds += time.perf_counter() - t0
+        run.metrics.dirs += 1
+        run.scan_errors += not ok
+        if files:
+            await _enqueue(run, lanes, directory, files)
+        stack.extend(reversed(subdirs))
+
+
+async def _enqueue(
+    run: _Run, lanes: list[_Lane], directory: str, files: list[Path]
+) -> None:
+    t0 = time.perf_counter()
+    tasks = await run.blocking(run.prepare, directory, files)
+    run.metrics.plan_seconds += time.perf_counter() - t0
+    for task in tasks:
+        st = task[1]
+        lane = lanes[0]
+        if run.lanes is not None and st is not None:
+            lane = lanes[run.lanes.for_size(st.st_size) is run.lanes.large]
+        await lane.queue.put(task)
+        run.metrics.sample_queue(sum(other.queue.qsize() for other in lanes))
+
+
+async def _produce_watched(
+    run: _Run, lanes: list[_Lane], watcher: Watcher, stop: asyncio.Event
+) -> None:
+    """
+    Producer для --watch: після початкового обходу кладе в ту саму чергу
+    файли, про які повідомив watcher (уже після debounce), групуючи їх за
+    каталогами для prepare — без повторного обходу дерева.
+    """
+    overflows = 0
+    async for paths in watcher.batches(stop, run.blocking):
+        if watcher.overflows != overflows:
+            overflows = watcher.overflows
+            logger.warning("Watch events lost (queue overflow): rescanned %s", run.src)
+        by_dir: dict[str, list[Path]] = {}
+        for path in sorted(paths):
+            by_dir.setdefault(str(path.parent), []).append(path)
+        for directory, files in by_dir.items():
+            await _enqueue(run, lanes, directory, files)
+
+
+async def _copy_one(task: _Task, run: _Run):
+    """
+    Копіює (переносить/лінкує — за run.engine.mode) один файл у заздалегідь
+    сплановану ціль; з run.deduper — з дедуплікацією за вмістом.
+    Повертає (src_file, dst_file) при успіху, або None при dry-run.
+    """
+    src_file, st, dst_file = task
+    per_file = not run.params.progress  # з --progress — лише підсумки
+    if run.params.dry_run:
+        if per_file:
             logger.debug("[dry-run] %s -> %s", src_file, dst_file)
-            return None
+        return None
+    try:
+        dst_file, method = await run.blocking(run.place, src_file, dst_file, st)
+        if per_file:
+            logger.debug("%s %s -> %s", method, src_file, dst_file)
+        return (src_file, dst_file)
+    except Exception as e:
+        logger.error("copy failed %s -> %s: %s", src_file, dst_file, e)
+        # Прокидуємо виняток далі, щоб підсумково порахувати помилки
+        raise
+
+
+async def _consume_files(lane: _Lane, run: _Run) -> None:
+    """
+    Consumer: бере файли з черги своєї смуги, доки не отримає None.
+    У режимі --workers auto кожна копія проходить через ліміт смуги
+    (дрібні/великі файли), а її тривалість і розмір коригують цей ліміт.
+    """
+    while True:
+        task = await lane.queue.get()
+        if task is None:
+            return
+        src_file, st, _ = task
+        limiter = lane.limiter if st is not None else None
+        if limiter is not None:
+            await limiter.acquire()
+        started = time.perf_counter()
+        ok = False
         try:
-            await asyncio.to_thread(shutil.copy2, src_file, dst_file)
-            logger.debug("copied %s -> %s", src_file, dst_file)
-            return (src_file, dst_file)
+            done = await _copy_one(task, run)
+            ok = True
         except Exception as e:
-            logger.error("copy failed %s -> %s: %s", src_file, dst_file, e)
-            # Прокидуємо виняток далі, щоб підсумково порахувати помилки
-            raise
+            run.errors.append(e)
+            continue
+        finally:
+            latency = time.perf_counter() - started
+            if limiter is not None:
+                await limiter.release(latency, st.st_size)
+            run.tick(latency, ok)
+        if run.manifest is not None and done is not None and st is not None:
+            run.manifest.record(src_file, st, done[1])
+
+
+def _prune(manifest: Manifest) -> int:
+    """Видаляє з dst копії джерел, що зникли з src; повертає кількість."""
+    pruned = 0
+    for src_file, dst_file, shared in manifest.stale():
+        if not shared:  # у цю ціль уже розкладено інший наявний файл
+            try:
+                dst_file.unlink()
+                logger.debug("pruned %s (source %s is gone)", dst_file, src_file)
+            except FileNotFoundError:
+                pass
+        manifest.forget(src_file)
+        pruned += 1
+    return pruned
 
 
-async def sort_folder(params: SortParams) -> dict[str, int]:
+async def sort_folder(
+    params: SortParams,
+    metrics: SortMetrics | None = None,
+    stop: asyncio.Event | None = None,
+) -> dict[str, int]:
     """
     Асинхронно сортує всі файли з params.src по підпапках у params.dst за розширеннями.
-    Повертає статистику: {<ext_folder>: <count>}.
+    Повертає статистику: {<ext_folder>: <count>} (з incremental — лише по
+    нових/змінених файлах).
+
+    Конвеєр producer/consumer: обхід (os.scandir у потоці) кладе файли в
+    обмежену asyncio.Queue, а пул корутин-споживачів їх копіює. Копіювання
+    починається одразу, пам'ять — O(workers), а не O(файлів). Блокуючі
+    виклики йдуть у власний ThreadPoolExecutor запуску (розміром із
+    паралелізм), а не в обмежений пул asyncio.to_thread за замовчуванням.
+    workers="auto" — адаптивний паралелізм (AIMD) з окремими смугами для
+    дрібних і великих файлів (див. concurrency.Lanes). Файл від
+    params.chunk_min_bytes копіюється діапазонами: вільні потоки пулу
+    допомагають тому, що його копіює (див. CopyEngine.use_pool), тож один
+    величезний файл не розтягує кінець запуску.
+    metrics — таймери етапів, швидкість і перцентилі затримок копій
+    (заповнюються на місці, див. metrics.SortMetrics).
+    params.watch — після початкового сортування стежити за src (inotify або
+    опитування, див. watch.py) і подавати нові файли в той самий конвеєр,
+    доки не встановлено stop (без stop — до SIGINT/SIGTERM).
     """
+    return (await _sort_folder(params, metrics, stop)).layout.stats
+
+
+async def _sort_folder(
+    params: SortParams,
+    metrics: SortMetrics | None = None,
+    stop: asyncio.Event | None = None,
+) -> _Run:
+    """sort_folder, що повертає весь стан запуску (для шардів --procs)."""
     if not params.src.exists() or not params.src.is_dir():
         raise ValueError(f"--src не існує або це не директорія: {params.src}")
     params.dst.mkdir(parents=True, exist_ok=True)
 
-    files = list(_iter_files(params.src))
+    lanes: Lanes | None = None
+    if params.workers == "auto":
+        lanes = Lanes()
+        consumers = lanes.capacity
+    else:
+        consumers = max(1, int(params.workers))
+    src = params.src.resolve()
     logger.info(
-        "Start sorting: src=%s, dst=%s, workers=%d, dry_run=%s, files=%d",
-        params.src.resolve(),
+        "Start sorting: src=%s, dst=%s, workers=%s, dry_run=%s, mode=%s, "
+        "incremental=%s, dedupe=%s",
+        src,
         params.dst.resolve(),
         params.workers,
         params.dry_run,
-        len(files),
+        params.mode,
+        params.incremental,
+        params.dedupe,
     )
 
-    sem = asyncio.Semaphore(max(1, params.workers))
+    engine = CopyEngine(params.mode)
+    # Колізії назв із --dedupe розв'язує Deduper (суфікс із хешу вмісту)
+    layout = _Layout(
+        params.dst,
+        unique=not (params.dedupe or params.overwrite),
+        remember=params.watch,
+        existing=params.incremental,
+    )
+    journal = None
+    if (params.journal or params.resume) and not params.dry_run:
+        journal = Journal(
+            params.dst, src, params.mode, resume=params.resume, shard=params.shard
+        )
+        layout.reserve(journal.done.values())
+        if journal.done:
+            logger.info("Resuming: %d file(s) already sorted", len(journal.done))
+    clean = False
+    try:
+        # +1 потік — для обходу, щоб він не чекав на вільний слот копіювання
+        with ThreadPoolExecutor(consumers + 1, thread_name_prefix="sorter") as pool:
+            engine.use_pool(
+                pool.submit, min(consumers, _CHUNK_HELPERS), params.chunk_min_bytes
+            )
+            run = _Run(params, src, engine, pool, layout, lanes=lanes, journal=journal)
+            if metrics is not None:
+                run.metrics = metrics
+            run.metrics.started = time.perf_counter()
+            if params.dedupe:
+                run.deduper = Deduper(engine, params.dedupe)
+            if params.incremental:
+                run.manifest = Manifest(
+                    params.dst, src, readonly=params.dry_run, run=params.run_id
+                )
+                if layout.unique:
+                    layout.reserve(
+                        await run.blocking(list, run.manifest.destinations())
+                    )
+            pruned = await _run_pipeline(run, consumers, stop)
+            run.metrics.wall_seconds = time.perf_counter() - run.metrics.started
+            clean = not run.errors and not run.scan_errors
+    finally:
+        # Закриваємо після пулу: копії, що ще йшли в потоках, теж потраплять
+        # у журнал. Після чистого запуску він не потрібен.
+        if journal is not None:
+            journal.close(remove=clean)
 
+    if run.errors and not params.dry_run:
+        logger.warning(
+            "Completed with errors: %d file(s) failed; %s",
+            len(run.errors),
+            (
+                "rerun with --resume to retry only them"
+                if journal is not None
+                else "rerun with --journal to make the next run resumable"
+            ),
+        )
+        # Залишаємо підняття помилки, щоб CI/тести могли це відловити
+        raise RuntimeError(f"Кількість помилок під час копіювання: {len(run.errors)}")
+
+    stats = layout.stats
+    logger.info(
+        "Done. files=%d, unchanged=%d, resumed=%d, renamed=%d, pruned=%d. "
+        "Buckets: %s. Methods: %s",
+        sum(stats.values()),
+        run.unchanged,
+        run.resumed,
+        layout.renamed,
+        pruned,
+        ", ".join(f"{k}:{v}" for k, v in sorted(stats.items())),
+        ", ".join(f"{k}:{v}" for k, v in sorted(engine.methods.items())) or "-",
+    )
+    if run.deduper is not None:
+        logger.info(
+            "Dedupe: %s, saved=%d bytes",
+            ", ".join(f"{k}:{v}" for k, v in sorted(run.deduper.counts.items())) or "-",
+            run.deduper.saved_bytes,
+        )
+    if lanes is not None:
+        logger.info(
+            "Adaptive limits: small=%d, large=%d", lanes.small.limit, lanes.large.limit
+        )
+    return run
+
+
+async def _run_pipeline(
+    run: _Run, consumers: int, stop: asyncio.Event | None = None
+) -> int:
+    """
+    Запускає producer і consumer-ів; повертає кількість видалених (prune).
+    З params.watch після початкового обходу продовжує подавати нові файли,
+    доки не встановлено stop (або не прийшов SIGINT/SIGTERM).
+    """
+    lanes = _lanes(run, consumers)
     tasks = [
-        asyncio.create_task(_copy_one(f, params.dst, sem, params.dry_run))
-        for f in files
+        asyncio.create_task(_consume_files(lane, run))
+        for lane in lanes
+        for _ in range(lane.consumers)
     ]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    stats: dict[str, int] = {}
-    for f in files:
-        folder = _ext_folder(f)
-        stats[folder] = stats.get(folder, 0) + 1
+    watcher: Watcher | None = None
+    try:
+        try:
+            if run.params.watch:
+                # Стежимо ще до обходу: файл, що з'явиться під час нього, не загубиться
+                params = run.params
+                watcher = open_watcher(run.src, params.dst, params.settle, params.poll)
+                await watcher.start(run.blocking)
+            await _produce_files(run, lanes)
+            if watcher is not None:
+                await _watch(run, lanes, watcher, stop)
+        finally:
+            for lane in lanes:
+                for _ in range(lane.consumers):
+                    await lane.queue.put(None)
+        await asyncio.gather(*tasks)
+        if run.manifest is not None and run.params.prune:
+            # Неповний обхід або збої копіювання виглядали б як зниклі джерела
+            if run.errors or run.scan_errors or run.params.dry_run:
+                logger.warning("Prune skipped: incomplete or dry run")
+            else:
+                return await run.blocking(_prune, run.manifest)
+        return 0
+    finally:
+        for task in tasks:
+            task.cancel()
+        if watcher is not None:
+            watcher.close()
+        if run.manifest is not None:
+            run.manifest.close()
 
-    errors = [r for r in results if isinstance(r, Exception)]
-    if errors and not params.dry_run:
-        logger.warning("Completed with errors: %d file(s) failed", len(errors))
-        # Залишаємо підняття помилки, щоб CI/тести могли це відловити
-        raise RuntimeError(f"Кількість помилок під час копіювання: {len(errors)}")
 
+async def _watch(
+    run: _Run,
+    lanes: list[_Lane],
+    watcher: Watcher,
+    stop: asyncio.Event | None,
+) -> None:
+    loop = asyncio.get_running_loop()
+    signals: list[signal.Signals] = []
+    if stop is None:
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+                signals.append(sig)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: зупинка через KeyboardInterrupt
     logger.info(
-        "Done. Buckets: %s", ", ".join(f"{k}:{v}" for k, v in sorted(stats.items()))
+        "Initial scan done: files=%d. Watching %s (%s), Ctrl+C to stop",
+        sum(run.layout.stats.values()),
+        run.src,
+        watcher.name,
     )
-    return stats
+    try:
+        await _produce_watched(run, lanes, watcher, stop)
+    finally:
+        for sig in signals:
+            loop.remove_signal_handler(sig)
+    logger.info("Watch stopped")
@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable
+
+# inotify(7): маски подій
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    IN_MODIFY
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+    | IN_EXCL_UNLINK
+)
+_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (далі — назва)
+_READ_BYTES = 64 * 1024
+
+CLOSED_DELAY = 0.02  # після close/rename файл дописано — лише зливаємо повтори
+POLL_SECONDS = 1.0
+
+Blocking = Callable[..., Awaitable]
+
+
+class _Debouncer:
+    """
+    Відкладає файли, поки вони не «вляжуться». Подія закриття після запису
+    (чи перейменування в каталог) означає, що файл готовий, — чекаємо лише
+    CLOSED_DELAY, щоб злити повтори. Файл, для якого бачили тільки створення
+    чи запис, чекає settle секунд тиші й ще settle після кожної зміни розміру
+    або mtime (запис іде без подій — напр., у режимі опитування).
+    """
+
+    def __init__(
+        self, settle: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.settle = settle
+        self._clock = clock
+        self._due: dict[Path, tuple[float, bool]] = {}  # шлях → (коли, закритий)
+        self._sig: dict[Path, tuple[int, int]] = {}
+
+    def touch(self, path: Path, closed: bool = False) -> None:
+        delay = CLOSED_DELAY if closed else self.settle
+        self._due[path] = (self._clock() + delay, closed)
+
+    def forget(self, path: Path) -> None:
+        self._due.pop(path, None)
+        self._sig.pop(path, None)
+
+    def timeout(self) -> float | None:
+        """Скільки чекати до найближчого файлу (None — нічого не відкладено)."""
+        if not self._due:
+            return None
+        return max(0.0, min(due for due, _ in self._due.values()) - self._clock())
+
+    def ready(self) -> list[Path]:
+        now = self._clock()
+        out: list[Path] = []
+        for path, (due, closed) in list(self._due.items()):
+            if due > now:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                self.forget(path)  # зник або перейменований до кінця очікування
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            if not closed and self._sig.get(path) != sig:
+                self._sig[path] = sig  # ще пишеться — чекаємо ще settle
+                self._due[path] = (now + self.settle, False)
+                continue
+            self.forget(path)
+            out.append(path)
+        return out
+
+
+class Watcher:
+    """
+    Джерело нових файлів для --watch: batches() віддає списки готових файлів
+    (після debounce), доки не встановлено stop. Каталог skip (ціль усередині
+    джерела) не відстежується.
+    """
+
+    name = "watch"
+
+    def __init__(self, root: Path, skip: Path | None, settle: float) -> None:
+        self.root = Path(root)
+        self.skip = Path(skip).resolve() if skip is not None else None
+        self.debounce = _Debouncer(settle)
+        self.overflows = 0  # скільки разів події втрачено й дерево обійдено повністю
+        self._wake = asyncio.Event()
+
+    def _skipped(self, path: Path) -> bool:
+        return self.skip is not None and path == self.skip
+
+    def _walk(self, top: Path) -> tuple[list[Path], list[Path]]:
+        """(каталоги, файли) піддерева top, без skip і посилань на каталоги."""
+        dirs: list[Path] = []
+        files: list[Path] = []
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            if self._skipped(directory):
+                continue
+            dirs.append(directory)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(Path(entry.path))
+                            elif entry.is_file():
+                                files.append(Path(entry.path))
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return dirs, files
+
+    async def start(self, blocking: Blocking) -> None:
+        """Починає відстежувати (до початкового сортування — щоб нічого не пропустити)."""
+
+    async def _collect(self, blocking: Blocking) -> None:
+        """Переносить нові події в debounce (після пробудження)."""
+
+    async def batches(
+        self, stop: asyncio.Event, blocking: Blocking
+    ) -> AsyncIterator[list[Path]]:
+        stopper = asyncio.ensure_future(stop.wait())
+        stopper.add_done_callback(lambda _: self._wake.set())
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._timeout())
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                if stop.is_set():
+                    return
+                await self._collect(blocking)
+                ready = self.debounce.ready()
+                if ready:
+                    yield ready
+        finally:
+            stopper.cancel()
+
+    def _timeout(self) -> float | None:
+        return self.debounce.timeout()
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux inotify через ctypes (без сторонніх пакетів): watch на кожен
+    каталог дерева, нові каталоги додаються на льоту (а файли, що встигли
+    в них з'явитися, — у debounce). Дескриптор читається з event loop
+    (add_reader), тож новий файл потрапляє в конвеєр за мілісекунди після
+    close(), без обходу дерева. Переповнення черги ядра (IN_Q_OVERFLOW) —
+    повний обхід як запасний варіант.
+    """
+
+    name = "inotify"
+
+    def __init__(self, root: Path, skip: Path | None, settle: float) -> None:
+        super().__init__(root, skip, settle)
+        libc = _libc()
+        if libc is None:
+            raise OSError("inotify is not available")
+        self._libc = libc
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.fd = fd
+        self._dirs: dict[int, Path] = {}  # wd → каталог
+
+    def _add_tree(self, top: Path, closed: bool) -> None:
+        dirs, files = self._walk(top)
+        for directory in dirs:
+            wd = self._libc.inotify_add_watch(
+                self.fd, os.fsencode(directory), _WATCH_MASK
+            )
+            if wd >= 0:
+                self._dirs[wd] = directory
+        if top != self.root:
+            for path in files:  # з'явилися до того, як каталог відстежується
+                self.debounce.touch(path, closed)
+
+    def _drop_tree(self, top: Path) -> None:
+        for wd, directory in list(self._dirs.items()):
+            if directory == top or top in directory.parents:
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+
+    async def start(self, blocking: Blocking) -> None:
+        await blocking(self._add_tree, self.root, False)
+        asyncio.get_running_loop().add_reader(self.fd, self._wake.set)
+
+    async def _collect(self, blocking: Blocking) -> None:
+        try:
+            data = os.read(self.fd, _READ_BYTES)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            raw = data[offset + _EVENT.size : offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                await self._overflow(blocking)
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not raw:
+                continue
+            path = directory / os.fsdecode(raw.rstrip(b"\0"))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self._skipped(path):
+                    await blocking(self._add_tree, path, bool(mask & IN_MOVED_TO))
+                elif mask & IN_MOVED_FROM:
+                    self._drop_tree(path)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.debounce.forget(path)
+            else:
+                self.debounce.touch(
+                    path, closed=bool(mask & (IN_CLOSE_WRITE | IN_MOVED_TO))
+                )
+        if len(data) >= _READ_BYTES - 4096:
+            self._wake.set()  # у ядрі, ймовірно, ще є події
+
+    async def _overflow(self, blocking: Blocking) -> None:
+        self.overflows += 1
+        _, files = await blocking(self._walk, self.root)
+        for path in files:
+            self.debounce.touch(path)
+
+    def close(self) -> None:
+        try:
+            asyncio.get_running_loop().remove_reader(self.fd)
+        except RuntimeError:
+            pass
+        os.close(self.fd)
+
+
+class PollingWatcher(Watcher):
+    """
+    Запасний варіант без inotify (інші ОС, мережеві ФС): раз на interval
+    обходить дерево й порівнює (розмір, mtime) з попереднім знімком; нові та
+    змінені файли йдуть у debounce (чекають settle тиші).
+    """
+
+    name = "poll"
+
+    def __init__(
+        self,
+        root: Path,
+        skip: Path | None,
+        settle: float,
+        interval: float = POLL_SECONDS,
+    ) -> None:
+        super().__init__(root, skip, settle)
+        self.interval = interval
+        self._snapshot: dict[Path, tuple[int, int]] = {}
+        self._next = 0.0
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot: dict[Path, tuple[int, int]] = {}
+        for path in self._walk(self.root)[1]:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    async def start(self, blocking: Blocking) -> None:
+        self._snapshot = await blocking(self._scan)
+        self._next = time.monotonic() + self.interval
+
+    def _timeout(self) -> float | None:
+        poll = max(0.0, self._next - time.monotonic())
+        pending = self.debounce.timeout()
+        return poll if pending is None else min(poll, pending)
+
+    async def _collect(self, blocking: Blocking) -> None:
+        if time.monotonic() < self._next:
+            return
+        snapshot = await blocking(self._scan)
+        for path, sig in snapshot.items():
+            if self._snapshot.get(path) != sig:
+                self.debounce.touch(path)
+        for path in self._snapshot.keys() - snapshot.keys():
+            self.debounce.forget(path)
+        self._snapshot = snapshot
+        self._next = time.monotonic() + self.interval
+
+
+def _libc() -> ctypes.CDLL | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def open_watcher(
+    root: Path, skip: Path | None, settle: float, poll: float = 0.0
+) -> Watcher:
+    """inotify, якщо доступний і poll == 0; інакше — опитування раз на poll секунд."""
+    if not poll:
+        try:
+            return InotifyWatcher(root, skip, settle)
+        except OSError:
+            pass
+    return PollingWatcher(root, skip, settle, poll or POLL_SECONDS)
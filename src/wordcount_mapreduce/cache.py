@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, TextIO
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """Метадані закешованого URL та шляхи до сирого й очищеного тіла."""
+
+    url: str
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+    raw_path: Path
+    text_path: Path
+
+    def read_text(self) -> str:
+        return self.text_path.read_text(encoding="utf-8")
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Заголовки для умовного запиту (If-None-Match / If-Modified-Since)."""
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class CacheWriter:
+    """
+    Інкрементальний запис запису кешу (для потокового режиму): сире тіло та
+    очищений текст пишуться у тимчасові файли й публікуються лише в commit().
+    """
+
+    def __init__(
+        self,
+        cache: HttpCache,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        self._cache = cache
+        self._url = url
+        self._etag = etag
+        self._last_modified = last_modified
+        fd_raw, self._raw_tmp = tempfile.mkstemp(dir=cache.root, suffix=".tmp")
+        fd_txt, self._txt_tmp = tempfile.mkstemp(dir=cache.root, suffix=".tmp")
+        self._raw: BinaryIO = os.fdopen(fd_raw, "wb")
+        self._txt: TextIO = os.fdopen(fd_txt, "w", encoding="utf-8")
+
+    def write_raw(self, data: bytes) -> None:
+        self._raw.write(data)
+
+    def write_text(self, text: str) -> None:
+        self._txt.write(text)
+
+    def commit(self) -> None:
+        self._raw.close()
+        self._txt.close()
+        self._cache._publish(
+            self._url, self._raw_tmp, self._txt_tmp, self._etag, self._last_modified
+        )
+
+    def abort(self) -> None:
+        self._raw.close()
+        self._txt.close()
+        for tmp in (self._raw_tmp, self._txt_tmp):
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+class HttpCache:
+    """
+    Дисковий кеш HTTP-відповідей, ключ — URL.
+    Для кожного URL зберігає сире тіло (<key>.raw), очищений текст (<key>.txt)
+    та метадані з ETag/Last-Modified (<key>.json).
+    Записи молодші за max_age секунд вважаються свіжими (без мережі); старші —
+    перевіряються умовним запитом. Понад max_bytes — видаляються найдавніше
+    використані (LRU за mtime файлу метаданих).
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_age: float = 0.0,
+    ) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, url: str) -> tuple[Path, Path, Path]:
+        key = self._key(url)
+        return (
+            self.root / f"{key}.json",
+            self.root / f"{key}.raw",
+            self.root / f"{key}.txt",
+        )
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        """Повертає запис для URL (і позначає його як використаний) або None."""
+        meta_path, raw_path, text_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or not text_path.exists():
+            return None
+        try:
+            os.utime(meta_path)  # LRU: позначка останнього використання
+        except OSError:
+            pass
+        return CacheEntry(
+            url=url,
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            stored_at=float(meta.get("stored_at", 0.0)),
+            raw_path=raw_path,
+            text_path=text_path,
+        )
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return time.time() - entry.stored_at < self.max_age
+
+    def revalidated(self, entry: CacheEntry) -> None:
+        """Сервер відповів 304 — оновлюємо час збереження, тіло лишається."""
+        self._write_meta(
+            entry.url, entry.etag, entry.last_modified, stored_at=time.time()
+        )
+
+    def store(
+        self,
+        url: str,
+        raw: bytes,
+        text: str,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        writer = self.writer(url, etag, last_modified)
+        try:
+            writer.write_raw(raw)
+            writer.write_text(text)
+        except BaseException:
+            writer.abort()
+            raise
+        writer.commit()
+
+    def writer(
+        self, url: str, etag: str | None, last_modified: str | None
+    ) -> CacheWriter:
+        return CacheWriter(self, url, etag, last_modified)
+
+    def _write_meta(
+        self,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        stored_at: float,
+    ) -> None:
+        meta_path, _, _ = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": stored_at,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    def _publish(
+        self,
+        url: str,
+        raw_tmp: str,
+        text_tmp: str,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        _, raw_path, text_path = self._paths(url)
+        with self._lock:
+            os.replace(raw_tmp, raw_path)
+            os.replace(text_tmp, text_path)
+            self._write_meta(url, etag, last_modified, stored_at=time.time())
+            self._evict()
+
+    def _evict(self) -> None:
+        """Видаляє найдавніше використані записи, доки кеш не вміститься в max_bytes."""
+        entries: list[tuple[float, int, Path]] = []
+        total = 0
+        for meta_path in self.root.glob("*.json"):
+            key = meta_path.stem
+            try:
+                used_at = meta_path.stat().st_mtime
+                size = sum(
+                    p.stat().st_size
+                    for p in (self.root / f"{key}.raw", self.root / f"{key}.txt")
+                    if p.exists()
+                )
+            except OSError:
+                continue
+            entries.append((used_at, size, meta_path))
+            total += size
+
+        entries.sort()
+        for _, size, meta_path in entries:
+            if total <= self.max_bytes:
+                break
+            key = meta_path.stem
+            for p in (meta_path, self.root / f"{key}.raw", self.root / f"{key}.txt"):
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+            total -= size
@@ -1,23 +1,67 @@
 from __future__ import annotations
 
 import argparse
+import time
+from collections import Counter
+from contextlib import nullcontext
 from pathlib import Path
 import sys
+from typing import Callable, Iterable, Iterator
 
-from .fetch import get_text, FetchError
-from .mapreduce import mapreduce_count
+from ..common.metrics import LiveLine, profiled, write_metrics
+from .cache import HttpCache
+from .corpus import Corpus, CorpusError, compile_corpus, load_corpus, read_chunks
+from .fetch import (
+    get_text,
+    iter_text,
+    iter_texts,
+    FetchError,
+    FetchResult,
+    FetchStats,
+)
+from .files import expand_paths
+from .mapreduce import (
+    BACKENDS,
+    EXECUTORS,
+    MapReduceStats,
+    NGramCounts,
+    TopCounts,
+    approx_words_files,
+    approx_words_stream,
+    count_cooccurrence,
+    count_ngrams,
+    count_words,
+    count_words_files,
+    count_words_stream,
+    load_stop_words,
+    top_words,
+    top_words_numpy,
+)
+from .sketch import HeavyHitters
+from .snapshot import SnapshotError, load_snapshot, merge_snapshot, save_snapshot
 from .visualize import visualize_top_words
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="wordcount-mr",
-        description="Завантаження тексту за URL, підрахунок частот слів (MapReduce) та візуалізація TOP-N.",
+        description="Завантаження тексту за URL або з диска, підрахунок частот слів (MapReduce) та візуалізація TOP-N.",
     )
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
         "--url",
-        required=True,
-        help="URL джерела тексту для аналізу.",
+        action="append",
+        help="URL джерела тексту для аналізу (можна вказати кілька разів).",
+    )
+    source.add_argument(
+        "--url-file",
+        type=Path,
+        help="Файл зі списком URL, по одному в рядок (порожні рядки та # ігноруються).",
+    )
+    source.add_argument(
+        "--path",
+        nargs="+",
+        help="Локальні файли, директорії (рекурсивно) або glob-шаблони (UTF-8 текст).",
     )
     parser.add_argument(
         "--top",
@@ -25,11 +69,115 @@ def build_parser() -> argparse.ArgumentParser:
         default=20,
         help="Скільки найчастіших слів показати (за замовчуванням 20).",
     )
+    parser.add_argument(
+        "--ngram",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Рахувати n-грами з N слів поспіль у межах документа замість "
+        "окремих слів (за замовчуванням 1).",
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=0,
+        metavar="W",
+        help="Рахувати спільну появу: пари різних слів на відстані до W слів "
+        "(без урахування порядку). За замовчуванням 0 — вимкнено.",
+    )
     parser.add_argument(
         "--threads",
         type=int,
         default=8,
-        help="Кількість потоків для Map/Reduce (за замовчуванням 8).",
+        help="Кількість потоків/процесів для Map/Reduce (за замовчуванням 8).",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=EXECUTORS,
+        default="thread",
+        help="Бекенд Map-фази: thread (ThreadPoolExecutor) або process "
+        "(ProcessPoolExecutor, масштабується по ядрах). За замовчуванням thread.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="python",
+        help="Реалізація підрахунку: python (Counter, MapReduce) або numpy "
+        "(векторизовано, лише для одного URL без --stream/--approx/--snapshot).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Потокова обробка: текст завантажується шматками й рахується "
+        "інкрементально (пам'ять не залежить від розміру джерела).",
+    )
+    parser.add_argument(
+        "--fetch-workers",
+        type=int,
+        default=8,
+        help="Кількість одночасних завантажень для кількох URL (за замовчуванням 8).",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=4,
+        help="Максимум одночасних запитів до одного хоста (за замовчуванням 4).",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="(Необов’язково) директорія дискового HTTP-кешу (ETag/Last-Modified, LRU).",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=512,
+        help="Максимальний розмір кешу в МБ (за замовчуванням 512).",
+    )
+    parser.add_argument(
+        "--cache-max-age",
+        type=float,
+        default=0.0,
+        help="Скільки секунд запис вважається свіжим без перевірки на сервері "
+        "(за замовчуванням 0 — завжди умовний запит).",
+    )
+    parser.add_argument(
+        "--approx",
+        action="store_true",
+        help="Наближений TOP-N зі сталою пам'яттю (heavy hitters, Misra–Gries/Space-Saving).",
+    )
+    parser.add_argument(
+        "--approx-error",
+        type=float,
+        default=0.0001,
+        help="Допустима похибка для --approx як частка від кількості слів "
+        "(за замовчуванням 0.0001 → до 10000 лічильників).",
+    )
+    parser.add_argument(
+        "--snapshot",
+        type=Path,
+        help="Файл знімка повних частот (бінарний). З джерелом — зберегти в нього "
+        "результат; без джерела — лише показати TOP-N зі знімка.",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Разом із --snapshot: порахувати лише нові джерела (дельту) і додати "
+        "їх до наявного знімка замість перезапису.",
+    )
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        help="Файл скомпільованого корпусу (словник + масив uint32 ID токенів). "
+        "З джерелом — один раз токенізувати й записати; без джерела — рахувати "
+        "з корпусу (bincount по ID, без завантаження й токенізації).",
+    )
+    parser.add_argument(
+        "--docs",
+        nargs="+",
+        metavar="PATTERN",
+        help="Разом із --corpus: рахувати лише документи, назви яких (шлях або "
+        "URL) відповідають glob-шаблонам.",
     )
     parser.add_argument(
         "--stop-words",
@@ -42,6 +190,34 @@ def build_parser() -> argparse.ArgumentParser:
         default=Path("data/output/top_words.png"),
         help="(Необов’язково) куди зберегти графік TOP-N слів (PNG).",
     )
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        metavar="PATH",
+        help="Записати звіт запуску в JSON: час завантаження й очищення HTML, "
+        "токенізації, Map (p50/p95/max задачі, перекіс шматків) і Reduce.",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Рядок прогресу в stderr (документи, задачі Map/Reduce), "
+        "що оновлюється на місці.",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="PATH",
+        help="Профілювати завантаження й підрахунок cProfile і зберегти "
+        "статистику в PATH (для pstats/snakeviz).",
+    )
+    parser.add_argument(
+        "--tracemalloc",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Відстежувати пам'ять tracemalloc: пік і N найбільших місць "
+        "алокацій — у звіт --metrics-json (за замовчуванням 0 — вимкнено).",
+    )
     parser.add_argument(
         "--no-plot",
         action="store_true",
@@ -60,24 +236,181 @@ def _print_table(items: list[tuple[str, int]]) -> None:
         print(f"   {word.ljust(w)}  {cnt}")
 
 
+def _read_url_file(path: Path) -> list[str]:
+    with open(path, encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def _iter_documents(
+    results: Iterable[FetchResult], failures: list[FetchResult]
+) -> Iterator[str]:
+    """Віддає тексти документів по мірі завантаження; збої збирає в failures."""
+    for res in results:
+        if res.error is not None:
+            print(f"Помилка завантаження: {res.error}", file=sys.stderr)
+            failures.append(res)
+            continue
+        # Перенос рядка — щоб слова сусідніх документів не злипалися
+        yield res.text + "\n"
+
+
+def _corpus_documents(
+    files: list[Path],
+    urls: list[str],
+    stream: bool,
+    failures: list[FetchResult],
+    fetch_workers: int,
+    per_host: int,
+    cache: HttpCache | None,
+    stats: FetchStats,
+) -> Iterator[tuple[str, Iterable[str]]]:
+    """Документи для компіляції --corpus: (шлях або URL, текст шматками)."""
+    for path in files:
+        yield str(path), read_chunks(path)
+    if len(urls) == 1:
+        if stream:
+            yield urls[0], iter_text(urls[0], cache=cache, stats=stats)
+        else:
+            yield urls[0], [get_text(urls[0], cache=cache, stats=stats)]
+    elif urls:
+        results = iter_texts(
+            urls, workers=fetch_workers, per_host=per_host, cache=cache, stats=stats
+        )
+        for res in results:
+            if res.error is not None:
+                print(f"Помилка завантаження: {res.error}", file=sys.stderr)
+                failures.append(res)
+                continue
+            yield res.url, [res.text]
+
+
+def _apply_snapshot(
+    counts: Counter[str], path: Path, has_input: bool, merge: bool
+) -> Counter[str]:
+    """Зберігає, доповнює дельтою або (без джерела) читає знімок частот."""
+    try:
+        if not has_input:
+            return load_snapshot(path)
+        if merge:
+            return merge_snapshot(counts, path)
+        save_snapshot(counts, path)
+        return counts
+    except OSError as e:
+        raise SnapshotError(str(e)) from e
+
+
+def _live_line(
+    stats: MapReduceStats, fetch_stats: FetchStats, started: float
+) -> Callable[[], str]:
+    def render() -> str:
+        elapsed = time.perf_counter() - started
+        return (
+            f"docs={fetch_stats.documents}, "
+            f"{fetch_stats.bytes / 2**20:.1f} MiB, "
+            f"map={len(stats.map_task_seconds)}/{stats.map_tasks}, "
+            f"reduce={stats.reduce_tasks}, {elapsed:.1f}s"
+        )
+
+    return render
+
+
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
 
-    url: str = args.url
+    urls: list[str] = list(args.url or [])
+    path_specs: list[str] | None = args.path
     top_n: int = args.top
     threads: int = args.threads
+    executor: str = args.executor
+    stream: bool = args.stream
+    backend: str = args.backend
     stop_words_path: Path | None = args.stop_words
     figure_path: Path = args.figure
     no_plot: bool = args.no_plot
+    fetch_workers: int = args.fetch_workers
+    per_host: int = args.per_host
+    metrics_json: Path | None = args.metrics_json
+
+    snapshot_path: Path | None = args.snapshot
+    corpus_path: Path | None = args.corpus
+    merge: bool = args.merge
+    approx_error: float | None = args.approx_error if args.approx else None
+    has_input = bool(urls or path_specs or args.url_file)
 
     # Базові валідації
+    if not has_input and snapshot_path is None and corpus_path is None:
+        parser.error(
+            "Вкажіть джерело: --url, --url-file, --path, --snapshot або --corpus."
+        )
+    if merge and snapshot_path is None:
+        parser.error("--merge потребує --snapshot.")
+    if corpus_path is not None and (
+        snapshot_path is not None or approx_error is not None or backend == "numpy"
+    ):
+        parser.error("--corpus несумісний із --snapshot, --approx та --backend numpy.")
+    if args.docs and corpus_path is None:
+        parser.error("--docs потребує --corpus.")
+    if args.ngram < 1 or args.window < 0:
+        parser.error("--ngram має бути >= 1, а --window — >= 0.")
+    if args.ngram > 1 and args.window:
+        parser.error("--ngram і --window — різні режими, вкажіть один.")
+    ngram_mode = args.ngram > 1 or args.window > 0
+    if ngram_mode and (
+        stream
+        or approx_error is not None
+        or snapshot_path is not None
+        or corpus_path is not None
+        or backend == "numpy"
+    ):
+        parser.error(
+            "--ngram/--window несумісні з --stream, --approx, --snapshot, "
+            "--corpus та --backend numpy."
+        )
+    if approx_error is not None:
+        if snapshot_path is not None:
+            parser.error(
+                "--approx несумісний із --snapshot (знімок зберігає точні частоти)."
+            )
+        if not 0 < approx_error < 1:
+            parser.error("--approx-error має бути в інтервалі (0, 1).")
+    if not has_input and snapshot_path is not None and not snapshot_path.exists():
+        parser.error(f"Файл знімка не знайдено: {snapshot_path}")
+    if not has_input and corpus_path is not None and not corpus_path.exists():
+        parser.error(f"Файл корпусу не знайдено: {corpus_path}")
     if top_n <= 0:
         parser.error("--top має бути додатнім цілим числом.")
     if threads <= 0:
         parser.error("--threads має бути додатнім цілим числом.")
+    if fetch_workers <= 0 or per_host <= 0:
+        parser.error(
+            "--fetch-workers та --per-host мають бути додатніми цілими числами."
+        )
+    if args.tracemalloc < 0:
+        parser.error("--tracemalloc має бути >= 0.")
     if stop_words_path is not None and not stop_words_path.exists():
         parser.error(f"Файл стоп-слів не знайдено: {stop_words_path}")
+    if args.cache_max_mb <= 0 or args.cache_max_age < 0:
+        parser.error("--cache-max-mb має бути додатнім, --cache-max-age — невід’ємним.")
+    if args.url_file is not None:
+        if not args.url_file.exists():
+            parser.error(f"Файл зі списком URL не знайдено: {args.url_file}")
+        urls = _read_url_file(args.url_file)
+        if not urls:
+            parser.error(f"Файл зі списком URL порожній: {args.url_file}")
+    # Після --url-file: усі джерела вже відомі
+    if stream and path_specs:
+        parser.error(
+            "--stream стосується лише URL: файли --path і так читаються шматками."
+        )
+    if backend == "numpy" and (
+        len(urls) != 1 or stream or approx_error is not None or snapshot_path
+    ):
+        parser.error(
+            "--backend numpy підтримується лише для одного URL (--url або "
+            "--url-file) без --stream, --approx та --snapshot."
+        )
 
     # Папка для графіка
     try:
@@ -87,25 +420,313 @@ def main(argv: list[str] | None = None) -> int:
             f"Не вдалося створити директорію для фігури: {figure_path.parent}. Помилка: {e}"
         )
 
-    # 1) Завантажуємо і чистимо текст
+    cache: HttpCache | None = None
+    if args.cache_dir is not None:
+        try:
+            cache = HttpCache(
+                args.cache_dir,
+                max_bytes=args.cache_max_mb * 1024 * 1024,
+                max_age=args.cache_max_age,
+            )
+        except OSError as e:
+            parser.error(
+                f"Не вдалося створити --cache-dir: {args.cache_dir}. Помилка: {e}"
+            )
+
+    files: list[Path] = []
+    if path_specs:
+        try:
+            files = expand_paths(path_specs)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+
+    stop_words = load_stop_words(stop_words_path)
+    # Знімок зберігає частоти без фільтрації — стоп-слова застосовуємо при виводі
+    map_stop_words = set() if snapshot_path is not None else stop_words
+    # Без знімка словник не потрібен: кошики Reduce віддають лише свій TOP-N
+    reduce_top = None if snapshot_path is not None else top_n
+    failures: list[FetchResult] = []
+
+    # 1-2) Завантаження/очищення тексту + MapReduce-підрахунок
+    counts: Counter[str] = Counter()
+    reduced: Counter[str] | TopCounts | None = None
+    summary: HeavyHitters | None = None
+    top_items: list[tuple[str, int]] | None = None
+    corpus: Corpus | None = None
+    corpus_docs: list[int] | None = None
+    corpus_words = 0
+    grams: NGramCounts | None = None
+    stats = MapReduceStats()
+    fetch_stats = FetchStats()
+    report: dict[str, object] = {}
+    status = "error"
+    started = time.perf_counter()
+    live = (
+        LiveLine(_live_line(stats, fetch_stats, started))
+        if args.live
+        else nullcontext()
+    )
     try:
-        text = get_text(url)
+        with profiled(args.profile, args.tracemalloc) as report, live:
+            if corpus_path is not None:
+                # Компіляція (з джерелом) або запит: частоти — bincount по ID
+                if has_input:
+                    compile_corpus(
+                        _corpus_documents(
+                            files,
+                            urls,
+                            stream,
+                            failures,
+                            fetch_workers,
+                            per_host,
+                            cache,
+                            fetch_stats,
+                        ),
+                        corpus_path,
+                    )
+                corpus = load_corpus(corpus_path)
+                corpus_docs = corpus.select(args.docs) if args.docs else None
+                corpus_counts = corpus.counts(corpus_docs, stop_words)
+                corpus_words = int(corpus_counts.sum())
+                top_items = corpus.top(corpus_counts, top_n)
+            elif ngram_mode:
+                # Документи цілком: n-грами/пари не перетинають межу документа
+                documents: Iterable[str]
+                if path_specs:
+                    documents = (
+                        p.read_text(encoding="utf-8", errors="ignore") for p in files
+                    )
+                elif len(urls) > 1:
+                    documents = _iter_documents(
+                        iter_texts(
+                            urls,
+                            workers=fetch_workers,
+                            per_host=per_host,
+                            cache=cache,
+                            stats=fetch_stats,
+                        ),
+                        failures,
+                    )
+                else:
+                    documents = [get_text(urls[0], cache=cache, stats=fetch_stats)]
+                if args.window:
+                    grams = count_cooccurrence(
+                        documents,
+                        args.window,
+                        threads,
+                        map_stop_words,
+                        executor,
+                        stats=stats,
+                    )
+                else:
+                    grams = count_ngrams(
+                        documents,
+                        args.ngram,
+                        threads,
+                        map_stop_words,
+                        executor,
+                        stats=stats,
+                    )
+                joiner = " ~ " if args.window else " "
+                top_items = [
+                    (joiner.join(words), cnt) for words, cnt in grams.most_common(top_n)
+                ]
+            elif path_specs and approx_error is not None:
+                summary = approx_words_files(
+                    files, approx_error, threads, map_stop_words, executor
+                )
+            elif path_specs:
+                reduced = count_words_files(
+                    files,
+                    threads,
+                    map_stop_words,
+                    executor,
+                    stats=stats,
+                    top_n=reduce_top,
+                )
+            elif urls:
+                text_chunks: Iterable[str] | None = None
+                text = ""
+                if len(urls) > 1:
+                    # Кілька URL: кожен документ іде в MapReduce одразу після завантаження
+                    text_chunks = _iter_documents(
+                        iter_texts(
+                            urls,
+                            workers=fetch_workers,
+                            per_host=per_host,
+                            cache=cache,
+                            stats=fetch_stats,
+                        ),
+                        failures,
+                    )
+                elif stream:
+                    text_chunks = iter_text(urls[0], cache=cache, stats=fetch_stats)
+                else:
+                    text = get_text(urls[0], cache=cache, stats=fetch_stats)
+
+                if approx_error is not None:
+                    summary = approx_words_stream(
+                        text_chunks if text_chunks is not None else [text],
+                        approx_error,
+                        threads,
+                        map_stop_words,
+                        executor,
+                    )
+                elif backend == "numpy":
+                    top_items = top_words_numpy(text, top_n, stop_words)
+                elif text_chunks is not None:
+                    reduced = count_words_stream(
+                        text_chunks,
+                        threads,
+                        map_stop_words,
+                        executor,
+                        stats=stats,
+                        top_n=reduce_top,
+                    )
+                else:
+                    reduced = count_words(
+                        text,
+                        threads,
+                        map_stop_words,
+                        executor,
+                        stats=stats,
+                        top_n=reduce_top,
+                    )
+        if not (failures and len(failures) == len(urls)):
+            if summary is not None:
+                counts = summary.counts
+            elif isinstance(reduced, TopCounts):
+                top_items = reduced.items
+            elif reduced is not None:
+                counts = reduced
+            # 2b) Знімок: зберегти, доповнити дельтою або просто прочитати
+            if snapshot_path is not None:
+                counts = _apply_snapshot(counts, snapshot_path, has_input, merge)
+            status = "ok"
     except FetchError as e:
         print(f"Помилка завантаження: {e}", file=sys.stderr)
+    except CorpusError as e:
+        print(f"Помилка корпусу: {e}", file=sys.stderr)
+    except SnapshotError as e:
+        print(f"Помилка знімка: {e}", file=sys.stderr)
+    finally:
+        wall_seconds = time.perf_counter() - started
+        if metrics_json is not None:
+            write_metrics(
+                metrics_json,
+                {
+                    "tool": "wordcount-mr",
+                    "status": status,
+                    "params": {
+                        "sources": len(urls) or len(files),
+                        "threads": threads,
+                        "executor": executor,
+                        "backend": backend,
+                        "stream": stream,
+                        "approx": approx_error is not None,
+                    },
+                    "wall_seconds": wall_seconds,
+                    "words": (
+                        summary.total
+                        if summary is not None
+                        else (
+                            reduced.total
+                            if isinstance(reduced, TopCounts)
+                            else sum(counts.values())
+                        )
+                    ),
+                    "unique_words": (
+                        reduced.unique
+                        if isinstance(reduced, TopCounts)
+                        else len(counts)
+                    ),
+                    "corpus": (
+                        {
+                            "mode": "compile" if has_input else "read",
+                            "documents": corpus.documents,
+                            "selected_documents": (
+                                len(corpus_docs)
+                                if corpus_docs is not None
+                                else corpus.documents
+                            ),
+                            "tokens": corpus.token_count(corpus_docs),
+                            "vocabulary": corpus.vocab_size,
+                            "words": corpus_words,
+                        }
+                        if corpus is not None
+                        else None
+                    ),
+                    "ngrams": (
+                        {
+                            "n": args.ngram,
+                            "window": args.window,
+                            "total": sum(grams.counts.values()),
+                            "unique": len(grams.counts),
+                        }
+                        if grams is not None
+                        else None
+                    ),
+                    "fetch": fetch_stats.to_dict(),
+                    **stats.to_dict(),
+                    **report,
+                },
+            )
+    if status != "ok":
         return 2
 
-    # 2) MapReduce-підрахунок
-    top_items = mapreduce_count(
-        text=text,
-        threads=threads,
-        stop_words_path=stop_words_path,
-        top_n=top_n,
-    )
+    if top_items is None:
+        top_items = top_words(counts, top_n, stop_words)
 
     # 3) Вивід у консоль
     print("✅ Аналіз завершено.")
-    print(f"   URL:        {url}")
+    if len(urls) == 1:
+        print(f"   URL:        {urls[0]}")
+    elif urls:
+        print(f"   URLS:       {len(urls)} (помилок: {len(failures)})")
+    elif path_specs:
+        print(f"   PATH:       {', '.join(path_specs)} ({len(files)} файл(ів))")
+    if grams is not None:
+        label = (
+            f"WINDOW:     {args.window} (пар"
+            if args.window
+            else f"NGRAM:      {args.ngram} (n-грам"
+        )
+        print(
+            f"   {label}: {sum(grams.counts.values())}, "
+            f"унікальних: {len(grams.counts)})"
+        )
+    if corpus is not None:
+        selected = len(corpus_docs) if corpus_docs is not None else corpus.documents
+        print(
+            f"   CORPUS:     {corpus_path} ({'compile' if has_input else 'read'}, "
+            f"документів: {selected}/{corpus.documents}, "
+            f"токенів: {corpus.token_count(corpus_docs)}, "
+            f"слів у словнику: {corpus.vocab_size})"
+        )
+    if snapshot_path is not None:
+        mode = "merge" if merge else ("write" if has_input else "read")
+        print(
+            f"   SNAPSHOT:   {snapshot_path} ({mode}, слів у словнику: {len(counts)})"
+        )
     print(f"   THREADS:    {threads}")
+    print(f"   EXECUTOR:   {executor}")
+    print(f"   BACKEND:    {backend}")
+    print(f"   STREAM:     {stream}")
+    if stats.map_tasks:
+        print(f"   MAP:        {stats.map_tasks} задач, {stats.map_seconds:.2f} с")
+        print(
+            f"   REDUCE:     {stats.reduce_tasks} задач, {stats.partitions} "
+            f"кошик(ів), {stats.reduce_seconds:.2f} с після Map "
+            f"(сумарно {stats.reduce_cpu_seconds:.2f} с)"
+        )
+    if summary is not None:
+        print(
+            f"   APPROX:     ε={approx_error}, k={summary.k}, слів: {summary.total}, "
+            f"оцінки занижені не більше ніж на {summary.error}"
+        )
+    print(f"   TIME:       {wall_seconds:.2f} с")
+    if metrics_json is not None:
+        print(f"   METRICS:    {metrics_json}")
     print(f"   STOP-WORDS: {stop_words_path if stop_words_path else '-'}")
     print(f"   TOP-N:      {top_n}")
     _print_table(top_items)
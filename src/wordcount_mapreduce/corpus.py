@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from functools import partial
+from pathlib import Path
+from typing import Final, Iterable, Iterator
+
+from .mapreduce import DEFAULT_BATCH_CHARS, _iter_word_safe, _tokenize
+
+try:  # необов'язкова залежність: читання корпусу (memmap + bincount)
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+_MAGIC: Final[bytes] = b"WCCORP1\0"
+# magic, токенів, слів у словнику, документів, байтів словника, байтів назв
+_HEADER = struct.Struct("<8sQQQQQ")
+_ALIGN = 8
+_MAX_WORDS = 1 << 32  # ID токена — uint32
+_COUNT_BLOCK = 1 << 24  # токенів на один bincount (тимчасовий int64-масив ≤ 128 МБ)
+
+
+class CorpusError(RuntimeError):
+    """Пошкоджений або несумісний файл скомпільованого корпусу."""
+
+
+def _padded(size: int) -> int:
+    return -(-size // _ALIGN) * _ALIGN
+
+
+def _sections(
+    n_tokens: int, n_words: int, n_docs: int, vocab_bytes: int, names_bytes: int
+) -> dict[str, int]:
+    """Зміщення секцій файлу (кожна вирівняна на 8 байтів) і загальний розмір."""
+    sizes = (
+        ("tokens", 4 * n_tokens),  # uint32 ID слів у порядку тексту
+        ("doc_ends", 8 * (n_docs + 1)),  # uint64 межі документів у tokens
+        ("word_offsets", 8 * (n_words + 1)),  # uint64 межі слів у vocab
+        ("order", 4 * n_words),  # uint32 ID слів в алфавітному порядку
+        ("name_offsets", 8 * (n_docs + 1)),  # uint64 межі назв у names
+        ("vocab", vocab_bytes),  # UTF-8 слова підряд, ID — за першою появою
+        ("names", names_bytes),  # UTF-8 назви документів (шлях або URL)
+    )
+    offsets: dict[str, int] = {}
+    pos = _HEADER.size
+    for name, size in sizes:
+        offsets[name] = pos
+        pos += _padded(size)
+    offsets["end"] = pos
+    return offsets
+
+
+def _write(f, values: array) -> None:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    values.tofile(f)
+
+
+def _pad(f) -> None:
+    f.write(b"\0" * (_padded(f.tell()) - f.tell()))
+
+
+def _blob(strings: list[str]) -> tuple[bytes, array]:
+    """Рядки підряд в UTF-8 і межі кожного (offsets[i]..offsets[i + 1])."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = array("Q", [0])
+    total = 0
+    for b in encoded:
+        total += len(b)
+        offsets.append(total)
+    return b"".join(encoded), offsets
+
+
+def read_chunks(path: Path, chunk_chars: int = DEFAULT_BATCH_CHARS) -> Iterator[str]:
+    """Текст файлу (UTF-8) шматками — для compile_corpus без читання файлу цілком."""
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        yield from iter(partial(f.read, chunk_chars), "")
+
+
+def compile_corpus(
+    documents: Iterable[tuple[str, Iterable[str]]],
+    path: Path,
+    batch_chars: int = DEFAULT_BATCH_CHARS,
+) -> Path:
+    """
+    Токенізує документи (назва, текст шматками) один раз і зберігає корпус:
+    масив uint32 ID токенів (little-endian, придатний для memmap), межі
+    документів, словник (ID — за першою появою слова) з алфавітним індексом
+    і назви документів. Токенізація та сама, що в count_words; стоп-слова
+    не відкидаються — їх застосовує запит. ID пишуться на диск пакетами,
+    тож у пам'яті лише словник. Запис атомарний: тимчасовий файл + os.replace.
+    """
+    ids: dict[str, int] = {}
+    names: list[str] = []
+    doc_ends = array("Q", [0])
+    n_tokens = 0
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.seek(_HEADER.size)
+            for name, chunks in documents:
+                for batch in _iter_word_safe(chunks, batch_chars):
+                    tokens = array(
+                        "I", [ids.setdefault(w, len(ids)) for w in _tokenize(batch)]
+                    )
+                    if len(ids) > _MAX_WORDS:
+                        raise CorpusError("Словник корпусу перевищує 2**32 слів")
+                    _write(f, tokens)
+                    n_tokens += len(tokens)
+                names.append(name)
+                doc_ends.append(n_tokens)
+
+            words = list(ids)  # порядок вставки = ID
+            vocab, word_offsets = _blob(words)
+            names_blob, name_offsets = _blob(names)
+            order = array("I", sorted(range(len(words)), key=words.__getitem__))
+            for section in (doc_ends, word_offsets, order, name_offsets):
+                _pad(f)
+                _write(f, section)
+            _pad(f)
+            f.write(vocab)
+            _pad(f)
+            f.write(names_blob)
+            _pad(f)
+            f.seek(0)
+            f.write(
+                _HEADER.pack(
+                    _MAGIC,
+                    n_tokens,
+                    len(words),
+                    len(names),
+                    len(vocab),
+                    len(names_blob),
+                )
+            )
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+class Corpus:
+    """
+    Скомпільований корпус, відображений у пам'ять (np.memmap): відкриття не
+    читає токени, лише заголовок, тож запит коштує мілісекунди плюс bincount.
+    Стоп-слова — булева маска над ID (пошук у алфавітному індексі), рядки
+    декодуються лише для фінальних TOP-N.
+    """
+
+    def __init__(self, path: Path) -> None:
+        if np is None:
+            raise RuntimeError("--corpus потребує пакет numpy (pip install numpy)")
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            header = f.read(_HEADER.size)
+            size = os.fstat(f.fileno()).st_size
+        if len(header) != _HEADER.size:
+            raise CorpusError(f"Обрізаний заголовок корпусу: {path}")
+        magic, n_tokens, n_words, n_docs, vocab_bytes, names_bytes = _HEADER.unpack(
+            header
+        )
+        if magic != _MAGIC:
+            raise CorpusError(f"Невідомий формат корпусу: {path}")
+        at = _sections(n_tokens, n_words, n_docs, vocab_bytes, names_bytes)
+        if size < at["end"]:
+            raise CorpusError(f"Обрізаний файл корпусу: {path}")
+
+        mm = np.memmap(self.path, dtype=np.uint8, mode="r")
+
+        def section(name: str, dtype: str, count: int) -> np.ndarray:
+            start = at[name]
+            return mm[start : start + count * np.dtype(dtype).itemsize].view(dtype)
+
+        self.tokens = section("tokens", "<u4", n_tokens)
+        self.doc_ends = section("doc_ends", "<u8", n_docs + 1)
+        self._word_offsets = section("word_offsets", "<u8", n_words + 1)
+        self._order = section("order", "<u4", n_words)
+        self._name_offsets = section("name_offsets", "<u8", n_docs + 1)
+        self._vocab = section("vocab", "u1", vocab_bytes)
+        self._names = section("names", "u1", names_bytes)
+        self.vocab_size = n_words
+        self.documents = n_docs
+
+    def word(self, word_id: int) -> str:
+        lo, hi = self._word_offsets[word_id : word_id + 2].tolist()
+        return self._vocab[lo:hi].tobytes().decode("utf-8")
+
+    def name(self, doc: int) -> str:
+        lo, hi = self._name_offsets[doc : doc + 2].tolist()
+        return self._names[lo:hi].tobytes().decode("utf-8")
+
+    def word_id(self, word: str) -> int | None:
+        """ID слова бінарним пошуком в алфавітному індексі (None — немає в корпусі)."""
+
+        def key(k: int) -> str:
+            return self.word(int(self._order[k]))
+
+        k = bisect_left(range(self.vocab_size), word, key=key)
+        if k < self.vocab_size and key(k) == word:
+            return int(self._order[k])
+        return None
+
+    def select(self, patterns: Iterable[str]) -> list[int]:
+        """Номери документів, назви яких відповідають хоч одному glob-шаблону."""
+        patterns = list(patterns)
+        return [
+            doc
+            for doc in range(self.documents)
+            if any(fnmatch.fnmatchcase(self.name(doc), p) for p in patterns)
+        ]
+
+    def token_count(self, docs: Iterable[int] | None = None) -> int:
+        if docs is None:
+            return len(self.tokens)
+        return sum(int(self.doc_ends[d + 1] - self.doc_ends[d]) for d in docs)
+
+    def counts(
+        self, docs: Iterable[int] | None = None, stop_words: Iterable[str] = ()
+    ) -> np.ndarray:
+        """
+        Частоти всіх ID (int64, довжина — словник) через bincount по всьому
+        масиву токенів або лише по діапазонах документів docs; частоти
+        стоп-слів обнуляються маскою.
+        """
+        ranges = (
+            [(0, len(self.tokens))]
+            if docs is None
+            else [(int(self.doc_ends[d]), int(self.doc_ends[d + 1])) for d in docs]
+        )
+        total = np.zeros(self.vocab_size, dtype=np.int64)
+        for lo, hi in ranges:
+            for start in range(lo, hi, _COUNT_BLOCK):
+                block = self.tokens[start : min(hi, start + _COUNT_BLOCK)]
+                total += np.bincount(block, minlength=self.vocab_size)
+        total[self.stop_mask(stop_words)] = 0
+        return total
+
+    def stop_mask(self, stop_words: Iterable[str]) -> np.ndarray:
+        mask = np.zeros(self.vocab_size, dtype=bool)
+        found = [i for i in map(self.word_id, stop_words) if i is not None]
+        mask[found] = True
+        return mask
+
+    def top(self, counts: np.ndarray, top_n: int) -> list[tuple[str, int]]:
+        """
+        TOP-N за частотами з counts; рівні частоти — за першою появою слова
+        (ID), як у Counter.most_common для того ж тексту.
+        """
+        top_n = min(top_n, int(np.count_nonzero(counts)))
+        if top_n <= 0:
+            return []
+        threshold = np.partition(counts, len(counts) - top_n)[-top_n]
+        ids = np.flatnonzero(counts >= threshold)
+        ids = ids[np.lexsort((ids, -counts[ids]))][:top_n]
+        return [(self.word(i), int(counts[i])) for i in ids.tolist()]
+
+
+def load_corpus(path: Path) -> Corpus:
+    """Відкриває корпус, збережений compile_corpus. Підіймає CorpusError на невідповідність."""
+    return Corpus(path)
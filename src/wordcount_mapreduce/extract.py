@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import re
+from html import unescape
+from typing import Final
+
+_SCRIPT_STYLE_OPEN_RE = re.compile(r"(?i)<(script|style)\b")
+_CLOSE_RE: Final[dict[str, re.Pattern[str]]] = {
+    "script": re.compile(r"(?i)</script\s*>"),
+    "style": re.compile(r"(?i)</style\s*>"),
+}
+# Скільки символів тримаємо в буфері всередині script/style, щоб не пропустити
+# закриваючий тег, розрізаний між шматками
+_CLOSE_TAIL: Final[int] = 64
+# Максимальна довжина незавершеної HTML-сутності в кінці шматка (&...;)
+_ENTITY_TAIL: Final[int] = 32
+# Максимальна довжина тегу разом з '<' і '>': довший незакритий '<' — звичайний
+# текст, тож хвіст між шматками не росте без меж
+_TAG_MAX: Final[int] = 8192
+
+
+class HtmlTextExtractor:
+    """
+    Інкрементальний HTML → plain-text за один прохід.
+    Стан: буфер незавершеного хвоста (тег, сутність, закриття script/style),
+    прапорець «всередині script/style» та пробіл на межі попереднього шматка.
+    Теги замінюються пробілом, вміст script/style відкидається, сутності
+    розшифровуються, пробіли схлопуються. Межі шукаються через str.find та
+    якірні регулярки, тож кожен символ входу переглядається один раз — без
+    квадратичного відкату на незакритих <script>. '<' без '>' у межах
+    _TAG_MAX символів вважається текстом, тож перенесений хвіст обмежений.
+
+    feed() повертає текст, готовий на цей момент; конкатенація всіх feed()
+    та close() дорівнює очищеному тексту всього документа.
+    """
+
+    def __init__(self) -> None:
+        self._buf = ""
+        self._closer: re.Pattern[str] | None = None
+        self._emitted = False
+        self._trailing_ws = False
+
+    def feed(self, chunk: str) -> str:
+        return self._process(self._buf + chunk, final=False)
+
+    def close(self) -> str:
+        buf, self._buf = self._buf, ""
+        return self._process(buf, final=True)
+
+    def _process(self, buf: str, final: bool) -> str:
+        out: list[str] = []
+        find = buf.find
+        n = len(buf)
+        pos = 0
+        while pos < n:
+            if self._closer is not None:
+                m = self._closer.search(buf, pos)
+                if m is None:
+                    # script/style ще триває: решту відкидаємо, лишаючи хвіст
+                    pos = n if final else max(pos, n - _CLOSE_TAIL)
+                    break
+                self._closer = None
+                out.append(" ")
+                pos = m.end()
+                continue
+
+            lt = find("<", pos)
+            if lt < 0:
+                end = n
+                amp = buf.rfind("&", pos)
+                if not final and amp >= 0 and n - amp < _ENTITY_TAIL:
+                    if find(";", amp) < 0:
+                        end = amp  # сутність може продовжитися в наступному шматку
+                out.append(buf[pos:end])
+                pos = end
+                break
+
+            out.append(buf[pos:lt])
+            gt = find(">", lt, lt + _TAG_MAX)
+            if gt < 0:
+                if not final and n - lt < _TAG_MAX:
+                    pos = lt  # тег може закритися в наступному шматку
+                    break
+                out.append("<")  # незакритий '<' — звичайний текст
+                pos = lt + 1
+                continue
+            if buf[lt + 1 : lt + 2] in ("s", "S"):
+                m = _SCRIPT_STYLE_OPEN_RE.match(buf, lt)
+                if m is not None:
+                    self._closer = _CLOSE_RE[m.group(1).lower()]
+            out.append(" ")
+            pos = gt + 1
+
+        self._buf = buf[pos:]
+        return self._collapse("".join(out))
+
+    def _collapse(self, text: str) -> str:
+        """Розшифровує сутності та схлопує пробіли з урахуванням межі шматків."""
+        if not text:
+            return ""
+        if "&" in text:
+            text = unescape(text)
+        words = text.split()
+        if not words:
+            self._trailing_ws = True
+            return ""
+        collapsed = " ".join(words)
+        if self._emitted and (self._trailing_ws or text[0].isspace()):
+            collapsed = " " + collapsed
+        self._emitted = True
+        self._trailing_ws = text[-1].isspace()
+        return collapsed
+
+
+def strip_html(html: str) -> str:
+    """Очищує HTML-документ цілком (обгортка над HtmlTextExtractor)."""
+    extractor = HtmlTextExtractor()
+    return extractor.feed(html) + extractor.close()
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-import re
+import codecs
+import threading
 import time
-from html import unescape
-from typing import Final
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Final, Iterable, Iterator
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 from http.client import IncompleteRead
 
+from .cache import HttpCache
+from .extract import HtmlTextExtractor, strip_html
 
 _UA: Final[str] = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -16,43 +25,146 @@ _UA: Final[str] = (
     "Chrome/120.0.0.0 Safari/537.36"
 )
 
-_TAG_RE = re.compile(r"(?s)<[^>]+>")
-_SCRIPT_STYLE_RE = re.compile(r"(?is)<(script|style)\b.*?>.*?</\1>")
-_WS_RE = re.compile(r"\s+")
+DEFAULT_CHUNK_SIZE: Final[int] = 64 * 1024
 
 
 class FetchError(RuntimeError):
     """Невдача під час отримання або попередньої обробки тексту."""
 
 
+@dataclass(frozen=True)
+class FetchResult:
+    """Результат пакетного завантаження одного URL: текст або помилка."""
+
+    url: str
+    text: str = ""
+    error: FetchError | None = None
+
+
+@dataclass
+class FetchStats:
+    """
+    Таймери отримання тексту (заповнюються на місці; потокобезпечно — пакетне
+    завантаження пише з кількох потоків, тож час сумується по потоках).
+    fetch — мережа/читання кешу (з ретраями), strip — очищення HTML.
+    """
+
+    documents: int = 0
+    cache_hits: int = 0
+    bytes: int = 0  # сирих байтів із мережі
+    fetch_seconds: float = 0.0
+    strip_seconds: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(
+        self,
+        fetch_seconds: float = 0.0,
+        strip_seconds: float = 0.0,
+        nbytes: int = 0,
+        documents: int = 0,
+        cache_hit: bool = False,
+    ) -> None:
+        with self._lock:
+            self.fetch_seconds += fetch_seconds
+            self.strip_seconds += strip_seconds
+            self.bytes += nbytes
+            self.documents += documents
+            self.cache_hits += cache_hit
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "documents": self.documents,
+            "cache_hits": self.cache_hits,
+            "bytes": self.bytes,
+            "fetch_seconds": self.fetch_seconds,
+            "strip_seconds": self.strip_seconds,
+        }
+
+
+def make_session(pool_size: int = 16) -> requests.Session:
+    """
+    Створює requests.Session з пулом keep-alive з'єднань: повторні запити
+    до того ж хоста не роблять нового TCP/TLS-рукостискання.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = _UA
+    return session
+
+
 def _strip_html(html: str) -> str:
-    # Прибираємо script/style, потім усі теги, розшифровуємо HTML-сутності та нормалізуємо пробіли.
-    no_scripts = _SCRIPT_STYLE_RE.sub(" ", html)
-    no_tags = _TAG_RE.sub(" ", no_scripts)
-    text = unescape(no_tags)
-    return _WS_RE.sub(" ", text).strip()
+    # Однопрохідне очищення: script/style, теги, HTML-сутності та пробіли — див. extract.py
+    return strip_html(html).strip()
 
 
-def get_text(url: str, timeout: float = 30.0, retries: int = 3, backoff: float = 0.7) -> str:
+def get_text(
+    url: str,
+    timeout: float = 30.0,
+    retries: int = 3,
+    backoff: float = 0.7,
+    session: requests.Session | None = None,
+    cache: HttpCache | None = None,
+    stats: FetchStats | None = None,
+) -> str:
     """
     Завантажує HTML/текст із URL і повертає очищений plain-text.
     Має прості ретраї на випадок тимчасових мережевих збоїв.
+    Якщо передано session — використовує її пул з'єднань.
+    Якщо передано cache — свіжий запис або відповідь 304 повертає вже очищений
+    текст з диска без завантаження й без _strip_html.
+    Час завантаження й очищення додається в stats.
     Підіймає FetchError у разі проблем.
     """
+    t0 = time.perf_counter()
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        text = entry.read_text()
+        if stats is not None:
+            stats.add(time.perf_counter() - t0, documents=1, cache_hit=True)
+        return text
+
+    headers = {"User-Agent": _UA}
+    if entry is not None:
+        headers.update(entry.conditional_headers())
+
+    http = session if session is not None else requests
     last_exc: Exception | None = None
     for attempt in range(1, retries + 1):
         try:
-            resp = requests.get(url, headers={"User-Agent": _UA}, timeout=timeout)
+            resp = http.get(url, headers=headers, timeout=timeout)
+            if resp.status_code == 304 and entry is not None:
+                cache.revalidated(entry)
+                text = entry.read_text()
+                if stats is not None:
+                    stats.add(time.perf_counter() - t0, documents=1, cache_hit=True)
+                return text
             resp.raise_for_status()
             ctype = (resp.headers.get("Content-Type") or "").lower()
             if "text" not in ctype and "json" not in ctype and "xml" not in ctype:
-                raise FetchError(f"Непідтримуваний Content-Type: {ctype or '—'} для {url}")
+                raise FetchError(
+                    f"Непідтримуваний Content-Type: {ctype or '—'} для {url}"
+                )
 
             # .text інколи може впасти на розірваному потоці — страхуємось через повтор
             raw = resp.text
+            t1 = time.perf_counter()
             cleaned = _strip_html(raw)
+            if stats is not None:
+                stats.add(
+                    t1 - t0, time.perf_counter() - t1, len(resp.content), documents=1
+                )
             if not cleaned:
                 raise FetchError(f"Порожній або нечитабельний контент за адресою {url}")
+            if cache is not None:
+                cache.store(
+                    url,
+                    resp.content,
+                    cleaned,
+                    resp.headers.get("ETag"),
+                    resp.headers.get("Last-Modified"),
+                )
             return cleaned
 
         except (RequestException, IncompleteRead) as e:
@@ -63,3 +175,193 @@ def get_text(url: str, timeout: float = 30.0, retries: int = 3, backoff: float =
             time.sleep(backoff * attempt)
 
     raise FetchError(f"Помилка мережі для {url}: {last_exc}")
+
+
+def iter_text(
+    url: str,
+    timeout: float = 30.0,
+    retries: int = 3,
+    backoff: float = 0.7,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    session: requests.Session | None = None,
+    cache: HttpCache | None = None,
+    stats: FetchStats | None = None,
+) -> Iterator[str]:
+    """
+    Потокове завантаження: повертає очищений текст шматками по мірі надходження
+    (resp.iter_content), не тримаючи в пам'яті весь документ.
+    Ретраї — лише на етапі з'єднання; збій посеред потоку дає FetchError.
+    З cache: свіжий запис/304 читається з диска, а нове тіло пишеться в кеш
+    паралельно зі стримінгом (теж шматками).
+    У stats — лише час самого отримання й очищення, без часу споживача
+    між шматками.
+    """
+    stats = stats if stats is not None else FetchStats()
+    t0 = time.perf_counter()
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        stats.add(time.perf_counter() - t0, documents=1, cache_hit=True)
+        yield from _iter_cached_text(entry.text_path, chunk_size, stats)
+        return
+
+    headers = {"User-Agent": _UA}
+    if entry is not None:
+        headers.update(entry.conditional_headers())
+
+    http = session if session is not None else requests
+    resp = None
+    last_exc: Exception | None = None
+    for attempt in range(1, retries + 1):
+        try:
+            resp = http.get(url, headers=headers, timeout=timeout, stream=True)
+            if resp.status_code == 304 and entry is not None:
+                resp.close()
+                cache.revalidated(entry)
+                stats.add(time.perf_counter() - t0, documents=1, cache_hit=True)
+                yield from _iter_cached_text(entry.text_path, chunk_size, stats)
+                return
+            resp.raise_for_status()
+            break
+        except RequestException as e:
+            last_exc = e
+            resp = None
+            if attempt == retries:
+                break
+            time.sleep(backoff * attempt)
+    if resp is None:
+        raise FetchError(f"Помилка мережі для {url}: {last_exc}")
+    stats.add(time.perf_counter() - t0, documents=1)
+
+    with resp:
+        ctype = (resp.headers.get("Content-Type") or "").lower()
+        if "text" not in ctype and "json" not in ctype and "xml" not in ctype:
+            raise FetchError(f"Непідтримуваний Content-Type: {ctype or '—'} для {url}")
+
+        decoder = codecs.getincrementaldecoder(resp.encoding or "utf-8")(
+            errors="replace"
+        )
+        extractor = HtmlTextExtractor()
+        writer = (
+            cache.writer(
+                url, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+            )
+            if cache is not None
+            else None
+        )
+        try:
+            body = resp.iter_content(chunk_size=chunk_size)
+            while True:
+                t0 = time.perf_counter()
+                raw = next(body, None)
+                if raw is None:
+                    break
+                t1 = time.perf_counter()
+                cleaned = extractor.feed(decoder.decode(raw))
+                stats.add(t1 - t0, time.perf_counter() - t1, len(raw))
+                if writer is not None:
+                    writer.write_raw(raw)
+                    writer.write_text(cleaned)
+                if cleaned:
+                    yield cleaned
+            tail = extractor.feed(decoder.decode(b"", final=True)) + extractor.close()
+            if writer is not None:
+                writer.write_text(tail)
+                writer.commit()
+                writer = None
+        except (RequestException, IncompleteRead) as e:
+            raise FetchError(f"Обрив потоку для {url}: {e}") from e
+        finally:
+            if writer is not None:
+                writer.abort()
+        if tail:
+            yield tail
+
+
+def _iter_cached_text(path: Path, chunk_size: int, stats: FetchStats) -> Iterator[str]:
+    """Читає закешований очищений текст шматками."""
+    with open(path, encoding="utf-8") as f:
+        while True:
+            t0 = time.perf_counter()
+            chunk = f.read(chunk_size)
+            stats.add(time.perf_counter() - t0)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _interleave_by_host(urls: Iterable[str]) -> list[str]:
+    """Перемішує URL по колу між хостами, щоб один хост не займав усі потоки."""
+    queues: dict[str, deque[str]] = defaultdict(deque)
+    for url in urls:
+        queues[urlsplit(url).netloc].append(url)
+    ordered: list[str] = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].popleft())
+            if not queues[host]:
+                del queues[host]
+    return ordered
+
+
+def iter_texts(
+    urls: Iterable[str],
+    workers: int = 8,
+    per_host: int = 4,
+    timeout: float = 30.0,
+    retries: int = 3,
+    backoff: float = 0.7,
+    cache: HttpCache | None = None,
+    stats: FetchStats | None = None,
+) -> Iterator[FetchResult]:
+    """
+    Пакетне завантаження: потоки зі спільною Session (пул з'єднань) та
+    обмеженням одночасних запитів на хост. Повертає FetchResult у порядку
+    готовності — кожен документ можна обробляти, не чекаючи решти.
+    У пулі одночасно не більше 2 × workers задач: наступний URL подається,
+    коли попередній завершився, тож готові, але ще не спожиті тексти не
+    накопичуються в пам'яті, а закритий генератор не тягне решту списку.
+    Помилки окремих URL не зупиняють пакет, а повертаються в FetchResult.error.
+    """
+    ordered = _interleave_by_host(dict.fromkeys(urls))
+    if not ordered:
+        return
+    limits: dict[str, threading.BoundedSemaphore] = defaultdict(
+        lambda: threading.BoundedSemaphore(max(1, per_host))
+    )
+    for url in ordered:
+        limits[urlsplit(url).netloc]  # створюємо заздалегідь — без гонок у потоках
+
+    def _fetch(session: requests.Session, url: str) -> FetchResult:
+        with limits[urlsplit(url).netloc]:
+            try:
+                text = get_text(
+                    url,
+                    timeout,
+                    retries,
+                    backoff,
+                    session=session,
+                    cache=cache,
+                    stats=stats,
+                )
+            except FetchError as e:
+                return FetchResult(url=url, error=e)
+        return FetchResult(url=url, text=text)
+
+    workers = max(1, min(workers, len(ordered)))
+    with make_session(pool_size=workers) as session:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            todo = iter(ordered)
+            pending: set[Future[FetchResult]] = {
+                pool.submit(_fetch, session, url) for url in islice(todo, 2 * workers)
+            }
+            try:
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        url = next(todo, None)
+                        if url is not None:  # дозаповнюємо вікно до yield
+                            pending.add(pool.submit(_fetch, session, url))
+                        yield fut.result()
+            finally:
+                for fut in pending:
+                    fut.cancel()
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import glob
+from pathlib import Path
+from typing import Iterable
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def expand_paths(specs: Iterable[str | Path]) -> list[Path]:
+    """
+    Розгортає аргументи --path у список файлів: файл береться як є, директорія
+    обходиться рекурсивно, шаблон (*, ?, [...], **) розгортається через glob.
+    Дублікати відкидаються, порядок — стабільний.
+    Підіймає FileNotFoundError, якщо аргумент нічого не знайшов.
+    """
+    result: list[Path] = []
+    seen: set[Path] = set()
+    for spec in specs:
+        spec_str = str(spec)
+        if _GLOB_CHARS & set(spec_str):
+            found = [Path(p) for p in sorted(glob.glob(spec_str, recursive=True))]
+        else:
+            found = [Path(spec_str)] if Path(spec_str).exists() else []
+
+        files: list[Path] = []
+        for p in found:
+            if p.is_dir():
+                files.extend(sorted(f for f in p.rglob("*") if f.is_file()))
+            elif p.is_file():
+                files.append(p)
+        if not found:
+            raise FileNotFoundError(f"Нічого не знайдено за шляхом: {spec_str}")
+
+        for f in files:
+            if f not in seen:
+                seen.add(f)
+                result.append(f)
+    return result
@@ -1,12 +1,99 @@
 from __future__ import annotations
 
+import heapq
+import mmap
+import os
+import pickle
 import re
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import tempfile
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Iterable, Iterator, List, Mapping, TypeVar, Union
+
+from .sketch import HeavyHitters
+
+try:  # необов'язкова залежність: лише для backend="numpy"
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+Reducible = Union[Counter[str], HeavyHitters]
+R = TypeVar("R", Counter[str], HeavyHitters)
 
 _WORD_RE = re.compile(r"[a-zA-Zа-яА-ЯёЁїЇіІєЄґҐ']+")
+_WORD_CHAR_RE = re.compile(r"[a-zA-Zа-яА-ЯёЁїЇіІєЄґҐ']")
+_NON_WORD_CHAR_RE = re.compile(r"[^a-zA-Zа-яА-ЯёЁїЇіІєЄґҐ']")
+_WS_BYTES_RE = re.compile(rb"\s")
+
+EXECUTORS = ("thread", "process")
+BACKENDS = ("python", "numpy")
+DEFAULT_BATCH_CHARS = 1 << 20
+DEFAULT_RANGE_BYTES = 8 << 20
+DEFAULT_FAN_IN = 8
+
+
+@dataclass
+class MapReduceStats:
+    """Лічильники та час фаз одного запуску MapReduce (заповнюються на місці)."""
+
+    map_tasks: int = 0
+    reduce_tasks: int = 0
+    partitions: int = 0
+    map_seconds: float = 0.0  # wall-час від старту до завершення останнього Map
+    reduce_seconds: float = 0.0  # wall-час від кінця Map до готового результату
+    reduce_cpu_seconds: float = 0.0  # сумарний час задач Reduce (частина — під час Map)
+    # токенізація в головному потоці (count_words, thread)
+    tokenize_seconds: float = 0.0
+    map_task_seconds: list[float] = field(default_factory=list)  # час кожної задачі Map
+
+    def map_skew(self) -> float:
+        """Перекіс шматків: найдовша задача Map / медіанна (1.0 — рівномірно)."""
+        times = sorted(self.map_task_seconds)
+        if not times or times[len(times) // 2] <= 0:
+            return 0.0
+        return times[-1] / times[len(times) // 2]
+
+    def to_dict(self) -> dict[str, object]:
+        times = sorted(self.map_task_seconds)
+
+        def pct(q: float) -> float:
+            return (
+                times[min(len(times) - 1, int(q / 100 * len(times)))] if times else 0.0
+            )
+
+        return {
+            "tokenize_seconds": self.tokenize_seconds,
+            "map": {
+                "tasks": self.map_tasks,
+                "seconds": self.map_seconds,
+                "task_seconds": {"p50": pct(50), "p95": pct(95), "max": pct(100)},
+                "skew": self.map_skew(),
+            },
+            "reduce": {
+                "tasks": self.reduce_tasks,
+                "partitions": self.partitions,
+                "seconds": self.reduce_seconds,
+                "cpu_seconds": self.reduce_cpu_seconds,
+            },
+        }
 
 
 def _tokenize(text: str) -> list[str]:
@@ -14,7 +101,9 @@ def _tokenize(text: str) -> list[str]:
     return [w.lower() for w in _WORD_RE.findall(text)]
 
 
-def _map_chunk_tokens(words: list[str], stop_words: set[str]) -> Counter[str]:
+def _map_chunk_tokens(
+    words: list[str], stop_words: set[str] | frozenset[str]
+) -> Counter[str]:
     """Map: підрахунок слів у одному шматку (список уже-токенізованих слів)."""
     if stop_words:
         words = [w for w in words if w not in stop_words]
@@ -34,39 +123,1082 @@ def _split_tokens(words: list[str], parts: int) -> list[list[str]]:
     return [c for c in chunks if c]  # без порожніх
 
 
+def _split_byte_ranges(data: bytes | mmap.mmap, parts: int) -> list[tuple[int, int]]:
+    """
+    Ділить байтовий буфер на parts (≈ рівних) діапазонів [start, end).
+    Межу зсуваємо до найближчого пробільного символу, тож слово (і багатобайтовий
+    UTF-8 символ) ніколи не розрізається між двома діапазонами.
+    """
+    n = len(data)
+    if n == 0:
+        return []
+    step = max(1, n // max(1, parts))
+    ranges: list[tuple[int, int]] = []
+    start = 0
+    while start < n:
+        end = min(n, start + step)
+        if end < n:
+            m = _WS_BYTES_RE.search(data, end)
+            end = m.end() if m else n
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def _map_chunk_bytes(data: bytes, stop_words: frozenset[str]) -> Counter[str]:
+    """
+    Map для процесного бекенду: сам воркер декодує, токенізує й рахує шматок.
+    Повертає лише часткові частоти — їх і пересилаємо назад у головний процес.
+    """
+    return _map_chunk_text(data.decode("utf-8", errors="ignore"), stop_words)
+
+
+def _map_chunk_text(text: str, stop_words: frozenset[str]) -> Counter[str]:
+    """Map для потокового режиму: токенізація + підрахунок одного шматка тексту."""
+    return _map_chunk_tokens(_tokenize(text), stop_words)
+
+
+def _iter_word_safe(chunks: Iterable[str], batch_chars: int) -> Iterator[str]:
+    """
+    Перепаковує потік шматків у пакети ≈ batch_chars символів, що закінчуються
+    на межі слова: дрібні шматки склеюються, великі — ріжуться.
+    Незавершене слово в кінці шматка переноситься далі.
+    """
+    parts: list[str] = []
+    size = 0
+    carry = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf = carry + chunk
+        i = len(buf)
+        while i > 0 and _WORD_CHAR_RE.match(buf, i - 1):
+            i -= 1
+        carry = buf[i:]
+        start = 0
+        while i - start >= batch_chars - size:
+            m = _NON_WORD_CHAR_RE.search(buf, start + batch_chars - size, i)
+            cut = m.end() if m else i
+            parts.append(buf[start:cut])
+            yield "".join(parts)
+            parts, size = [], 0
+            start = cut
+        if start < i:
+            parts.append(buf[start:i])
+            size += i - start
+    if carry:
+        parts.append(carry)
+    if parts:
+        yield "".join(parts)
+
+
+def _plan_file_ranges(
+    paths: Iterable[Path], max_range_bytes: int
+) -> Iterator[tuple[Path, int, int]]:
+    """
+    Планує задачі Map для файлів: (path, start, end).
+    Файл до max_range_bytes — одна задача; більший відображається через mmap
+    і ділиться на діапазони по межах пробілів (сторінки читаються лише біля меж).
+    """
+    for path in paths:
+        size = path.stat().st_size
+        if size == 0:
+            continue
+        if size <= max_range_bytes:
+            yield path, 0, size
+            continue
+        parts = -(-size // max_range_bytes)
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                ranges = _split_byte_ranges(mm, parts)
+        for start, end in ranges:
+            yield path, start, end
+
+
+def _map_file_range(
+    path: str, start: int, end: int, stop_words: frozenset[str]
+) -> Counter[str]:
+    """Map для локальних файлів: читає байти [start, end) через mmap і рахує слова."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[start:end]
+    return _map_chunk_bytes(data, stop_words)
+
+
+def _map_summary(
+    fn: Callable[..., Counter[str]], k: int, *args: object
+) -> HeavyHitters:
+    """Map для --approx: точні частоти шматка стискаються до підсумку з k слів."""
+    return HeavyHitters.from_counts(fn(*args), k)
+
+
+def _reduce_bounded(
+    pool: Executor,
+    fn: Callable[..., Reducible],
+    args_iter: Iterable[tuple],
+    max_pending: int,
+    total: R,
+) -> R:
+    """
+    Подає задачі Map у пул, тримаючи в роботі не більше max_pending, і зливає
+    часткові результати в total (Counter або HeavyHitters) по мірі готовності.
+    """
+    pending: set[Future[Reducible]] = set()
+    for args in args_iter:
+        if len(pending) >= max_pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                total.update(fut.result())
+        pending.add(pool.submit(fn, *args))
+    for fut in as_completed(pending):
+        total.update(fut.result())
+    return total
+
+
+def _map_reduce(
+    executor: str,
+    threads: int,
+    fn: Callable[..., Reducible],
+    args_iter: Iterable[tuple],
+    total: R,
+) -> R:
+    """Запускає Map у пулі потоків/процесів з обмеженою чергою та Reduce у total."""
+    _check_executor(executor)
+    workers = max(1, threads)
+    pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_cls(max_workers=workers) as pool:
+        return _reduce_bounded(pool, fn, args_iter, 2 * workers, total)
+
+
+def _bucket(key: str | int, partitions: int) -> int:
+    if isinstance(key, int):  # упакована n-грама: ID однакові в усіх процесах
+        return key % partitions
+    return zlib.crc32(key.encode("utf-8")) % partitions
+
+
+# Частка кошика: частоти і номери першої появи слів (task_id << 32 | позиція
+# в частотах задачі) — у тому ж порядку, що й ключі Counter
+_Part = tuple[Counter, array]
+# TOP-N кошика: (-частота, перша поява, слово), відсортований за зростанням
+_Top = list[tuple[int, int, str]]
+
+
+@dataclass
+class TopCounts:
+    """
+    Результат Reduce з top_n: TOP-N, злитий k-way з TOP-N кожного кошика, і
+    підсумки кошиків. Повний словник у викликача не збирається.
+    """
+
+    items: list[tuple[str, int]]
+    total: int  # усього слів
+    unique: int  # різних слів
+
+
+def _map_partitioned(
+    fn: Callable[..., Counter[str]], partitions: int, task_id: int, *args: object
+) -> list[_Part]:
+    """
+    Map + розбиття на боці воркера: часткові частоти розкладаються по partitions
+    кошиках за стабільним хешем слова (crc32 — однаковий у всіх процесах).
+    Кожне слово несе номер своєї першої появи, тож після Reduce рівні частоти
+    впорядковуються так само, як у послідовному підрахунку.
+    """
+    counts = fn(*args)
+    base = task_id << 32
+    if partitions == 1:
+        return [(counts, array("Q", range(base, base + len(counts))))]
+    buckets: list[_Part] = [(Counter(), array("Q")) for _ in range(partitions)]
+    for pos, (word, cnt) in enumerate(counts.items()):
+        part, firsts = buckets[_bucket(word, partitions)]
+        part[word] = cnt
+        firsts.append(base | pos)
+    return buckets
+
+
+def _merge_part(into: _Part, other: _Part) -> None:
+    """
+    Зливає other у into. other — з пізніших задач Map, тож нові слова
+    дописуються в кінець і порядок ключів лишається порядком першої появи.
+    """
+    counts, firsts = into
+    if not counts:
+        counts.update(other[0])
+        firsts.extend(other[1])
+        return
+    for (word, cnt), first in zip(other[0].items(), other[1]):
+        old = counts.get(word)
+        if old is None:
+            counts[word] = cnt
+            firsts.append(first)
+        else:
+            counts[word] = old + cnt
+
+
+def _part_top(part: _Part, top_n: int) -> tuple[_Top, int, int]:
+    """
+    Reduce-сторона TOP-N: купа по одному кошику (рівні частоти — за першою
+    появою) плюс його підсумки (усього слів, різних слів).
+    """
+    counts, firsts = part
+    best = heapq.nlargest(top_n, zip(counts.items(), firsts), key=_entry_count)
+    top = [(-cnt, first, word) for (word, cnt), first in best]
+    return top, sum(counts.values()), len(counts)
+
+
+def _entry_count(entry: tuple[tuple[str, int], int]) -> int:
+    return entry[0][1]
+
+
+def _merge_tops(tops: list[tuple[_Top, int, int]], top_n: int) -> TopCounts:
+    """k-way злиття відсортованих TOP-N кошиків (слова кошиків не перетинаються)."""
+    merged = heapq.merge(*(top for top, _, _ in tops))
+    return TopCounts(
+        [(word, -neg) for neg, _, word in islice(merged, max(0, top_n))],
+        sum(total for _, total, _ in tops),
+        sum(unique for _, _, unique in tops),
+    )
+
+
+def _part_counts(parts: Iterable[_Part]) -> Counter:
+    """Повний Counter з кошиків: k-way злиття за першою появою слова."""
+    parts = [part for part in parts if part[0]]
+    if len(parts) == 1:
+        return parts[0][0]
+    total: Counter = Counter()
+    merged = heapq.merge(*(zip(firsts, counts.items()) for counts, firsts in parts))
+    dict.update(total, (item for _, item in merged))  # ключі не перетинаються
+    return total
+
+
+class _PartitionReducer:
+    """
+    Кошик Reduce пулу потоків: частки задач Map зливаються строго в порядку
+    task_id (ті, що прийшли раніше за чергу, чекають у _waiting — не більше
+    вікна подачі). Зливає потік, що приніс чергову частку, під локом кошика:
+    різні кошики зливаються одночасно, головний потік у Reduce не бере участі.
+    """
+
+    def __init__(self) -> None:
+        self.part: _Part = (Counter(), array("Q"))
+        self._lock = threading.Lock()
+        self._next = 0
+        self._waiting: dict[int, _Part] = {}
+
+    def add(self, task_id: int, part: _Part) -> int:
+        """Віддає частку задачі task_id; повертає, скільки часток злито зараз."""
+        merged = 0
+        with self._lock:
+            self._waiting[task_id] = part
+            while self._next in self._waiting:
+                ready = self._waiting.pop(self._next)
+                self._next += 1
+                if ready[0]:
+                    _merge_part(self.part, ready)
+                    merged += 1
+        return merged
+
+
+def _map_reduce_task(
+    fn: Callable[..., Counter[str]],
+    reducers: list[_PartitionReducer],
+    task_id: int,
+    *args: object,
+) -> tuple[float, float, int]:
+    """
+    Задача пулу потоків: Map шматка й злиття його часток у кошики.
+    Повертає (час Map, час Reduce, кількість злиттів).
+    """
+    t0 = time.perf_counter()
+    parts = _map_partitioned(fn, len(reducers), task_id, *args)
+    t1 = time.perf_counter()
+    merged = sum(r.add(task_id, part) for r, part in zip(reducers, parts))
+    return t1 - t0, time.perf_counter() - t1, merged
+
+
+def _dump_part(part: _Part, path: str) -> None:
+    with open(path, "wb") as f:
+        pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_part(path: str) -> _Part:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _map_shuffle(
+    fn: Callable[..., Counter[str]],
+    partitions: int,
+    shuffle_dir: str,
+    task_id: int,
+    *args: object,
+) -> tuple[float, list[tuple[int, str]]]:
+    """
+    Map-задача процесного бекенду: рахує шматок, розбиває частоти на кошики
+    і пише кожен кошик у файл shuffle-директорії. Назад у головний процес
+    повертаються лише шляхи (і тривалість задачі) — самі частоти через нього
+    не проходять.
+    """
+    t0 = time.perf_counter()
+    out: list[tuple[int, str]] = []
+    for r, part in enumerate(_map_partitioned(fn, partitions, task_id, *args)):
+        if part[0]:
+            path = os.path.join(shuffle_dir, f"m{task_id}-p{r}.pkl")
+            _dump_part(part, path)
+            out.append((r, path))
+    return time.perf_counter() - t0, out
+
+
+def _reduce_shuffle(paths: list[str], out_path: str) -> float:
+    """Reduce одного кошика: зливає файли сусідніх задач (у їх порядку) в out_path."""
+    t0 = time.perf_counter()
+    merged = _load_part(paths[0])
+    for p in paths[1:]:
+        _merge_part(merged, _load_part(p))
+    _dump_part(merged, out_path)
+    for p in paths:
+        os.unlink(p)
+    return time.perf_counter() - t0
+
+
+def _top_shuffle(path: str, top_n: int) -> tuple[float, tuple[_Top, int, int]]:
+    """TOP-N готового кошика — у воркері, до головного процесу йде лише він."""
+    t0 = time.perf_counter()
+    result = _part_top(_load_part(path), top_n)
+    return time.perf_counter() - t0, result
+
+
+class _Runs:
+    """
+    Файли одного кошика процесного Reduce як відрізки задач [lo, hi): зливати
+    можна лише сусідні відрізки і лише в порядку задач — тоді порядок ключів
+    лишається порядком першої появи. Відрізок без слів (path=None) просто
+    розширює сусіда. Елемент — [lo, hi, path, busy]; busy — файл ще зливається.
+    """
+
+    def __init__(self) -> None:
+        self.runs: list[list] = []
+
+    def add(self, task_id: int, path: str | None) -> None:
+        runs = self.runs
+        i = bisect_left(runs, task_id, key=itemgetter(0))
+        runs.insert(i, [task_id, task_id + 1, path, False])
+        i = 0
+        while i + 1 < len(runs):
+            a, b = runs[i], runs[i + 1]
+            if a[1] == b[0] and (a[2] is None or b[2] is None):
+                keep = b if a[2] is None else a
+                keep[0], keep[1] = a[0], b[1]
+                runs[i : i + 2] = [keep]
+            else:
+                i += 1
+
+    def take(self, fan_in: int, final: bool) -> list[tuple[list[str], list]]:
+        """
+        Групи сусідніх готових файлів для злиття — по fan_in (наприкінці
+        достатньо двох). Група одразу замінюється відрізком-результатом.
+        """
+        runs = self.runs
+        groups: list[tuple[list[str], list]] = []
+        i = 0
+        while i < len(runs):
+            j = i
+            while (
+                j < len(runs)
+                and j - i < fan_in
+                and runs[j][2] is not None
+                and not runs[j][3]
+                and (j == i or runs[j - 1][1] == runs[j][0])
+            ):
+                j += 1
+            if j - i >= fan_in or (final and j - i >= 2):
+                run = [runs[i][0], runs[j - 1][1], "", True]
+                groups.append(([r[2] for r in runs[i:j]], run))
+                runs[i:j] = [run]
+                i += 1
+            else:
+                i = max(j, i + 1)
+        return groups
+
+    def paths(self) -> list[str]:
+        return [run[2] for run in self.runs if run[2] is not None]
+
+
+def _map_reduce_counts(
+    executor: str,
+    threads: int,
+    fn: Callable[..., Counter[str]],
+    args_iter: Iterable[tuple],
+    stats: MapReduceStats | None = None,
+    partitions: int | None = None,
+    fan_in: int = DEFAULT_FAN_IN,
+    top_n: int | None = None,
+) -> Counter | TopCounts:
+    """
+    Точний MapReduce із замірами фаз у stats.
+
+    Reduce розбитий на partitions кошиків за хешем слова (кожен кошик володіє
+    непересічною частиною словника) і йде паралельно з Map:
+
+    executor="thread": задача пулу після Map сама зливає свої частки в кошики
+    (_PartitionReducer, лок на кошик), тож головний потік лише подає задачі.
+    GIL і тут серіалізує байткод злиття, але воно розподілене між потоками
+    пулу й не чекає на головний потік; для злиття на всіх ядрах — process.
+
+    executor="process": справжній shuffle. Map-воркер пише кошики у тимчасові
+    файли, а Reduce — дерево по кожному кошику: щойно накопичується fan_in
+    файлів сусідніх задач, їх злиття йде окремою задачею в той самий пул
+    процесів, паралельно з Map та іншими кошиками.
+
+    top_n — кожен кошик віддає лише свій TOP-N (у процесах — прямо у воркері),
+    а головний потік зливає їх k-way і повертає TopCounts: повний словник не
+    збирається ніде. Без top_n — повний Counter, зібраний з кошиків k-way за
+    першою появою. В обох випадках рівні частоти впорядковані за першою
+    появою, як у Counter.most_common послідовного підрахунку.
+    """
+    _check_executor(executor)
+    workers = max(1, threads)
+    stats = stats if stats is not None else MapReduceStats()
+    partitions = max(1, partitions or workers)
+    stats.partitions = partitions
+    t0 = time.perf_counter()
+
+    if executor == "thread":
+        reducers = [_PartitionReducer() for _ in range(partitions)]
+        pending: deque[Future[tuple[float, float, int]]] = deque()
+
+        def absorb(fut: Future[tuple[float, float, int]]) -> None:
+            map_elapsed, reduce_elapsed, merged = fut.result()
+            stats.map_task_seconds.append(map_elapsed)
+            stats.reduce_cpu_seconds += reduce_elapsed
+            stats.reduce_tasks += merged
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            task = partial(_map_reduce_task, fn, reducers)
+            for task_id, args in enumerate(args_iter):
+                if len(pending) >= 2 * workers:
+                    absorb(pending.popleft())
+                pending.append(pool.submit(task, task_id, *args))
+                stats.map_tasks += 1
+            while pending:
+                absorb(pending.popleft())
+            stats.map_seconds = time.perf_counter() - t0
+            parts = [r.part for r in reducers]
+            if top_n is not None:
+                tops = list(pool.map(partial(_part_top, top_n=top_n), parts))
+        stats.reduce_seconds = time.perf_counter() - t0 - stats.map_seconds
+        return _merge_tops(tops, top_n) if top_n is not None else _part_counts(parts)
+
+    fan_in = max(2, fan_in)
+    buckets = [_Runs() for _ in range(partitions)]
+    mapping: set[Future[tuple[float, list[tuple[int, str]]]]] = set()
+    map_ids: dict[Future, int] = {}
+    reducing: dict[Future[float], list] = {}
+
+    with tempfile.TemporaryDirectory(prefix="wc-shuffle-") as shuffle_dir:
+        map_fn = partial(_map_shuffle, fn, partitions, shuffle_dir)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+
+            def collect(done: Iterable[Future], final: bool) -> None:
+                for fut in done:
+                    if fut in mapping:
+                        mapping.discard(fut)
+                        task_id = map_ids.pop(fut)
+                        elapsed, parts = fut.result()
+                        stats.map_task_seconds.append(elapsed)
+                        paths = dict(parts)
+                        for r, runs in enumerate(buckets):
+                            runs.add(task_id, paths.get(r))
+                    else:
+                        run = reducing.pop(fut)
+                        stats.reduce_cpu_seconds += fut.result()
+                        run[3] = False
+                for r, runs in enumerate(buckets):
+                    for paths, run in runs.take(fan_in, final):
+                        run[2] = os.path.join(
+                            shuffle_dir, f"r{stats.reduce_tasks}-p{r}.pkl"
+                        )
+                        reducing[pool.submit(_reduce_shuffle, paths, run[2])] = run
+                        stats.reduce_tasks += 1
+
+            for task_id, args in enumerate(args_iter):
+                while len(mapping) >= 2 * workers:
+                    done, _ = wait(
+                        mapping | reducing.keys(), return_when=FIRST_COMPLETED
+                    )
+                    collect(done, final=False)
+                fut = pool.submit(map_fn, task_id, *args)
+                mapping.add(fut)
+                map_ids[fut] = task_id
+                stats.map_tasks += 1
+            while mapping:
+                done, _ = wait(mapping | reducing.keys(), return_when=FIRST_COMPLETED)
+                collect(done, final=False)
+            stats.map_seconds = time.perf_counter() - t0
+
+            collect((), final=True)
+            while reducing:
+                done, _ = wait(reducing.keys(), return_when=FIRST_COMPLETED)
+                collect(done, final=True)
+
+            finals = [path for runs in buckets for path in runs.paths()]
+            if top_n is not None:
+                tops = []
+                for elapsed, top in pool.map(
+                    partial(_top_shuffle, top_n=top_n), finals
+                ):
+                    stats.reduce_cpu_seconds += elapsed
+                    tops.append(top)
+
+        result = (
+            _merge_tops(tops, top_n)
+            if top_n is not None
+            else _part_counts(_load_part(path) for path in finals)
+        )
+
+    stats.reduce_seconds = time.perf_counter() - t0 - stats.map_seconds
+    return result
+
+
+def _stream_tasks(
+    chunks: Iterable[str], batch_chars: int, stop_words: frozenset[str]
+) -> Iterator[tuple[str, frozenset[str]]]:
+    for batch in _iter_word_safe(chunks, batch_chars):
+        yield batch, stop_words
+
+
+def _file_tasks(
+    paths: Iterable[Path], max_range_bytes: int, stop_words: frozenset[str]
+) -> Iterator[tuple[str, int, int, frozenset[str]]]:
+    for path, start, end in _plan_file_ranges(paths, max_range_bytes):
+        yield str(path), start, end, stop_words
+
+
+def load_stop_words(stop_words_path: Path | None) -> set[str]:
+    """Читає стоп-слова (по одному в рядок) у нижньому регістрі."""
+    if not stop_words_path or not stop_words_path.exists():
+        return set()
+    with open(stop_words_path, encoding="utf-8") as f:
+        return {w.strip().lower() for w in f if w.strip()}
+
+
+def _check_executor(executor: str) -> None:
+    if executor not in EXECUTORS:
+        raise ValueError(f"Невідомий executor: {executor!r} (очікується {EXECUTORS})")
+
+
+def count_words(
+    text: str,
+    threads: int = 8,
+    stop_words: Iterable[str] = (),
+    executor: str = "thread",
+    stats: MapReduceStats | None = None,
+    top_n: int | None = None,
+) -> Counter[str] | TopCounts:
+    """
+    MapReduce-підрахунок слів у тексті; повертає повний Counter (весь словник),
+    а з top_n — лише TopCounts (TOP-N і підсумки, без словника у викликача).
+    executor="thread" — токенізація в головному потоці, Map у ThreadPoolExecutor;
+    executor="process" — текст ділиться на байтові діапазони, які токенізують
+    і рахують окремі процеси (масштабується по ядрах, без GIL).
+    Reduce — див. _map_reduce_counts; час фаз пишеться в stats.
+    """
+    _check_executor(executor)
+    workers = max(1, threads)
+    frozen = frozenset(stop_words)
+    stats = stats if stats is not None else MapReduceStats()
+
+    if executor == "process":
+        data = text.encode("utf-8")
+        tasks: Iterable[tuple] = (
+            (data[start:end], frozen)
+            for start, end in _split_byte_ranges(data, workers)
+        )
+        return _map_reduce_counts(
+            executor, workers, _map_chunk_bytes, tasks, stats, top_n=top_n
+        )
+
+    # Токенізуємо один раз і ділимо список токенів між потоками
+    t0 = time.perf_counter()
+    tokens = _tokenize(text)
+    stats.tokenize_seconds += time.perf_counter() - t0
+    chunks = _split_tokens(tokens, workers)
+    tasks = ((chunk, frozen) for chunk in chunks)
+    return _map_reduce_counts(
+        executor, workers, _map_chunk_tokens, tasks, stats, top_n=top_n
+    )
+
+
+def count_words_stream(
+    chunks: Iterable[str],
+    threads: int = 8,
+    stop_words: Iterable[str] = (),
+    executor: str = "thread",
+    batch_chars: int = DEFAULT_BATCH_CHARS,
+    stats: MapReduceStats | None = None,
+    top_n: int | None = None,
+) -> Counter[str] | TopCounts:
+    """
+    Потоковий MapReduce: шматки тексту зшиваються по межах слів у пакети,
+    пакети йдуть у Map одразу, а часткові частоти зливаються в Reduce по мірі
+    готовності. Одночасно в роботі не більше 2×threads пакетів, тож пам'ять
+    ≈ O(threads × batch_chars + словник) незалежно від розміру джерела.
+    top_n — як у count_words.
+    """
+    tasks = _stream_tasks(chunks, batch_chars, frozenset(stop_words))
+    return _map_reduce_counts(
+        executor, threads, _map_chunk_text, tasks, stats, top_n=top_n
+    )
+
+
+def count_words_files(
+    paths: Iterable[Path],
+    threads: int = 8,
+    stop_words: Iterable[str] = (),
+    executor: str = "thread",
+    max_range_bytes: int = DEFAULT_RANGE_BYTES,
+    stats: MapReduceStats | None = None,
+    top_n: int | None = None,
+) -> Counter[str] | TopCounts:
+    """
+    MapReduce по локальних файлах (UTF-8 текст).
+    Дрібні файли — окремі задачі (шардинг файл-за-файлом), великі — діляться
+    на непересічні байтові діапазони по межах пробілів; воркер читає свій
+    діапазон через mmap, тож файл ніколи не копіюється в пам'ять цілком.
+    top_n — як у count_words.
+    """
+    tasks = _file_tasks(paths, max_range_bytes, frozenset(stop_words))
+    return _map_reduce_counts(
+        executor, threads, _map_file_range, tasks, stats, top_n=top_n
+    )
+
+
+def approx_words_stream(
+    chunks: Iterable[str],
+    epsilon: float,
+    threads: int = 8,
+    stop_words: Iterable[str] = (),
+    executor: str = "thread",
+    batch_chars: int = DEFAULT_BATCH_CHARS,
+) -> HeavyHitters:
+    """
+    Як count_words_stream, але кожен воркер повертає підсумок HeavyHitters
+    (≤ ⌈1/ε⌉ слів), а Reduce зливає підсумки — пам'ять не залежить від словника.
+    """
+    total = HeavyHitters.for_error(epsilon)
+    fn = partial(_map_summary, _map_chunk_text, total.k)
+    tasks = _stream_tasks(chunks, batch_chars, frozenset(stop_words))
+    return _map_reduce(executor, threads, fn, tasks, total)
+
+
+def approx_words_files(
+    paths: Iterable[Path],
+    epsilon: float,
+    threads: int = 8,
+    stop_words: Iterable[str] = (),
+    executor: str = "thread",
+    max_range_bytes: int = DEFAULT_RANGE_BYTES,
+) -> HeavyHitters:
+    """Наближений варіант count_words_files (див. approx_words_stream)."""
+    total = HeavyHitters.for_error(epsilon)
+    fn = partial(_map_summary, _map_file_range, total.k)
+    tasks = _file_tasks(paths, max_range_bytes, frozenset(stop_words))
+    return _map_reduce(executor, threads, fn, tasks, total)
+
+
+def _encode_tokens(
+    words: list[str], vocab: dict[str, int], stop_words: frozenset[str]
+) -> list[int]:
+    """Слова → ID словника (нові слова отримують наступний ID, стоп-слова — 0)."""
+    if stop_words:
+        return [
+            0 if w in stop_words else vocab.setdefault(w, len(vocab)) for w in words
+        ]
+    return [vocab.setdefault(w, len(vocab)) for w in words]
+
+
+def _split_windows(
+    ids: list[int], parts: int, overlap: int
+) -> Iterator[tuple[list[int], int]]:
+    """
+    Як _split_tokens, але кожен шматок захоплює ще overlap перших токенів
+    наступного: (шматок, own). Шматку належать лише n-грами/пари, що
+    починаються в його перших own токенах, тож на межах нічого не губиться
+    й не рахується двічі.
+    """
+    n = len(ids)
+    step = max(1, n // max(1, parts))
+    for start in range(0, n, step):
+        yield ids[start : start + step + overlap], min(step, n - start)
+
+
+def _map_ngrams(ids: list[int], own: int, n: int, bits: int) -> Counter[int]:
+    """
+    Map для --ngram: n-грами, що починаються в перших own токенах шматка,
+    упаковані в int (id1 << bits*(n-1) | ... | idn). n-грами зі стоп-словом
+    чи через межу документа (ID 0) відкидаються.
+    """
+    m = min(own, len(ids) - n + 1)
+    if m <= 0:
+        return Counter()
+    keys = ids[:m]
+    for j in range(1, n):
+        keys = [k << bits | t if k and t else 0 for k, t in zip(keys, ids[j:])]
+    counts = Counter(keys)
+    counts.pop(0, None)
+    return counts
+
+
+def _map_cooccurrence(ids: list[int], own: int, window: int, bits: int) -> Counter[int]:
+    """
+    Map для --window: невпорядковані пари різних слів на відстані 1..window
+    токенів (перший токен пари — серед перших own), упаковані як
+    min(id) << bits | max(id).
+    """
+    counts: Counter[int] = Counter()
+    head = ids[:own]
+    for d in range(1, window + 1):
+        counts.update(
+            [
+                a << bits | b if a < b else b << bits | a
+                for a, b in zip(head, ids[d:])
+                if a and b and a != b
+            ]
+        )
+    return counts
+
+
+@dataclass
+class NGramCounts:
+    """
+    Частоти n-грам (чи пар спільної появи) з count_ngrams/count_cooccurrence:
+    ключ — int з arity ID по bits біт, words[id] — слово. Рядки створюються
+    лише при декодуванні (most_common).
+    """
+
+    counts: Counter[int]
+    words: list[str]
+    bits: int
+    arity: int
+
+    def decode(self, key: int) -> tuple[str, ...]:
+        mask = (1 << self.bits) - 1
+        return tuple(
+            self.words[(key >> (self.bits * (self.arity - 1 - j))) & mask]
+            for j in range(self.arity)
+        )
+
+    def most_common(self, top_n: int) -> list[tuple[tuple[str, ...], int]]:
+        return [(self.decode(k), c) for k, c in self.counts.most_common(top_n)]
+
+
+def _count_packed(
+    documents: Iterable[str],
+    fn: Callable[..., Counter[int]],
+    param: int,
+    span: int,
+    arity: int,
+    threads: int,
+    stop_words: Iterable[str],
+    executor: str,
+    stats: MapReduceStats | None,
+) -> NGramCounts:
+    """
+    Спільна частина n-грам і пар: токени всіх документів кодуються в ID
+    одного словника (у головному потоці — ID мають бути спільні для всіх
+    воркерів), між документами вставляється span нулів, тож n-грама чи пара
+    не перетинає межу документа. Далі — шматки з перекриттям span токенів
+    (_split_windows) і звичайний _map_reduce_counts над int-ключами.
+    """
+    _check_executor(executor)
+    workers = max(1, threads)
+    stats = stats if stats is not None else MapReduceStats()
+    frozen = frozenset(stop_words)
+    vocab: dict[str, int] = {"": 0}  # ID 0 — стоп-слово або межа документа
+    ids: list[int] = []
+    for text in documents:
+        t0 = time.perf_counter()
+        if ids:
+            ids.extend([0] * span)
+        ids.extend(_encode_tokens(_tokenize(text), vocab, frozen))
+        stats.tokenize_seconds += time.perf_counter() - t0
+
+    bits = max(1, (len(vocab) - 1).bit_length())
+    tasks = (
+        (chunk, own, param, bits) for chunk, own in _split_windows(ids, workers, span)
+    )
+    counts = _map_reduce_counts(executor, workers, fn, tasks, stats)
+    return NGramCounts(counts, list(vocab), bits, arity)
+
+
+def count_ngrams(
+    documents: Iterable[str],
+    n: int = 2,
+    threads: int = 8,
+    stop_words: Iterable[str] = (),
+    executor: str = "thread",
+    stats: MapReduceStats | None = None,
+) -> NGramCounts:
+    """
+    MapReduce-підрахунок n-грам (n послідовних слів у межах одного документа).
+    n-грами зі стоп-словами відкидаються. Ключі — упаковані int, а не рядки:
+    пам'ять і хешування не залежать від довжини слів.
+    """
+    if n < 1:
+        raise ValueError(f"n має бути >= 1, отримано {n}")
+    return _count_packed(
+        documents, _map_ngrams, n, n - 1, n, threads, stop_words, executor, stats
+    )
+
+
+def count_cooccurrence(
+    documents: Iterable[str],
+    window: int = 5,
+    threads: int = 8,
+    stop_words: Iterable[str] = (),
+    executor: str = "thread",
+    stats: MapReduceStats | None = None,
+) -> NGramCounts:
+    """
+    MapReduce-підрахунок спільної появи: кожна пара різних слів на відстані
+    до window токенів у межах документа (без урахування порядку) дає +1.
+    """
+    if window < 1:
+        raise ValueError(f"window має бути >= 1, отримано {window}")
+    return _count_packed(
+        documents,
+        _map_cooccurrence,
+        window,
+        window,
+        2,
+        threads,
+        stop_words,
+        executor,
+        stats,
+    )
+
+
+def top_words(
+    counts: Mapping[str, int], top_n: int, stop_words: Iterable[str] = ()
+) -> list[tuple[str, int]]:
+    """
+    TOP-N через купу (heapq.nlargest) за один прохід по частотах; стоп-слова
+    відкидаються на льоту, без копіювання словника.
+    """
+    stop_set = set(stop_words)
+    items: Iterable[tuple[str, int]] = counts.items()
+    if stop_set:
+        items = ((w, c) for w, c in items if w not in stop_set)
+    return heapq.nlargest(top_n, items, key=itemgetter(1))
+
+
+@dataclass(frozen=True)
+class _NpAlphabet:
+    """
+    Таблиці векторизованого бекенду, побудовані з самого _WORD_RE (тож
+    семантика збігається з _tokenize): код символу → щільний код літери в
+    нижньому регістрі (1..len(letters)), 0 — не частина слова.
+    """
+
+    codes: np.ndarray  # uint8, останній елемент — для всіх кодів поза таблицею
+    letters: str  # letters[c - 1] — символ щільного коду c
+    bits: int  # біт на літеру при пакуванні слова в uint64
+
+    @classmethod
+    def build(cls) -> _NpAlphabet:
+        word_chars = [chr(cp) for cp in range(0x10000) if _WORD_CHAR_RE.match(chr(cp))]
+        letters = "".join(sorted({ch.lower() for ch in word_chars}))
+        codes = np.zeros(max(map(ord, word_chars)) + 2, dtype=np.uint8)
+        for ch in word_chars:
+            codes[ord(ch)] = letters.index(ch.lower()) + 1
+        return cls(codes, letters, len(letters).bit_length())
+
+    def decode(self, dense: Iterable[int]) -> str:
+        return "".join(self.letters[c - 1] for c in dense)
+
+
+_NP_ALPHABET: _NpAlphabet | None = None
+
+
+def top_words_numpy(
+    text: str, top_n: int, stop_words: Iterable[str] = ()
+) -> list[tuple[str, int]]:
+    """
+    Векторизований TOP-N без Python-рядка на кожне слово.
+
+    Текст один раз перетворюється на масив кодів (UTF-16; символи поза BMP —
+    пара сурогатів, що не є літерами), межі слів і нижній регістр знаходяться
+    табличними операціями над усім масивом. Слова групуються за довжиною:
+    короткі пакуються в uint64 (по bits біт на літеру), довші — рядки байтів
+    фіксованої ширини; np.unique дає унікальні слова, частоти та першу появу
+    (без хешів і колізій). Рядки Python створюються лише для фінальних TOP-N.
+    Результат, включно з порядком рівних частот (за першою появою), збігається
+    з count_words(...).most_common(top_n).
+    """
+    global _NP_ALPHABET
+    if np is None:
+        raise RuntimeError("backend='numpy' потребує пакет numpy (pip install numpy)")
+    if _NP_ALPHABET is None:
+        _NP_ALPHABET = _NpAlphabet.build()
+    alphabet = _NP_ALPHABET
+    if top_n <= 0:
+        return []
+
+    units = np.frombuffer(text.encode("utf-16-le"), dtype="<u2")
+    dense = np.zeros(len(units) + 2, dtype=np.uint8)  # нуль-обрамлення з країв
+    dense[1:-1] = alphabet.codes[np.minimum(units, len(alphabet.codes) - 1)]
+    del units
+    # Межі слів — зміни «літера / не літера»; парні — початки, непарні — кінці
+    edges = np.flatnonzero((dense[1:] != 0) != (dense[:-1] != 0))
+    starts = edges[0::2] + 1
+    lengths = edges[1::2] - edges[0::2]
+    if not len(starts):
+        return []
+
+    stop_by_len: dict[int, list[str]] = {}
+    for w in stop_words:
+        stop_by_len.setdefault(len(w), []).append(w)
+    pack_max = 64 // alphabet.bits
+
+    # Стабільне сортування за довжиною: усередині групи слова йдуть за позицією
+    order = np.argsort(lengths, kind="stable")
+    starts, lengths = starts[order], lengths[order]
+    bounds = np.flatnonzero(np.diff(lengths)) + 1
+    bounds = np.concatenate(([0], bounds, [len(starts)]))
+
+    groups: list[tuple[int, np.ndarray]] = []  # (довжина, унікальні ключі групи)
+    counts: list[np.ndarray] = []
+    first_pos: list[np.ndarray] = []
+    for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        width = int(lengths[lo])
+        sel = starts[lo:hi]
+        rows = dense[sel[:, None] + np.arange(width)]
+        if width <= pack_max:
+            keys = np.zeros(len(sel), dtype=np.uint64)
+            for j in range(width):
+                keys <<= np.uint64(alphabet.bits)
+                keys |= rows[:, j]
+        else:
+            keys = rows.view(f"S{width}").ravel()
+        uniq, first, cnt = np.unique(keys, return_index=True, return_counts=True)
+        stops = [
+            _np_word_key(w, alphabet, pack_max)
+            for w in stop_by_len.get(width, ())
+            if all(ch in alphabet.letters for ch in w)  # інакше слово не зустрінеться
+        ]
+        if stops:
+            cnt[np.isin(uniq, np.array(stops, dtype=uniq.dtype))] = 0
+        groups.append((width, uniq))
+        counts.append(cnt)
+        first_pos.append(sel[first])
+
+    all_counts = np.concatenate(counts)
+    all_first = np.concatenate(first_pos)
+    top_n = min(top_n, int(np.count_nonzero(all_counts)))
+    if top_n == 0:
+        return []
+    threshold = np.partition(all_counts, len(all_counts) - top_n)[-top_n]
+    ids = np.flatnonzero(all_counts >= threshold)
+    ids = ids[np.lexsort((all_first[ids], -all_counts[ids]))][:top_n]
+
+    # Глобальний ID слова = зсув групи + індекс у групі
+    offsets = np.cumsum([0] + [len(uniq) for _, uniq in groups])
+    top: list[tuple[str, int]] = []
+    for i in ids.tolist():
+        g = int(np.searchsorted(offsets, i, side="right")) - 1
+        width, uniq = groups[g]
+        key = uniq[i - offsets[g]]
+        if width <= pack_max:
+            mask = (1 << alphabet.bits) - 1
+            key = int(key)
+            dense_word = [
+                (key >> (alphabet.bits * (width - 1 - j))) & mask for j in range(width)
+            ]
+        else:
+            dense_word = list(key)
+        top.append((alphabet.decode(dense_word), int(all_counts[i])))
+    return top
+
+
+def _np_word_key(word: str, alphabet: _NpAlphabet, pack_max: int) -> int | bytes:
+    """Ключ слова в тому ж поданні, що й у групі його довжини (для стоп-слів)."""
+    dense = [int(alphabet.codes[ord(ch)]) for ch in word]
+    if len(word) > pack_max:
+        return bytes(dense)
+    key = 0
+    for c in dense:
+        key = (key << alphabet.bits) | c
+    return key
+
+
 def mapreduce_count(
     text: str,
     threads: int = 8,
     stop_words_path: Path | None = None,
     top_n: int = 20,
+    executor: str = "thread",
+    backend: str = "python",
 ) -> list[tuple[str, int]]:
     """
-    Виконує MapReduce-підрахунок слів.
+    Виконує MapReduce-підрахунок слів (див. count_words).
     Повертає TOP-N (word, count) у порядку спадання.
+    backend="numpy" — векторизований підрахунок (див. top_words_numpy).
     """
-    # 1) Токенізуємо один раз — надалі працюємо з цілими словами
-    words_all = _tokenize(text)
+    if backend not in BACKENDS:
+        raise ValueError(f"Невідомий backend: {backend!r} (очікується {BACKENDS})")
+    stop_words = load_stop_words(stop_words_path)
+    if backend == "numpy":
+        return top_words_numpy(text, top_n, stop_words)
+    return count_words(text, threads, stop_words, executor, top_n=top_n).items
 
-    # 2) Завантажуємо стоп-слова
-    stop_words: set[str] = set()
-    if stop_words_path and stop_words_path.exists():
-        with open(stop_words_path, encoding="utf-8") as f:
-            stop_words = {w.strip().lower() for w in f if w.strip()}
 
-    # 3) Розбиваємо токени на шматки для потоків
-    chunks = _split_tokens(words_all, max(1, threads))
-    total_counter: Counter[str] = Counter()
+def mapreduce_count_stream(
+    chunks: Iterable[str],
+    threads: int = 8,
+    stop_words_path: Path | None = None,
+    top_n: int = 20,
+    executor: str = "thread",
+    batch_chars: int = DEFAULT_BATCH_CHARS,
+) -> list[tuple[str, int]]:
+    """Потоковий MapReduce (див. count_words_stream); повертає TOP-N."""
+    stop_words = load_stop_words(stop_words_path)
+    return count_words_stream(
+        chunks, threads, stop_words, executor, batch_chars, top_n=top_n
+    ).items
 
-    # 4) Map у потоках + Reduce через Counter.update()
-    if not chunks:
-        return []
 
-    with ThreadPoolExecutor(max_workers=min(len(chunks), threads)) as executor:
-        futures = [
-            executor.submit(_map_chunk_tokens, chunk, stop_words) for chunk in chunks
-        ]
-        for fut in as_completed(futures):
-            total_counter.update(fut.result())
+def mapreduce_count_files(
+    paths: Iterable[Path],
+    threads: int = 8,
+    stop_words_path: Path | None = None,
+    top_n: int = 20,
+    executor: str = "thread",
+    max_range_bytes: int = DEFAULT_RANGE_BYTES,
+) -> list[tuple[str, int]]:
+    """MapReduce по локальних файлах (див. count_words_files); повертає TOP-N."""
+    stop_words = load_stop_words(stop_words_path)
+    return count_words_files(
+        paths, threads, stop_words, executor, max_range_bytes, top_n=top_n
+    ).items
 
-    # 5) Отримуємо TOP-N
-    return total_counter.most_common(top_n)
+
+def mapreduce_ngrams(
+    text: str,
+    n: int = 2,
+    threads: int = 8,
+    stop_words_path: Path | None = None,
+    top_n: int = 20,
+    executor: str = "thread",
+    window: int = 0,
+) -> list[tuple[tuple[str, ...], int]]:
+    """
+    TOP-N n-грам тексту (див. count_ngrams); window > 0 — замість n-грам
+    пари спільної появи в ковзному вікні (див. count_cooccurrence).
+    """
+    stop_words = load_stop_words(stop_words_path)
+    if window:
+        grams = count_cooccurrence([text], window, threads, stop_words, executor)
+    else:
+        grams = count_ngrams([text], n, threads, stop_words, executor)
+    return grams.most_common(top_n)
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter
+from typing import Mapping
+
+
+class HeavyHitters:
+    """
+    Наближений підрахунок найчастіших слів зі сталою пам'яттю (Misra–Gries /
+    Space-Saving, мергабельна версія).
+
+    Тримає не більше 2·k лічильників; коли їх більше — віднімає від усіх
+    (k+1)-те найбільше значення і відкидає нульові. Оцінка кожного слова —
+    нижня межа: true ∈ [estimate, estimate + error], де error ≤ total / (k+1).
+    Часткові підсумки воркерів зливаються через update() без втрати гарантії.
+    """
+
+    def __init__(self, k: int) -> None:
+        if k <= 0:
+            raise ValueError("k має бути додатнім")
+        self.k = k
+        self.counts: Counter[str] = Counter()
+        self.total = 0  # скільки слів пройшло через підсумок
+        self.error = 0  # сумарно віднято з кожного лічильника (межа похибки)
+
+    @classmethod
+    def for_error(cls, epsilon: float) -> HeavyHitters:
+        """Підсумок з похибкою не більше epsilon · total (k = ⌈1/ε⌉)."""
+        if not 0 < epsilon < 1:
+            raise ValueError("epsilon має бути в (0, 1)")
+        return cls(math.ceil(1 / epsilon))
+
+    @classmethod
+    def from_counts(cls, counts: Mapping[str, int], k: int) -> HeavyHitters:
+        summary = cls(k)
+        summary.update(counts)
+        return summary
+
+    def update(self, other: Mapping[str, int] | HeavyHitters) -> None:
+        """Додає точні частоти шматка або зливає інший підсумок."""
+        if isinstance(other, HeavyHitters):
+            self.counts.update(other.counts)
+            self.total += other.total
+            self.error += other.error
+        else:
+            self.counts.update(other)
+            self.total += sum(other.values())
+        if len(self.counts) > 2 * self.k:
+            self._prune()
+
+    def _prune(self) -> None:
+        m = heapq.nlargest(self.k + 1, self.counts.values())[-1]
+        self.counts = Counter({w: c - m for w, c in self.counts.items() if c > m})
+        self.error += m
+
+    def most_common(self, n: int | None = None) -> list[tuple[str, int]]:
+        return self.counts.most_common(n)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Final
+
+_MAGIC: Final[bytes] = b"WCSNAP1\0"
+_HEADER = struct.Struct("<8sQQ")  # magic, кількість слів, довжина словника в байтах
+
+
+class SnapshotError(RuntimeError):
+    """Пошкоджений або несумісний файл знімка частот."""
+
+
+def save_snapshot(counts: Counter[str], path: Path) -> Path:
+    """
+    Зберігає повні частоти у компактному бінарному форматі:
+    заголовок, відсортований словник (UTF-8, слова через '\\n') та упакований
+    array('Q') лічильників у тому ж порядку (little-endian).
+    Запис атомарний: тимчасовий файл + os.replace.
+    """
+    words = sorted(w for w, c in counts.items() if c > 0)
+    vocab = "\n".join(words).encode("utf-8")
+    values = array("Q", (counts[w] for w in words))
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(words), len(vocab)))
+            f.write(vocab)
+            values.tofile(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def load_snapshot(path: Path) -> Counter[str]:
+    """Читає знімок, збережений save_snapshot. Підіймає SnapshotError на невідповідність."""
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise SnapshotError(f"Обрізаний заголовок знімка: {path}")
+        magic, n_words, vocab_len = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            raise SnapshotError(f"Невідомий формат знімка: {path}")
+        vocab = f.read(vocab_len)
+        values = array("Q")
+        try:
+            values.fromfile(f, n_words)
+        except EOFError as e:
+            raise SnapshotError(f"Обрізані лічильники знімка: {path}") from e
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    words = vocab.decode("utf-8").split("\n") if n_words else []
+    if len(words) != n_words:
+        raise SnapshotError(f"Словник не відповідає лічильникам: {path}")
+    return Counter(dict(zip(words, values)))
+
+
+def merge_snapshot(delta: Counter[str], path: Path) -> Counter[str]:
+    """
+    Додає дельту (частоти лише нових документів) до знімка на диску й
+    перезаписує його. Якщо знімка ще немає — створює. Повертає об'єднані частоти.
+    """
+    path = Path(path)
+    total = load_snapshot(path) if path.exists() else Counter()
+    total.update(delta)
+    save_snapshot(total, path)
+    return total
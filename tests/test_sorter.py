@@ -1,8 +1,28 @@
 import asyncio
+import errno
+import hashlib
+import json
+import logging
+from logging.handlers import QueueHandler
+import os
 from pathlib import Path
 import shutil
 import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import pytest
+
+from src.sorter_async import cli as sorter_cli
+from src.sorter_async import copy_engine
+from src.sorter_async.concurrency import AimdLimiter, Lanes
+from src.sorter_async.copy_engine import TEMP_SUFFIX, CopyEngine
+from src.sorter_async.journal import JOURNAL_NAME
+from src.sorter_async.logger import flush_logs, get_logger
+from src.sorter_async.manifest import MANIFEST_NAME
+from src.sorter_async.metrics import LatencyHistogram, SortMetrics
+from src.sorter_async.sharded import _sort_shard, sort_sharded
 from src.sorter_async.sort_async import SortParams, sort_folder
 
 
@@ -59,3 +79,481 @@ def test_sorter_dry_run_and_real_copy():
         assert txt_files == ["a.txt", "b.TXT"]
         assert docx_files == ["d.docx"]
         assert noext_files == ["c"]
+
+
+def test_sorter_streams_nested_tree_with_dst_inside_src(tmp_path: Path):
+    src = tmp_path / "src"
+    for i in range(60):
+        p = src / f"d{i % 4}" / f"sub{i % 3}" / f"f{i}.{'log' if i % 2 else 'csv'}"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(str(i), encoding="utf-8")
+    dst = src / "sorted"  # ціль усередині джерела
+
+    # workers менше за кількість файлів: черга обмежена, споживачів — 3
+    stats = asyncio.run(sort_folder(SortParams(src=src, dst=dst, workers=3)))
+    assert stats == {"log": 30, "csv": 30}
+    assert len(list((dst / "log").iterdir())) == 30
+    assert (dst / "csv" / "f0.csv").read_text(encoding="utf-8") == "0"
+
+
+def test_copy_engine_modes_and_cached_strategy(tmp_path: Path, monkeypatch):
+    src = tmp_path / "src"
+    _make_files(src)
+
+    # link: на тому ж томі — жорсткі посилання, без копіювання даних
+    linked = tmp_path / "linked"
+    asyncio.run(sort_folder(SortParams(src=src, dst=linked, mode="link")))
+    assert (linked / "txt" / "a.txt").stat().st_ino == (src / "a.txt").stat().st_ino
+
+    # copy: стратегія, що «не підтримується», пробується лише раз на пару пристроїв
+    calls = []
+
+    def unsupported(src_fd: int, dst_fd: int, size: int) -> None:
+        calls.append(size)
+        raise copy_engine._Unsupported
+
+    strategies = (("fake", unsupported),) + copy_engine._COPY_STRATEGIES[1:]
+    monkeypatch.setattr(copy_engine, "_COPY_STRATEGIES", strategies)
+    engine = CopyEngine("copy")
+    (tmp_path / "out").mkdir()
+    for name in ("a.txt", "c"):
+        engine.transfer(src / name, tmp_path / "out" / name)
+    assert len(calls) == 1 and "fake" not in engine.methods
+    assert (tmp_path / "out" / "c").read_text(encoding="utf-8") == "hello"
+
+    # move: джерело зникає, ціль на місці
+    moved = tmp_path / "moved"
+    stats = asyncio.run(sort_folder(SortParams(src=src, dst=moved, mode="move")))
+    assert stats == {"txt": 2, "no_ext": 1, "docx": 1}
+    assert not (src / "a.txt").exists() and (moved / "docx" / "d.docx").exists()
+
+
+def test_incremental_resort_skips_unchanged_and_prunes(tmp_path: Path):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    files = _make_files(src)
+    params = SortParams(src=src, dst=dst, workers=3, incremental=True, prune=True)
+
+    assert asyncio.run(sort_folder(params)) == {"txt": 2, "no_ext": 1, "docx": 1}
+    assert (dst / MANIFEST_NAME).exists()
+    # повторний запуск без змін нічого не копіює
+    assert asyncio.run(sort_folder(params)) == {}
+
+    # змінений файл — перекопійовується; видалений — прибирається з dst
+    files["a.txt"].write_text("hello, again", encoding="utf-8")
+    files["d.docx"].unlink()
+    assert asyncio.run(sort_folder(params)) == {"txt": 1}
+    assert (dst / "txt" / "a.txt").read_text(encoding="utf-8") == "hello, again"
+    assert not (dst / "docx" / "d.docx").exists()
+    assert (dst / "txt" / "b.TXT").exists()
+
+
+def test_incremental_keeps_suffixed_targets_of_changed_same_named_files(
+    tmp_path: Path,
+):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    for d, text in (("a", "A"), ("b", "B")):
+        (src / d).mkdir(parents=True)
+        (src / d / "x.txt").write_text(text, encoding="utf-8")
+    params = SortParams(src=src, dst=dst, workers=2, incremental=True)
+    read = lambda name: (dst / "txt" / name).read_text(encoding="utf-8")  # noqa: E731
+
+    assert asyncio.run(sort_folder(params)) == {"txt": 2}
+    assert (read("x.txt"), read("x~2.txt")) == ("A", "B")
+
+    # змінений b/x.txt оновлює свою копію x~2.txt, а не копію a/x.txt
+    (src / "b" / "x.txt").write_text("B2 modified", encoding="utf-8")
+    assert asyncio.run(sort_folder(params)) == {"txt": 1}
+    assert (read("x.txt"), read("x~2.txt")) == ("A", "B2 modified")
+
+    # новий однойменний файл не займає назви з маніфесту
+    (src / "c").mkdir()
+    (src / "c" / "x.txt").write_text("C", encoding="utf-8")
+    assert asyncio.run(sort_folder(params)) == {"txt": 1}
+    assert sorted(p.name for p in (dst / "txt").iterdir()) == [
+        "x.txt",
+        "x~2.txt",
+        "x~3.txt",
+    ]
+    assert read("x~3.txt") == "C"
+
+    # --overwrite: без суфіксів, однакова назва лишається одним файлом
+    plain = tmp_path / "plain"
+    params = SortParams(src=src, dst=plain, workers=2, overwrite=True)
+    assert asyncio.run(sort_folder(params)) == {"txt": 3}
+    assert [p.name for p in (plain / "txt").iterdir()] == ["x.txt"]
+
+
+def test_dedupe_links_duplicates_and_suffixes_name_collisions(tmp_path: Path):
+    src = tmp_path / "src"
+    contents = {"a/x.txt": "same", "b/x.txt": "same", "c/y.txt": "same"}
+    contents["d/x.txt"] = "other"  # та сама назва, інший вміст
+    for rel, text in contents.items():
+        (src / rel).parent.mkdir(parents=True, exist_ok=True)
+        (src / rel).write_text(text, encoding="utf-8")
+
+    dst = tmp_path / "linked"
+    params = SortParams(src=src, dst=dst, workers=4, dedupe="link")
+    assert asyncio.run(sort_folder(params)) == {"txt": 4}
+    by_text: dict[str, set[int]] = {}
+    for f in (dst / "txt").iterdir():
+        by_text.setdefault(f.read_text(encoding="utf-8"), set()).add(f.stat().st_ino)
+    names = sorted(f.name for f in (dst / "txt").iterdir())
+    # «same» — один inode на x.txt/y.txt, «other» — окремий файл із суфіксом хешу
+    assert len(names) == 3 and "y.txt" in names
+    assert {len(inodes) for inodes in by_text.values()} == {1}
+    collided = next(n for n in names if n.startswith("x~"))
+    data = (dst / "txt" / collided).read_bytes()
+    assert collided == f"x~{hashlib.blake2b(data, digest_size=16).hexdigest()[:12]}.txt"
+    # повторний запуск нічого не дописує: назви й вміст уже на місці
+    asyncio.run(sort_folder(params))
+    assert sorted(f.name for f in (dst / "txt").iterdir()) == names
+
+    skipped = tmp_path / "skipped"
+    asyncio.run(sort_folder(SortParams(src=src, dst=skipped, dedupe="skip")))
+    assert len(list((skipped / "txt").iterdir())) == 2
+
+
+def test_dedupe_index_separates_same_size_files_by_hash(tmp_path: Path):
+    # 40 файлів одного розміру: однаковий початок (64 KiB), різні хвости
+    src = tmp_path / "src"
+    head = b"h" * (64 * 1024)
+    for i in range(40):
+        (src / str(i % 4)).mkdir(parents=True, exist_ok=True)
+        (src / str(i % 4) / f"f{i}.bin").write_bytes(head + b"%03d" % (i % 10))
+
+    dst = tmp_path / "dst"
+    params = SortParams(src=src, dst=dst, workers=8, dedupe="link")
+    assert asyncio.run(sort_folder(params)) == {"bin": 40}
+    inodes: dict[bytes, set[int]] = {}
+    for f in (dst / "bin").iterdir():
+        inodes.setdefault(f.read_bytes()[-3:], set()).add(f.stat().st_ino)
+    # 10 різних вмістів — по одному inode на кожен
+    assert len(inodes) == 10
+    assert all(len(ids) == 1 for ids in inodes.values())
+
+
+def test_aimd_limiter_converges_near_device_saturation(tmp_path: Path):
+    # Модель диска: до 8 паралельних операцій пропускна здатність росте лінійно,
+    # далі — плато, а затримка росте з довжиною черги (закон Літтла)
+    now = [0.0]
+    limiter = AimdLimiter(initial=1, maximum=256, clock=lambda: now[0])
+    history = []
+    for _ in range(200):
+        limit = limiter.limit
+        rate = min(limit, 8) * 100.0  # операцій/с
+        for _ in range(limit):
+            now[0] += 1 / rate
+            limiter.observe(latency=limit / rate, nbytes=0)
+        history.append(limiter.limit)
+    assert max(history[:10]) < 12  # стартує з малого й росте адитивно
+    assert all(8 <= limit <= 17 for limit in history[50:])
+
+    lanes = Lanes()
+    assert lanes.for_size(10) is lanes.small
+    assert lanes.for_size(1 << 30) is lanes.large
+
+    src = tmp_path / "src"
+    _make_files(src)
+    stats = asyncio.run(sort_folder(SortParams(src, tmp_path / "dst", workers="auto")))
+    assert stats == {"txt": 2, "no_ext": 1, "docx": 1}
+
+
+def test_auto_workers_small_files_are_not_starved_by_large_lane(
+    tmp_path: Path, monkeypatch
+):
+    # Великі файли йдуть першими в обході й «висять», доки не скопійовані всі
+    # дрібні: зі спільною чергою всі споживачі застрягли б на ліміті великих
+    src = tmp_path / "src"
+    (src / "a").mkdir(parents=True)
+    (src / "z").mkdir()
+    for i in range(20):
+        (src / "a" / f"big{i}.bin").write_bytes(b"x" * 200)
+    for i in range(5):
+        (src / "z" / f"small{i}.txt").write_text("s", encoding="utf-8")
+
+    gate = threading.Event()
+    small_done = []
+    real_transfer = CopyEngine.transfer
+
+    def transfer(self, src_file, dst_file, st=None):
+        if src_file.suffix == ".bin":
+            assert gate.wait(10), "дрібні файли не скопійовано, поки чекають великі"
+        method = real_transfer(self, src_file, dst_file, st)
+        if src_file.suffix == ".txt":
+            small_done.append(src_file)
+            if len(small_done) == 5:
+                gate.set()
+        return method
+
+    monkeypatch.setattr(CopyEngine, "transfer", transfer)
+    monkeypatch.setattr(
+        "src.sorter_async.sort_async.Lanes",
+        lambda: Lanes(
+            AimdLimiter(initial=2, maximum=4),
+            AimdLimiter(initial=1, maximum=2),
+            threshold=100,
+        ),
+    )
+    stats = asyncio.run(sort_folder(SortParams(src, tmp_path / "dst", workers="auto")))
+    assert stats == {"bin": 20, "txt": 5}
+
+
+def test_layout_planner_creates_buckets_once_and_suffixes_collisions(
+    tmp_path: Path, monkeypatch
+):
+    src = tmp_path / "src"
+    for i, d in enumerate(["a", "b", "b/c"]):
+        (src / d).mkdir(parents=True)
+        (src / d / "report.txt").write_text(d, encoding="utf-8")
+        (src / d / f"n{i}.txt").write_text(d, encoding="utf-8")
+    dst = tmp_path / "dst"
+
+    mkdirs = []
+    real_mkdir = Path.mkdir
+
+    def counting_mkdir(self, *args, **kwargs):
+        mkdirs.append(self)
+        return real_mkdir(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "mkdir", counting_mkdir)
+    stats = asyncio.run(sort_folder(SortParams(src=src, dst=dst, workers=4)))
+    assert stats == {"txt": 6}
+    assert mkdirs.count(dst / "txt") == 1  # підпапка — один раз на запуск
+
+    # Однакові назви з різних каталогів не перезаписують одна одну
+    # (порядок обходу детермінований: a, b, b/c)
+    read = lambda name: (dst / "txt" / name).read_text(encoding="utf-8")  # noqa: E731
+    assert [read("report.txt"), read("report~2.txt"), read("report~3.txt")] == [
+        "a",
+        "b",
+        "b/c",
+    ]
+
+
+def test_queue_logger_writes_in_background_and_progress_replaces_per_file_lines(
+    tmp_path: Path, caplog
+):
+    log_file = tmp_path / "logs" / "sorter.log"
+    log = get_logger("sorter_async.test_queue", logging.DEBUG, log_file)
+    log.propagate = False
+    # Виклик лише кладе запис у чергу — запис у файл робить фоновий потік
+    assert [type(h) for h in log.handlers] == [QueueHandler]
+    for i in range(1000):
+        log.debug("copied %d", i)
+    flush_logs(log)
+    lines = log_file.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1000 and lines[-1].endswith("copied 999")
+
+    src = tmp_path / "src"
+    for i in range(10):
+        (src / f"f{i}.txt").parent.mkdir(parents=True, exist_ok=True)
+        (src / f"f{i}.txt").write_text(str(i), encoding="utf-8")
+    caplog.set_level(logging.DEBUG, logger="src.sorter_async.sort_async")
+    asyncio.run(sort_folder(SortParams(src, tmp_path / "dst", workers=3, progress=4)))
+    messages = [r.getMessage() for r in caplog.records]
+    assert [m for m in messages if m.startswith("Progress:")][0].startswith(
+        "Progress: files=4 "
+    )
+    assert sum(m.startswith("Progress:") for m in messages) == 2
+    assert not any("f3.txt" in m for m in messages)  # без рядка на кожен файл
+
+
+def test_crash_leaves_no_partial_targets_and_resume_finishes_the_rest(
+    tmp_path: Path, monkeypatch
+):
+    src = tmp_path / "src"
+    for i in range(8):
+        (src / "a").mkdir(parents=True, exist_ok=True)
+        (src / "a" / f"f{i}.txt").write_text(f"file{i}", encoding="utf-8")
+    (src / "a" / "dup.txt").write_text("first", encoding="utf-8")
+    (src / "z").mkdir()
+    (src / "z" / "dup.txt").write_text("boom", encoding="utf-8")
+    dst = tmp_path / "dst"
+
+    def flaky(src_fd: int, dst_fd: int, size: int) -> None:
+        if size == 4:  # «аварія» посеред запису z/dup.txt
+            os.write(dst_fd, b"bo")
+            raise OSError(errno.EIO, "disk failure")
+        copy_engine._userland(src_fd, dst_fd, size)
+
+    monkeypatch.setattr(copy_engine, "_COPY_STRATEGIES", (("flaky", flaky),))
+    # без --journal журнал не створюється навіть після збою
+    with pytest.raises(RuntimeError):
+        asyncio.run(sort_folder(SortParams(src, tmp_path / "plain", workers=3)))
+    assert not (tmp_path / "plain" / JOURNAL_NAME).exists()
+    with pytest.raises(RuntimeError):
+        asyncio.run(sort_folder(SortParams(src, dst, workers=3, journal=True)))
+    names = sorted(p.name for p in (dst / "txt").iterdir())
+    assert "dup~2.txt" not in names  # жодної обрізаної цілі під справжньою назвою
+    assert not any(n.endswith(TEMP_SUFFIX) for n in names)
+    journal = (dst / JOURNAL_NAME).read_text(encoding="utf-8").splitlines()
+    assert len(journal) == 1 + 9  # заголовок + усі вдалі файли
+
+    monkeypatch.undo()
+    stats = asyncio.run(sort_folder(SortParams(src, dst, workers=3, resume=True)))
+    assert stats == {"txt": 1}  # лише те, що не встигло
+    # Назва, зайнята в перерваному запуску, не перезаписується
+    assert (dst / "txt" / "dup.txt").read_text(encoding="utf-8") == "first"
+    assert (dst / "txt" / "dup~2.txt").read_text(encoding="utf-8") == "boom"
+    assert not (dst / JOURNAL_NAME).exists()
+
+
+def test_sharded_sort_matches_single_process_and_prunes_after_all_shards(
+    tmp_path: Path,
+):
+    src = tmp_path / "src"
+    for i in range(40):
+        name = "same" if i % 4 == 0 else f"f{i}"
+        p = src / f"d{i % 5}" / f"{name}.{'md' if i % 2 else 'csv'}"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(str(i), encoding="utf-8")
+
+    single, sharded = tmp_path / "single", tmp_path / "sharded"
+    expected = asyncio.run(sort_folder(SortParams(src, single, workers=4)))
+    params = SortParams(src, sharded, workers=4, incremental=True, prune=True)
+    metrics = SortMetrics()
+    assert sort_sharded(params, procs=3, metrics=metrics) == expected
+    assert metrics.dirs == 6  # дерево обходить лише батько, один раз
+
+    def tree(root: Path) -> dict[str, str]:
+        return {
+            str(p.relative_to(root)): p.read_text(encoding="utf-8")
+            for p in root.rglob("*")
+            if p.is_file() and not p.name.startswith(MANIFEST_NAME)
+        }
+
+    # Колізії «same.csv» — в одному шарді, тож суфікси ті самі, що й в одному процесі
+    assert tree(sharded) == tree(single)
+
+    (src / "d1" / "f1.md").unlink()
+    assert sort_sharded(params, procs=3) == {}  # усе незмінне
+    assert not (sharded / "md" / "f1.md").exists()  # prune — у батьківському процесі
+    assert (sharded / "md" / "f3.md").exists()
+
+    # Будь-який виняток шарду (не лише RuntimeError) — звіт про збій шарду
+    _, _, _, error = _sort_shard(SortParams(tmp_path / "missing", sharded))
+    assert error is not None and error.startswith("ValueError: ")
+
+
+def test_latency_histogram_percentiles_and_metrics_report(tmp_path: Path):
+    hist = LatencyHistogram()
+    for ms in range(1, 101):
+        hist.add(ms / 1000)
+    # Верхня межа кошика: похибка не більше кроку гістограми (~12%)
+    assert 0.050 <= hist.percentile(50) <= 0.050 * 1.13
+    assert 0.095 <= hist.percentile(95) <= 0.095 * 1.13
+    assert hist.percentile(100) == hist.max == 0.1
+
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    for i in range(6):
+        p = src / f"d{i % 2}" / f"f{i}.{'txt' if i % 3 else 'bin'}"
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(b"x" * (i + 1))
+
+    report = tmp_path / "out" / "metrics.json"
+    args = ["--src", str(src), "--dst", str(dst), "--metrics-json", str(report)]
+    assert sorter_cli.main([*args, "--tracemalloc", "3"]) == 0
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["status"] == "ok" and data["params"]["procs"] == 1
+    assert (data["files"], data["bytes"], data["errors"]) == (6, 21, 0)
+    assert data["dirs"] >= 3 and data["files_per_second"] > 0
+    assert set(data["stages"]) == {"walk_seconds", "plan_seconds", "copy_seconds"}
+    latency = data["copy_latency_seconds"]
+    assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+    assert data["tracemalloc"]["peak_bytes"] > 0
+    assert len(data["tracemalloc"]["top"]) == 3
+
+
+def test_huge_file_is_copied_in_parallel_ranges_into_a_preallocated_target(
+    tmp_path: Path, monkeypatch
+):
+    src = tmp_path / "src"
+    src.mkdir()
+    data = os.urandom((5 << 20) + 12345)
+    (src / "huge.bin").write_bytes(data)
+    (src / "small.txt").write_text("tiny", encoding="utf-8")
+    os.utime(src / "huge.bin", ns=(1_000_000_000, 2_000_000_000))
+
+    dst = tmp_path / "dst"
+    params = SortParams(src, dst, workers=4, chunk_min_bytes=1 << 20)
+    assert asyncio.run(sort_folder(params)) == {"bin": 1, "txt": 1}
+    assert (dst / "bin" / "huge.bin").read_bytes() == data
+    assert (dst / "bin" / "huge.bin").stat().st_mtime_ns == 2_000_000_000
+    assert not list(dst.rglob(f"*{TEMP_SUFFIX}"))
+
+    # Без copy_file_range (інша ФС) — pread/pwrite; діапазони копіюють кілька потоків
+    def cross_device(*args: object) -> int:
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(copy_engine.os, "copy_file_range", cross_device)
+
+    def no_reflink(*args: object) -> None:
+        raise copy_engine._Unsupported
+
+    monkeypatch.setattr(copy_engine, "_reflink", no_reflink)
+    threads: set[str] = set()
+    pwrite = os.pwrite
+
+    def tracking_pwrite(fd: int, buf: bytes, offset: int) -> int:
+        threads.add(threading.current_thread().name)
+        time.sleep(0.001)  # щоб помічники встигли взяти свої діапазони
+        return pwrite(fd, buf, offset)
+
+    monkeypatch.setattr(copy_engine.os, "pwrite", tracking_pwrite)
+    out = tmp_path / "out"
+    out.mkdir()
+    engine = CopyEngine("copy")
+    with ThreadPoolExecutor(3) as pool:
+        engine.use_pool(pool.submit, helpers=3, min_bytes=1 << 20)
+        assert engine.transfer(src / "huge.bin", out / "huge.bin") == "chunked"
+    assert (out / "huge.bin").read_bytes() == data
+    assert len(threads) > 1
+
+
+@pytest.mark.parametrize("poll", [0.0, 0.05], ids=["inotify", "poll"])
+def test_watch_sorts_new_files_without_rescan_and_debounces_open_ones(
+    tmp_path: Path, poll: float
+):
+    src, dst = tmp_path / "src", tmp_path / "dst"
+    src.mkdir()
+    (src / "a.txt").write_text("a", encoding="utf-8")
+    params = SortParams(src, dst, workers=4, watch=True, settle=0.3, poll=poll)
+
+    async def until(done, timeout: float = 5.0) -> None:
+        deadline = time.monotonic() + timeout
+        while not done():
+            assert time.monotonic() < deadline, "timed out"
+            await asyncio.sleep(0.01)
+
+    async def scenario() -> dict[str, int]:
+        stop = asyncio.Event()
+        task = asyncio.create_task(sort_folder(params, stop=stop))
+        await until((dst / "txt" / "a.txt").exists)
+
+        (src / "b.md").write_text("first", encoding="utf-8")
+        (src / "sub" / "deep").mkdir(parents=True)
+        await asyncio.sleep(0.1)  # каталог уже відстежується
+        (src / "sub" / "deep" / "c.csv").write_text("c", encoding="utf-8")
+        await until((dst / "md" / "b.md").exists)
+        await until((dst / "csv" / "c.csv").exists)
+
+        # Файл, що ще пишеться (без close), чекає settle тиші
+        with open(src / "part.log", "w", encoding="utf-8") as f:
+            f.write("half")
+            f.flush()
+            await asyncio.sleep(0.15)
+            assert not (dst / "log" / "part.log").exists()
+            f.write(" + rest")
+        await until((dst / "log" / "part.log").exists)
+
+        # Повторна подія оновлює ту саму ціль, а не створює 'b~2.md'
+        (src / "b.md").write_text("second", encoding="utf-8")
+        await until(lambda: (dst / "md" / "b.md").read_text("utf-8") == "second")
+        stop.set()
+        return await task
+
+    stats = asyncio.run(scenario())
+    assert stats == {"txt": 1, "md": 1, "csv": 1, "log": 1}
+    assert (dst / "log" / "part.log").read_text(encoding="utf-8") == "half + rest"
+    assert not (dst / "md" / "b~2.md").exists()
+    assert not (dst / JOURNAL_NAME).exists()  # зупинка через stop — чисте завершення
@@ -1,8 +1,51 @@
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+import json
+import random
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 import tempfile
+import threading
+import time
+from typing import Iterator
 
-from src.wordcount_mapreduce.mapreduce import mapreduce_count
+import pytest
+
+from src.wordcount_mapreduce.cache import HttpCache
+from src.wordcount_mapreduce.corpus import compile_corpus, load_corpus
+from src.wordcount_mapreduce.extract import HtmlTextExtractor
+from src.wordcount_mapreduce.fetch import _strip_html, get_text, iter_texts
+from src.wordcount_mapreduce.files import expand_paths
+from src.wordcount_mapreduce.mapreduce import (
+    MapReduceStats,
+    TopCounts,
+    _iter_word_safe,
+    _split_byte_ranges,
+    _tokenize,
+    approx_words_stream,
+    count_cooccurrence,
+    count_ngrams,
+    count_words,
+    count_words_stream,
+    mapreduce_count,
+    mapreduce_count_files,
+    mapreduce_count_stream,
+    mapreduce_ngrams,
+    top_words_numpy,
+)
+from src.wordcount_mapreduce.snapshot import load_snapshot
 from src.wordcount_mapreduce.visualize import visualize_top_words
+from src.wordcount_mapreduce import cli as wordcount_cli
+from src.wordcount_mapreduce import fetch
+
+
+def _zipf_text(words: int, seed: int) -> str:
+    """Детермінований Zipf-подібний текст: частота слова рангу r ∝ 1/r."""
+    vocab = [f"{a}{b}" for a in "абвгґдеєжзиіїйкл" for b in "abcdefghij"]
+    rnd = random.Random(seed)
+    picked = rnd.choices(vocab, [1 / r for r in range(1, len(vocab) + 1)], k=words)
+    return "\n".join(" ".join(picked[i : i + 12]) for i in range(0, words, 12))
 
 
 def test_mapreduce_top_and_stopwords(tmp_path: Path):
@@ -19,8 +62,409 @@ def test_mapreduce_top_and_stopwords(tmp_path: Path):
     assert top2 == {"dog": 3, "bird": 3, "cat": 2}
 
 
+def test_process_executor_matches_threads():
+    text = "Кіт пес кіт, dog! ПЕС кіт.\n" * 50 + "їжак ґава dog"
+    data = text.encode("utf-8")
+    ranges = _split_byte_ranges(data, 7)
+    # діапазони покривають буфер без пропусків і не розрізають слів
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    for start, end in ranges:
+        data[start:end].decode("utf-8")
+
+    expected = mapreduce_count(text, threads=3, top_n=10)
+    got = mapreduce_count(text, threads=3, top_n=10, executor="process")
+    assert dict(got) == dict(expected)
+
+
+def test_process_shuffle_tree_reduce_matches_threads():
+    text = " ".join(f"w{i % 97}x кіт{i % 13}" for i in range(3000))
+    # один великий шматок ріжеться на пакети ≈ batch_chars по межах слів
+    batches = list(_iter_word_safe([text], 1000))
+    assert len(batches) > 20 and "".join(batches) == text
+    assert all(len(b) < 1100 for b in batches)
+
+    expected = count_words(text, threads=2)
+    stats = MapReduceStats()
+    got = count_words_stream(
+        [text], threads=2, executor="process", batch_chars=1000, stats=stats
+    )
+    assert got == expected
+    assert stats.map_tasks == len(batches) and stats.partitions == 2
+    # кошики зливаються деревом у пулі, а не в головному процесі
+    assert stats.reduce_tasks > 0
+
+
+def test_partitioned_reduce_keeps_first_appearance_order():
+    # Багато рівних частот: порядок рівних — за першою появою, як у Counter
+    text = " ".join(f"w{i % 41} w{i % 7} кіт{i % 13}" for i in range(2000))
+    expected = Counter(_tokenize(text))
+    for executor in ("thread", "process"):
+        stats = MapReduceStats()
+        full = count_words_stream(
+            [text], threads=3, executor=executor, batch_chars=500, stats=stats
+        )
+        assert list(full.items()) == list(expected.items())
+        assert stats.partitions == 3 and stats.reduce_tasks > 0
+
+        for top_n in (0, 1, 10, 100):
+            top = count_words_stream(
+                [text], threads=3, executor=executor, batch_chars=500, top_n=top_n
+            )
+            assert isinstance(top, TopCounts)
+            assert top.items == expected.most_common(top_n)
+            assert (top.total, top.unique) == (len(_tokenize(text)), len(expected))
+
+
+def test_numpy_backend_matches_counter(tmp_path: Path):
+    text = (
+        "Їжак ЇЖАК ґава don't DON'T 'quoted' İstanbul straße "
+        "антиконституційно АНТИКОНСТИТУЦІЙНО dog😀dog\tкіт-пес "
+    ) * 7 + "кіт cat Cat ґава"
+    stop = tmp_path / "stop.txt"
+    stop.write_text("dog\nантиконституційно\nДОН\n", encoding="utf-8")
+    for stop_path in (None, stop):
+        for top_n in (1, 5, 100):
+            expected = mapreduce_count(text, 2, stop_path, top_n)
+            got = mapreduce_count(text, 2, stop_path, top_n, backend="numpy")
+            assert got == expected  # ті самі слова, частоти й порядок рівних
+    # стоп-слово у верхньому регістрі не збігається з жодним токеном
+    assert dict(top_words_numpy(text, 100, {"CAT"}))["cat"] == 2
+    assert top_words_numpy("", 5) == [] and top_words_numpy("... 123", 5) == []
+
+
+def test_stream_count_matches_in_memory():
+    html = (
+        "<html><head><style>p {color: red}</style>"
+        "<script>var dog = 'cat';</script></head>"
+        "<body><p>Dog &amp; cat, dog!</p><p>Їжак ґава, dog.</p></body></html>\n"
+    ) * 20
+    expected = mapreduce_count(_strip_html(html), threads=2, top_n=10)
+
+    # дрібні шматки рвуть теги, сутності та слова посередині
+    pieces = [html[i : i + 7] for i in range(0, len(html), 7)]
+    extractor = HtmlTextExtractor()
+    cleaned = [extractor.feed(p) for p in pieces] + [extractor.close()]
+    assert "".join(cleaned) == _strip_html(html)
+    got = mapreduce_count_stream(cleaned, threads=2, top_n=10, batch_chars=50)
+    assert dict(got) == dict(expected)
+    assert "var" not in dict(got)
+
+
+def test_strip_html_single_pass_semantics():
+    html = (
+        "  <p>Dog&nbsp;&amp;\n\t<b>cat</b></p><SCRIPT type=x>a<b>c</SCRIPT >"
+        "<style>p{}</style>fi&amp;sh a < b"
+    )
+    assert _strip_html(html) == "Dog & cat fi&sh a < b"
+    # незакритий <script> відкидає решту документа, а не «зависає» на відкатах
+    assert _strip_html("ok <script>" + "x<y " * 10000) == "ok"
+
+
+def test_extractor_caps_unclosed_tag_tail():
+    # '<' без '>': хвіст між шматками не довший за тег, текст не губиться
+    html = "a <b " + "word " * 20000 + "<i>end</i>"
+    extractor = HtmlTextExtractor()
+    cleaned = []
+    for i in range(0, len(html), 1000):
+        cleaned.append(extractor.feed(html[i : i + 1000]))
+        assert len(extractor._buf) <= 8192
+    cleaned.append(extractor.close())
+    assert "".join(cleaned) == _strip_html(html)
+    assert _strip_html(html).startswith("a <b word word")
+    assert _strip_html(html).endswith("word end")
+
+
+def test_count_local_files_dirs_and_globs(tmp_path: Path):
+    big = "Кіт пес кіт, dog! ПЕС кіт.\n" * 400
+    (tmp_path / "big.txt").write_text(big, encoding="utf-8")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "a.txt").write_text("dog dog їжак", encoding="utf-8")
+    (tmp_path / "docs" / "empty.txt").write_text("", encoding="utf-8")
+
+    files = expand_paths([tmp_path / "docs", str(tmp_path / "*.txt")])
+    assert [f.name for f in files] == ["a.txt", "empty.txt", "big.txt"]
+
+    expected = dict(mapreduce_count(big + " dog dog їжак", threads=1, top_n=10))
+    for executor in ("thread", "process"):
+        # малий max_range_bytes змушує ділити big.txt на mmap-діапазони
+        got = mapreduce_count_files(
+            files, threads=3, top_n=10, executor=executor, max_range_bytes=1000
+        )
+        assert dict(got) == expected
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def _serve(root: Path) -> Iterator[str]:
+    """Локальний HTTP-сервер для тестів завантаження (без мережі)."""
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(_QuietHandler, directory=str(root))
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_iter_texts_fetches_batch_from_local_server(tmp_path: Path):
+    for i in range(5):
+        (tmp_path / f"{i}.html").write_text(
+            f"<p>doc{'x' * i} dog</p>", encoding="utf-8"
+        )
+    with _serve(tmp_path) as base:
+        urls = [f"{base}/{i}.html" for i in range(5)] + [f"{base}/missing.html"]
+        results = {r.url: r for r in iter_texts(urls, workers=3, per_host=2, retries=1)}
+
+    assert results[f"{base}/0.html"].text == "doc dog"
+    assert results[f"{base}/4.html"].text == "docxxxx dog"
+    assert results[f"{base}/missing.html"].error is not None
+    assert sum(r.error is None for r in results.values()) == 5
+
+
+def test_iter_texts_bounds_in_flight_submissions(monkeypatch):
+    started: list[str] = []
+
+    def fake_get_text(url, *args, **kwargs):
+        started.append(url)
+        return url
+
+    monkeypatch.setattr(fetch, "get_text", fake_get_text)
+    urls = [f"http://h{i % 3}.example/{i}" for i in range(40)]
+    results = iter_texts(urls, workers=2)
+    first = next(results)
+    time.sleep(0.2)  # повільний споживач: пул не біжить далеко вперед
+    assert len(started) <= 2 * (2 * 2)  # вікно + дозаповнення за один wait
+    rest = [r.text for r in results]
+    assert sorted([first.text, *rest]) == sorted(urls)
+
+
+def test_http_cache_fresh_hit_revalidation_and_eviction(tmp_path: Path):
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "a.html").write_text("<p>dog &amp; cat</p>", encoding="utf-8")
+    (site / "b.html").write_text("<p>" + "bird " * 100 + "</p>", encoding="utf-8")
+    cache = HttpCache(tmp_path / "cache", max_age=3600)
+
+    with _serve(site) as base:
+        assert get_text(f"{base}/a.html", cache=cache) == "dog & cat"
+        entry = cache.lookup(f"{base}/a.html")
+        assert entry is not None and entry.last_modified
+
+        # 304: сервер підтверджує актуальність — текст береться з кешу без очищення
+        entry.text_path.write_text("from cache", encoding="utf-8")
+        cache.max_age = 0
+        assert get_text(f"{base}/a.html", cache=cache) == "from cache"
+        assert cache.is_fresh(cache.lookup(f"{base}/a.html")) is False
+
+    # свіжий запис віддається навіть без сервера
+    cache.max_age = 3600
+    assert get_text(f"{base}/a.html", cache=cache, retries=1) == "from cache"
+
+    # LRU: новий великий запис витісняє давніший
+    cache.max_bytes = 1020
+    with _serve(site) as base2:
+        get_text(f"{base2}/b.html", cache=cache)
+    assert cache.lookup(f"{base}/a.html") is None
+    assert cache.lookup(f"{base2}/b.html") is not None
+
+
+def test_snapshot_merge_counts_only_delta(tmp_path: Path, capsys):
+    (tmp_path / "a.txt").write_text("Кіт пес кіт the", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("пес пес dog the the", encoding="utf-8")
+    stop = tmp_path / "stop.txt"
+    stop.write_text("the\n", encoding="utf-8")
+    snap = tmp_path / "snap" / "counts.wcs"
+
+    base = ["--no-plot", "--snapshot", str(snap)]
+    assert wordcount_cli.main(["--path", str(tmp_path / "a.txt"), *base]) == 0
+    assert load_snapshot(snap) == {"кіт": 2, "пес": 1, "the": 1}
+
+    # дельта: рахуємо лише b.txt і додаємо до наявного знімка
+    assert (
+        wordcount_cli.main(["--path", str(tmp_path / "b.txt"), "--merge", *base]) == 0
+    )
+    assert load_snapshot(snap) == {"кіт": 2, "пес": 3, "dog": 1, "the": 3}
+
+    # запит до знімка без джерела, стоп-слова застосовуються при виводі
+    capsys.readouterr()
+    assert wordcount_cli.main([*base, "--top", "2", "--stop-words", str(stop)]) == 0
+    out = capsys.readouterr().out
+    assert (
+        "пес  3" in out
+        and "кіт  2" in out
+        and "the" not in out.split("TOP-N слова:")[1]
+    )
+
+
+def test_compiled_corpus_counts_ids_with_stop_mask_and_doc_subsets(
+    tmp_path: Path, capsys
+):
+    texts = {
+        "a.txt": "Кіт пес кіт the. " * 50,
+        "b.txt": "пес dog the the",
+        "c.txt": _zipf_text(10_000, seed=3),
+    }
+    # Шматки по 97 символів ріжуть слова — компіляція зшиває їх назад
+    path = compile_corpus(
+        (
+            (name, [text[i : i + 97] for i in range(0, len(text), 97)])
+            for name, text in texts.items()
+        ),
+        tmp_path / "corpus.wcc",
+        batch_chars=1000,
+    )
+    corpus = load_corpus(path)
+    assert (corpus.documents, [corpus.name(d) for d in range(3)]) == (
+        3,
+        list(texts),
+    )
+    full = count_words("\n".join(texts.values()), threads=4)
+    assert corpus.token_count() == sum(full.values())
+    assert corpus.vocab_size == len(full)
+    assert corpus.top(corpus.counts(), 15) == full.most_common(15)
+
+    # стоп-слова — маска над ID (включно з відсутнім у корпусі словом)
+    counts = corpus.counts(stop_words={"the", "кіт", "немає"})
+    assert counts[corpus.word_id("the")] == 0 and corpus.word_id("немає") is None
+    assert int(counts.sum()) == sum(full.values()) - full["the"] - full["кіт"]
+
+    # підмножина документів: лише a.txt і b.txt
+    docs = corpus.select(["[ab].txt"])
+    subset = count_words(texts["a.txt"] + "\n" + texts["b.txt"], threads=1)
+    assert docs == [0, 1]
+    assert corpus.top(corpus.counts(docs), 4) == subset.most_common(4)
+
+    # CLI: компіляція з файлів, далі запит без джерела
+    for name, text in texts.items():
+        (tmp_path / name).write_text(text, encoding="utf-8")
+    stop = tmp_path / "stop.txt"
+    stop.write_text("the\n", encoding="utf-8")
+    store = tmp_path / "out" / "files.wcc"
+    sources = [str(tmp_path / n) for n in ("a.txt", "b.txt")]
+    assert (
+        wordcount_cli.main(["--no-plot", "--path", *sources, "--corpus", str(store)])
+        == 0
+    )
+    assert load_corpus(store).documents == 2
+    capsys.readouterr()
+    query = ["--no-plot", "--corpus", str(store), "--top", "2"]
+    assert wordcount_cli.main([*query, "--stop-words", str(stop)]) == 0
+    out = capsys.readouterr().out
+    assert "кіт  100" in out and "пес  51" in out and "(read, документів: 2/2" in out
+    assert wordcount_cli.main([*query, "--docs", "*b.txt"]) == 0
+    assert "the  2" in capsys.readouterr().out
+
+
+def test_ngrams_and_cooccurrence_span_chunk_boundaries_but_not_documents():
+    docs = [_zipf_text(3_000, seed=1), "Кіт пес кіт пес the кіт", "пес dog"]
+    stop = {"the"}
+    tokens = [_tokenize(d) for d in docs]
+
+    def brute(pairs) -> Counter:
+        return Counter(g for words in tokens for g in pairs(words) if not stop & set(g))
+
+    for executor in ("thread", "process"):
+        for n in (2, 3):
+            grams = count_ngrams(docs, n, threads=7, stop_words=stop, executor=executor)
+            expected = brute(
+                lambda w: (tuple(w[i : i + n]) for i in range(len(w) - n + 1))
+            )
+            assert {grams.decode(k): c for k, c in grams.counts.items()} == expected
+
+        pairs = count_cooccurrence(docs, 3, threads=5, stop_words=stop)
+        expected = brute(
+            lambda w: (
+                tuple(sorted((w[i], w[j])))
+                for i in range(len(w))
+                for j in range(i + 1, min(len(w), i + 4))
+                if w[i] != w[j]
+            )
+        )
+        decoded = {tuple(sorted(pairs.decode(k))): c for k, c in pairs.counts.items()}
+        assert decoded == expected
+
+    # ключі — упаковані int, рядки з'являються лише в TOP-N
+    assert all(isinstance(k, int) for k in grams.counts)
+    top = mapreduce_ngrams(docs[1], n=2, top_n=2, threads=3)
+    assert top == [(("кіт", "пес"), 2), (("пес", "кіт"), 1)]
+
+
+def test_approx_heavy_hitters_bounds():
+    # Zipf-подібний текст: слово w{i} зустрічається ≈ 600 / i разів
+    words = [f"w{chr(97 + i % 26)}{chr(97 + i // 26)}" for i in range(300)]
+    text = " ".join(w for i, w in enumerate(words, 1) for _ in range(600 // i))
+    exact = count_words(text, threads=1)
+
+    summary = approx_words_stream(
+        [text], epsilon=0.02, threads=3, executor="process", batch_chars=200
+    )
+    assert summary.total == sum(exact.values())
+    assert len(summary.counts) <= 2 * summary.k
+    assert summary.error <= summary.total / (summary.k + 1)
+    for word, est in summary.counts.items():
+        assert est <= exact[word] <= est + summary.error
+    assert [w for w, _ in summary.most_common(3)] == [
+        w for w, _ in exact.most_common(3)
+    ]
+
+
 def test_visualize_creates_png(tmp_path: Path):
     out = tmp_path / "chart.png"
     fig = visualize_top_words([("alpha", 5), ("beta", 3), ("gamma", 1)], out)
     assert fig.exists()
     assert fig.suffix.lower() == ".png"
+
+
+def test_metrics_report_times_map_tasks_and_skew(tmp_path: Path):
+    stats = MapReduceStats(map_task_seconds=[0.1, 0.1, 0.1, 0.4])
+    assert stats.map_skew() == 4.0
+    assert stats.to_dict()["map"]["task_seconds"]["max"] == 0.4
+
+    for i in range(3):
+        (tmp_path / f"{i}.txt").write_text("кіт пес " * (i + 1), encoding="utf-8")
+    report = tmp_path / "metrics.json"
+    args = ["--path", str(tmp_path), "--no-plot", "--metrics-json", str(report)]
+    assert wordcount_cli.main([*args, "--threads", "2"]) == 0
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["tool"] == "wordcount-mr" and data["status"] == "ok"
+    assert (data["words"], data["unique_words"]) == (12, 2)
+    task_seconds = data["map"]["task_seconds"]
+    assert data["map"]["tasks"] > 0 and 0 < task_seconds["p50"] <= task_seconds["max"]
+    assert data["map"]["skew"] >= 1.0
+    assert data["reduce"]["tasks"] > 0
+
+    # --approx і запит до знімка: слова рахуються з остаточного результату
+    sources = ["--path", str(tmp_path / "*.txt")]
+    metrics = ["--no-plot", "--metrics-json", str(report)]
+    assert wordcount_cli.main([*sources, *metrics, "--approx"]) == 0
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert (data["words"], data["unique_words"]) == (12, 2)
+    snap = ["--snapshot", str(tmp_path / "counts.wcs")]
+    assert wordcount_cli.main([*sources, *snap, "--no-plot"]) == 0
+    assert wordcount_cli.main([*snap, *metrics]) == 0
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert (data["status"], data["words"], data["unique_words"]) == ("ok", 12, 2)
+
+
+def test_cli_validates_backend_and_stream_after_all_sources(tmp_path: Path, capsys):
+    (tmp_path / "a.txt").write_text("кіт", encoding="utf-8")
+    url_file = tmp_path / "urls.txt"
+    url_file.write_text("https://a.example/\nhttps://b.example/\n", encoding="utf-8")
+
+    def error(*argv: str) -> str:
+        with pytest.raises(SystemExit):
+            wordcount_cli.main(["--no-plot", *argv])
+        return capsys.readouterr().err
+
+    # два URL із файлу — numpy відхиляється за фактичними джерелами
+    assert "--backend numpy" in error("--url-file", str(url_file), "--backend", "numpy")
+    path = ["--path", str(tmp_path / "a.txt")]
+    assert "--backend numpy" in error(*path, "--backend", "numpy")
+    assert "--stream" in error(*path, "--stream")